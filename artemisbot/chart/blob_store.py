@@ -0,0 +1,258 @@
+"""
+Content-addressed storage for rendered chart images.
+
+Different chart keys often produce identical images (no new data since the last
+render, `mtd` vs `1m` early in a month). The screenshot cache stores only a
+digest per key; the image bytes live here once per distinct content, together
+with the Telegram file_id of the first upload so every key can reuse it.
+
+Optionally, images can also be matched by a perceptual (difference) hash so
+visually identical renders with different PNG bytes share a blob as well.
+
+Blobs are immutable `bytes` handed out without copying. With BLOB_CACHE_DIR set
+they are kept on disk instead of in memory and uploads stream from the file;
+the bot clears files left there by an earlier process at startup.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Union
+
+from config import BLOB_CACHE_DIR, PERCEPTUAL_DEDUP, PERCEPTUAL_HASH_SIZE
+from artemisbot.utils import metrics
+
+if TYPE_CHECKING:
+    from telegram import InputFile
+
+# In-memory blobs (unused when BLOB_CACHE_DIR is set)
+BLOBS: Dict[str, bytes] = {}
+FILE_IDS: Dict[str, str] = {}
+_SIZES: Dict[str, int] = {}
+_REFS: Dict[str, int] = {}
+_PERCEPTUAL_INDEX: Dict[tuple, str] = {}
+_LOCK = threading.Lock()
+
+
+def content_digest(data: bytes) -> str:
+    """Digest identifying the exact bytes of an image."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def perceptual_hash(data: bytes) -> Optional[tuple]:
+    """
+    Difference hash of an image together with its dimensions.
+
+    Returns:
+        (width, height, hash) or None if the image cannot be decoded
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            size = image.size
+            pixels = list(image.convert("L").resize((PERCEPTUAL_HASH_SIZE + 1, PERCEPTUAL_HASH_SIZE)).getdata())
+    except Exception:
+        return None
+
+    bits = 0
+    row_width = PERCEPTUAL_HASH_SIZE + 1
+    for row in range(PERCEPTUAL_HASH_SIZE):
+        for col in range(PERCEPTUAL_HASH_SIZE):
+            left = pixels[row * row_width + col]
+            right = pixels[row * row_width + col + 1]
+            bits = (bits << 1) | (left > right)
+    return size + (bits,)
+
+
+def blob_path(digest: str) -> str:
+    """Path of a blob in the disk cache."""
+    return os.path.join(BLOB_CACHE_DIR, f"{digest}.png")
+
+
+def _store(digest: str, data: bytes) -> None:
+    """Keep a new blob in memory or write it to the disk cache (caller holds _LOCK)."""
+    if BLOB_CACHE_DIR:
+        os.makedirs(BLOB_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{blob_path(digest)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, blob_path(digest))
+    else:
+        BLOBS[digest] = data
+    _SIZES[digest] = len(data)
+
+
+def put(data: bytes) -> str:
+    """
+    Store an image and take a reference to it.
+
+    Returns:
+        The digest under which the (possibly pre-existing) image is stored
+    """
+    digest = content_digest(data)
+    phash = None
+    if PERCEPTUAL_DEDUP and digest not in _SIZES:
+        phash = perceptual_hash(data)
+
+    with _LOCK:
+        if digest not in _SIZES and phash is not None and phash in _PERCEPTUAL_INDEX:
+            digest = _PERCEPTUAL_INDEX[phash]
+            metrics.incr("blob_store.perceptual_matches")
+        if digest in _SIZES:
+            metrics.incr("blob_store.dedup_hits")
+        else:
+            _store(digest, data)
+            if phash is not None:
+                _PERCEPTUAL_INDEX[phash] = digest
+        _REFS[digest] = _REFS.get(digest, 0) + 1
+    return digest
+
+
+def get(digest: str) -> Optional[bytes]:
+    """Return the image stored under a digest (the shared buffer, or read from the disk cache)."""
+    if digest in BLOBS:
+        return BLOBS[digest]
+    if BLOB_CACHE_DIR and digest in _SIZES:
+        try:
+            with open(blob_path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    return None
+
+
+def size(digest: str) -> Optional[int]:
+    """Size in bytes of the image stored under a digest, if it is stored."""
+    return _SIZES.get(digest)
+
+
+@contextmanager
+def upload_source(digest: str) -> Iterator[Optional[Union[str, bytes, "InputFile"]]]:
+    """
+    What to pass to Telegram to send the image stored under a digest, without copying it.
+
+    A file streamed from the disk cache is closed when the block exits.
+
+    Yields:
+        The file_id of a previous upload, an InputFile streaming from the disk cache,
+        the shared in-memory buffer, or None if the image is no longer stored
+    """
+    file_id = FILE_IDS.get(digest)
+    if file_id:
+        metrics.incr("blob_store.file_id_reuses")
+        yield file_id
+        return
+    data = BLOBS.get(digest)
+    if data is not None or not BLOB_CACHE_DIR or digest not in _SIZES:
+        yield data
+        return
+
+    from telegram import InputFile
+
+    try:
+        f = open(blob_path(digest), "rb")
+    except FileNotFoundError:
+        # Released since we looked it up
+        yield None
+        return
+    metrics.incr("blob_store.disk_streams")
+    try:
+        # read_file_handle=False lets the HTTP client stream the file instead of loading it
+        yield InputFile(f, filename=f"{digest}.png", read_file_handle=False)
+    finally:
+        f.close()
+
+
+def release(digest: str) -> None:
+    """Drop a reference, deleting the image once nothing refers to it."""
+    with _LOCK:
+        count = _REFS.get(digest, 0) - 1
+        if count > 0:
+            _REFS[digest] = count
+            return
+        _REFS.pop(digest, None)
+        BLOBS.pop(digest, None)
+        FILE_IDS.pop(digest, None)
+        if _SIZES.pop(digest, None) is not None and BLOB_CACHE_DIR:
+            try:
+                os.remove(blob_path(digest))
+            except FileNotFoundError:
+                pass
+        for phash in [h for h, d in _PERCEPTUAL_INDEX.items() if d == digest]:
+            del _PERCEPTUAL_INDEX[phash]
+
+
+def clear_disk_cache() -> int:
+    """
+    Delete blobs left in BLOB_CACHE_DIR by an earlier process.
+
+    Digests and references only live in memory, so after a restart nothing can
+    refer to those files any more. Only the bot calls this, at startup: any other
+    process would delete the live bot's blobs.
+
+    Returns:
+        The number of files removed
+    """
+    if not BLOB_CACHE_DIR or not os.path.isdir(BLOB_CACHE_DIR):
+        return 0
+    removed = 0
+    with _LOCK:
+        for name in os.listdir(BLOB_CACHE_DIR):
+            if not name.endswith((".png", ".png.tmp")) or name.split(".", 1)[0] in _SIZES:
+                continue
+            try:
+                os.remove(os.path.join(BLOB_CACHE_DIR, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def remember_file_id(data: bytes, file_id: str) -> None:
+    """Record the Telegram file_id of an uploaded image so later sends can reuse it."""
+    set_file_id(content_digest(data), file_id)
+
+
+def set_file_id(digest: str, file_id: str) -> None:
+    """Record the Telegram file_id of the image stored under a digest."""
+    if digest in _SIZES:
+        FILE_IDS[digest] = file_id
+
+
+def get_file_id(digest: str) -> Optional[str]:
+    """Return the Telegram file_id recorded for the image stored under a digest."""
+    return FILE_IDS.get(digest)
+
+
+def photo_for(data: bytes) -> Union[str, bytes]:
+    """Return the Telegram file_id for an image if it was uploaded before, otherwise the bytes."""
+    file_id = FILE_IDS.get(content_digest(data))
+    if file_id:
+        metrics.incr("blob_store.file_id_reuses")
+        return file_id
+    return data
+
+
+def dedup_stats() -> Dict[str, float]:
+    """References, unique blobs, dedup ratio and bytes saved by sharing blobs."""
+    with _LOCK:
+        references = sum(_REFS.values())
+        blobs = len(_SIZES)
+        stored = sum(_SIZES.values())
+        resident = sum(len(data) for data in BLOBS.values())
+        logical = sum(_SIZES[digest] * count for digest, count in _REFS.items() if digest in _SIZES)
+    return {
+        "blob_store.references": references,
+        "blob_store.blobs": blobs,
+        "blob_store.dedup_ratio": references / blobs if blobs else 1.0,
+        "blob_store.bytes_stored": stored,
+        "blob_store.bytes_in_memory": resident,
+        "blob_store.bytes_saved": logical - stored,
+        "blob_store.file_ids": len(FILE_IDS)
+    }
+
+
+metrics.register_collector(dedup_stats)
@@ -0,0 +1,538 @@
+"""
+Render engine that drives headless Chrome directly over the DevTools protocol.
+
+There is no chromedriver in between and nothing blocks: one browser is driven
+from a dedicated asyncio event loop over a single websocket, with one flattened
+CDP session per page, so up to CDP_MAX_PAGES charts render concurrently. Each
+page is checked with a single batched JS evaluation that waits for the chart
+in the page itself, instead of a WebDriver round trip per element lookup.
+
+render_chart/render_series have the same signatures and results as the
+Selenium engine in screenshot.py and may be called from any thread; the
+coroutines behind them can be awaited directly on the engine loop.
+
+Selected with RENDER_ENGINE=cdp.
+"""
+
+import asyncio
+import atexit
+import base64
+import itertools
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Union
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from config import (
+    ARTEMIS_API_KEY,
+    CAPTURE_MODE,
+    CDP_LAUNCH_TIMEOUT,
+    CDP_MAX_PAGES,
+    CHROME_BINARY,
+    CHROME_MAX_AGE,
+    CHROME_MAX_RENDERS,
+    CHROME_MAX_RSS_MB,
+    CHROME_QUIT_TIMEOUT,
+    CHROME_RENDER_DEADLINE,
+)
+from artemisbot.chart import governor, render_profile, svg_export, upstream
+from artemisbot.chart.chart_data import SeriesData, indexed_series_from_js, series_from_js
+from artemisbot.chart.screenshot import (
+    APPLY_SERIES_JS,
+    CHART_STATE_JS,
+    EXTRACT_SERIES_JS,
+    FOCUS_CHART_JS,
+    GET_SVG_JS,
+    RenderedChart,
+    _classify_webdriver_error,
+    percentage_payload,
+)
+from artemisbot.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Executables tried on PATH when CHROME_BINARY is not set
+CHROME_BINARY_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+# Seconds for a single CDP command to answer
+COMMAND_TIMEOUT = 15
+# Padding around the captured chart, in CSS pixels
+CAPTURE_PADDING = 10
+
+# Resolves with {status: "ready", rect: {...}}, {status: "no_data"} or {status: "timeout"}
+CHART_READY_JS = """
+new Promise(function(resolve) {
+    var deadline = Date.now() + %(timeout_ms)d;
+    function chartState() {""" + CHART_STATE_JS.replace("%", "%%") + """}
+    (function poll() {
+        var state = chartState();
+        if (state === "no_data") return resolve({status: "no_data"});
+        if (state === "ready") {
+            var largest = Array.prototype.slice.call(document.querySelectorAll(".highcharts-container"))
+                .reduce(function(a, b) {
+                    return a.offsetWidth * a.offsetHeight >= b.offsetWidth * b.offsetHeight ? a : b;
+                });
+            largest.scrollIntoView(true);
+            var r = largest.getBoundingClientRect();
+            return resolve({status: "ready", rect: {
+                x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height
+            }});
+        }
+        if (Date.now() > deadline) return resolve({status: "timeout"});
+        setTimeout(poll, 100);
+    })();
+})
+"""
+
+
+class CDPError(Exception):
+    """A DevTools command failed or the browser connection was lost."""
+
+
+class CDPBrowser:
+    """A headless Chrome process and the DevTools websocket that drives it."""
+
+    def __init__(self, process: asyncio.subprocess.Process, websocket, user_data_dir: str):
+        self.process = process
+        self.websocket = websocket
+        self.user_data_dir = user_data_dir
+        self.created_at = time.monotonic()
+        self.render_count = 0
+        self.active_pages = 0
+        self.timed_out = False
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._waiters: Dict[Tuple[Optional[str], str], List[asyncio.Future]] = defaultdict(list)
+        self._reader = asyncio.ensure_future(self._read())
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def is_alive(self) -> bool:
+        return self.process.returncode is None and not self._reader.done()
+
+    def recycle_reason(self) -> Optional[str]:
+        """Why this browser should be replaced (same limits as the Selenium pool), or None."""
+        if self.timed_out:
+            return "render deadline exceeded"
+        if not self.is_alive():
+            return "browser is not responding"
+        if self.render_count >= CHROME_MAX_RENDERS:
+            return f"served {self.render_count} renders"
+        age = time.monotonic() - self.created_at
+        if age >= CHROME_MAX_AGE:
+            return f"age {age:.0f}s"
+        rss = governor.tree_rss_mb(self.pid)
+        if rss >= CHROME_MAX_RSS_MB:
+            return f"RSS {rss:.0f}MB"
+        return None
+
+    async def _read(self) -> None:
+        """Dispatch command responses and events until the connection closes."""
+        try:
+            async for raw in self.websocket:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self._pending.pop(message["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CDPError(message["error"].get("message", "unknown error")))
+                    else:
+                        future.set_result(message.get("result", {}))
+                else:
+                    for future in self._waiters.pop((message.get("sessionId"), message.get("method")), []):
+                        if not future.done():
+                            future.set_result(message.get("params", {}))
+        except ConnectionClosed:
+            pass
+        finally:
+            waiting = list(self._pending.values())
+            waiting.extend(f for futures in self._waiters.values() for f in futures)
+            self._pending.clear()
+            self._waiters.clear()
+            for future in waiting:
+                if not future.done():
+                    future.set_exception(CDPError("browser connection closed"))
+
+    async def send(self, method: str, params: Optional[Dict] = None, session_id: Optional[str] = None,
+                   timeout: float = COMMAND_TIMEOUT) -> Dict:
+        """Send a CDP command (to a page when session_id is given) and wait for its result."""
+        if self._reader.done():
+            raise CDPError("browser connection closed")
+        command_id = next(self._ids)
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        try:
+            await self.websocket.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"{method} timed out after {timeout}s")
+        finally:
+            self._pending.pop(command_id, None)
+
+    def expect_event(self, session_id: Optional[str], method: str) -> asyncio.Future:
+        """Future resolving with the params of the next `method` event of a session."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[(session_id, method)].append(future)
+        return future
+
+    def forget_session(self, session_id: str) -> None:
+        """Drop event waiters of a page that is being closed."""
+        for key in [key for key in self._waiters if key[0] == session_id]:
+            for future in self._waiters.pop(key):
+                future.cancel()
+
+    async def close(self) -> None:
+        """Close the browser, killing whatever is left of its process tree."""
+        pids = governor.browser_processes(self.pid)
+        try:
+            await self.send("Browser.close", timeout=CHROME_QUIT_TIMEOUT)
+        except Exception:
+            pass
+        try:
+            await asyncio.wait_for(self.process.wait(), CHROME_QUIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        # Renderers do not always exit with the browser
+        governor.kill_processes(pids)
+        governor.unregister_external_browser(self.pid)
+        self._reader.cancel()
+        await self.websocket.close()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+# Engine state, only touched from the engine loop
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+_BROWSER: Optional[CDPBrowser] = None
+# Replaced browsers still finishing their pages; each closes with its last page
+_RETIRING: List[CDPBrowser] = []
+_BROWSER_LOCK: Optional[asyncio.Lock] = None
+_PAGES: Optional[asyncio.Semaphore] = None
+
+
+def _chrome_binary() -> str:
+    if CHROME_BINARY:
+        return CHROME_BINARY
+    for name in CHROME_BINARY_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise CDPError("Chrome executable not found; set CHROME_BINARY")
+
+
+async def _devtools_url(user_data_dir: str, process: asyncio.subprocess.Process) -> str:
+    """Wait for Chrome to write its DevTools endpoint to DevToolsActivePort."""
+    port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+    while True:
+        if process.returncode is not None:
+            raise CDPError(f"Chrome exited with code {process.returncode}")
+        try:
+            with open(port_file) as f:
+                lines = f.read().split()
+            if len(lines) >= 2:
+                return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+        except FileNotFoundError:
+            pass
+        await asyncio.sleep(0.05)
+
+
+async def _launch() -> CDPBrowser:
+    """Start headless Chrome with remote debugging and connect to it."""
+    user_data_dir = tempfile.mkdtemp(prefix="artemis-cdp-")
+    with governor.launching():
+        process = await asyncio.create_subprocess_exec(
+            _chrome_binary(), *governor.chrome_arguments(),
+            "--remote-debugging-port=0", f"--user-data-dir={user_data_dir}", "about:blank",
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        governor.register_external_browser(process.pid)
+    try:
+        url = await asyncio.wait_for(_devtools_url(user_data_dir, process), CDP_LAUNCH_TIMEOUT)
+        websocket = await connect(url, max_size=None, ping_interval=None)
+    except BaseException:
+        governor.kill_processes(governor.browser_processes(process.pid))
+        governor.unregister_external_browser(process.pid)
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        raise
+    logger.info("Launched Chrome for the CDP engine (pid %s)", process.pid)
+    return CDPBrowser(process, websocket, user_data_dir)
+
+
+async def _get_browser() -> CDPBrowser:
+    """
+    The shared browser, replaced as soon as it is past a recycle threshold.
+
+    A replaced browser gets no new pages; it is closed once its open pages finish.
+    """
+    global _BROWSER, _BROWSER_LOCK
+    if _BROWSER_LOCK is None:
+        _BROWSER_LOCK = asyncio.Lock()
+    async with _BROWSER_LOCK:
+        if _BROWSER is not None:
+            reason = _BROWSER.recycle_reason()
+            if reason:
+                logger.info("Recycling CDP Chrome (pid %s): %s", _BROWSER.pid, reason)
+                browser, _BROWSER = _BROWSER, None
+                if browser.active_pages == 0 or not browser.is_alive():
+                    await browser.close()
+                else:
+                    _RETIRING.append(browser)
+        if _BROWSER is None:
+            _BROWSER = await _launch()
+        return _BROWSER
+
+
+async def _call_js(browser: CDPBrowser, session_id: str, script: str, *args):
+    """Run a WebDriver-style script body (using `arguments`) in a page and return its value."""
+    expression = f"(function() {{{script}}}).apply(null, {json.dumps(list(args))})"
+    return await _evaluate(browser, session_id, expression)
+
+
+async def _evaluate(browser: CDPBrowser, session_id: str, expression: str, timeout: float = COMMAND_TIMEOUT):
+    result = await browser.send("Runtime.evaluate", {
+        "expression": expression, "returnByValue": True, "awaitPromise": True,
+    }, session_id, timeout=timeout)
+    if "exceptionDetails" in result:
+        details = result["exceptionDetails"]
+        raise CDPError(details.get("exception", {}).get("description") or details.get("text", "script error"))
+    return result.get("result", {}).get("value")
+
+
+async def _open_chart(browser: CDPBrowser, session_id: str, url: str) -> Union[Dict, str]:
+    """
+    Load a chart in a page and wait for it to render, like screenshot._load_chart_page.
+
+    Returns:
+        The clip rectangle of the largest chart (padded, or the whole viewport for
+        chart-only render profiles), or an "ERROR:..." string
+    """
+    width, height = render_profile.viewport()
+    setup = [
+        browser.send("Page.enable", session_id=session_id),
+        browser.send("Emulation.setDeviceMetricsOverride", {
+            "width": width, "height": height, "deviceScaleFactor": 1, "mobile": False,
+        }, session_id),
+    ]
+    script = render_profile.document_start_script()
+    if script:
+        setup.append(browser.send("Page.addScriptToEvaluateOnNewDocument", {"source": script}, session_id))
+    if ARTEMIS_API_KEY:
+        setup.append(browser.send("Network.setCookie", {
+            "name": "artemis_api_key", "value": ARTEMIS_API_KEY, "domain": ".artemis.xyz", "path": "/",
+        }, session_id))
+    await asyncio.gather(*setup)
+
+    loaded = browser.expect_event(session_id, "Page.loadEventFired")
+    started = time.monotonic()
+    navigation = await browser.send("Page.navigate", {"url": url}, session_id)
+    if navigation.get("errorText"):
+        return _classify_webdriver_error(CDPError(navigation["errorText"]))
+    timeout = upstream.stage_timeout("page_load")
+    try:
+        await asyncio.wait_for(loaded, timeout)
+    except asyncio.TimeoutError:
+        # Count the timeout as a sample so a slow site raises the timeout
+        upstream.record_latency("page_load", timeout)
+        raise CDPError("Timed out waiting for the page to load")
+    upstream.record_latency("page_load", time.monotonic() - started)
+
+    started = time.monotonic()
+    timeout = upstream.stage_timeout("chart_render")
+    state = await _evaluate(browser, session_id, CHART_READY_JS % {"timeout_ms": int(timeout * 1000)},
+                            timeout=timeout + COMMAND_TIMEOUT)
+    if state["status"] == "no_data":
+        return "ERROR:NO_DATA"
+    if state["status"] != "ready":
+        upstream.record_latency("chart_render", timeout)
+        raise CDPError("Timed out waiting for the chart to render")
+    upstream.record_latency("chart_render", time.monotonic() - started)
+    await asyncio.sleep(render_profile.settle_seconds())
+
+    if render_profile.chart_only():
+        rect = await _call_js(browser, session_id, FOCUS_CHART_JS, width, height)
+        if rect:
+            await asyncio.sleep(render_profile.settle_seconds())
+            return dict(rect, scale=1)
+
+    rect = state["rect"]
+    return {
+        "x": max(0, rect["x"] - CAPTURE_PADDING),
+        "y": max(0, rect["y"] - CAPTURE_PADDING),
+        "width": rect["width"] + 2 * CAPTURE_PADDING,
+        "height": rect["height"] + 2 * CAPTURE_PADDING,
+        "scale": 1,
+    }
+
+
+async def _capture(browser: CDPBrowser, session_id: str, clip: Dict) -> bytes:
+    if CAPTURE_MODE == "svg":
+        try:
+            svg = await _call_js(browser, session_id, GET_SVG_JS)
+        except CDPError:
+            svg = None
+        png = await svg_export.rasterize_async(svg)
+        if png is not None:
+            return png
+        metrics.incr("svg_export.fallbacks")
+    response = await browser.send("Page.captureScreenshot", {
+        "format": "png", "clip": clip, "captureBeyondViewport": True,
+    }, session_id)
+    return base64.b64decode(response.pop("data"))
+
+
+async def _with_page(url: str, work):
+    """
+    Open a page for `url`, run `work(browser, session_id, clip)` on it and always close the page.
+
+    A render running past CHROME_RENDER_DEADLINE fails and gets the browser recycled.
+    """
+    global _PAGES
+    if _PAGES is None:
+        _PAGES = asyncio.Semaphore(max(1, CDP_MAX_PAGES))
+    async with _PAGES:
+        browser = await _get_browser()
+        browser.active_pages += 1
+        try:
+            return await asyncio.wait_for(_render_page(browser, url, work), CHROME_RENDER_DEADLINE)
+        except asyncio.TimeoutError:
+            logger.warning("Render exceeded %ss deadline, recycling CDP Chrome (pid %s)",
+                           CHROME_RENDER_DEADLINE, browser.pid)
+            browser.timed_out = True
+            raise CDPError(f"Render exceeded {CHROME_RENDER_DEADLINE}s deadline")
+        finally:
+            browser.active_pages -= 1
+            browser.render_count += 1
+            if browser in _RETIRING and browser.active_pages == 0:
+                _RETIRING.remove(browser)
+                await browser.close()
+
+
+async def _render_page(browser: CDPBrowser, url: str, work):
+    target_id = session_id = None
+    try:
+        target_id = (await browser.send("Target.createTarget", {"url": "about:blank"}))["targetId"]
+        session_id = (await browser.send("Target.attachToTarget", {
+            "targetId": target_id, "flatten": True,
+        }))["sessionId"]
+        clip = await _open_chart(browser, session_id, url)
+        if isinstance(clip, str):
+            return clip
+        return await work(browser, session_id, clip)
+    finally:
+        if session_id is not None:
+            browser.forget_session(session_id)
+        if target_id is not None and browser.is_alive():
+            try:
+                await browser.send("Target.closeTarget", {"targetId": target_id})
+            except Exception:
+                pass
+
+
+async def render_chart_async(url: str, is_percentage: bool = False) -> Union[RenderedChart, str]:
+    """Coroutine behind render_chart; must run on the engine loop."""
+    async def work(browser: CDPBrowser, session_id: str, clip: Dict):
+        raw = await _capture(browser, session_id, clip)
+        if not is_percentage:
+            return raw, None, None
+        indexed = indexed_series_from_js(await _call_js(browser, session_id, EXTRACT_SERIES_JS))
+        if not indexed:
+            return raw, None, None
+        series = [s for _, s in indexed]
+        await _call_js(browser, session_id, APPLY_SERIES_JS, percentage_payload(indexed), "{value}%")
+        await asyncio.sleep(0.2)  # Let the redraw settle
+        return raw, await _capture(browser, session_id, clip), series
+
+    try:
+        return await _with_page(url, work)
+    except CDPError as e:
+        return _classify_webdriver_error(e)
+
+
+async def render_series_async(url: str) -> Union[List[SeriesData], str]:
+    """Coroutine behind render_series; must run on the engine loop."""
+    async def work(browser: CDPBrowser, session_id: str, clip: Dict):
+        return series_from_js(await _call_js(browser, session_id, EXTRACT_SERIES_JS)) or "ERROR:NO_DATA"
+
+    try:
+        return await _with_page(url, work)
+    except CDPError as e:
+        return _classify_webdriver_error(e)
+
+
+def engine_loop() -> asyncio.AbstractEventLoop:
+    """The event loop the engine runs on, started in a daemon thread on first use."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="cdp-engine", daemon=True).start()
+    return _LOOP
+
+
+def _run(coroutine, timeout: Optional[float] = None):
+    return asyncio.run_coroutine_threadsafe(coroutine, engine_loop()).result(timeout)
+
+
+def render_chart(url: str, is_percentage: bool = False) -> Union[RenderedChart, str]:
+    """
+    CDP engine: load a chart and capture it, plus its percentage view if requested.
+
+    Returns:
+        (raw PNG, percentage PNG or None, extracted series or None), or an "ERROR:..." string
+    """
+    return _run(render_chart_async(url, is_percentage))
+
+
+def render_series(url: str) -> Union[List[SeriesData], str]:
+    """CDP engine: load a chart and extract its series."""
+    return _run(render_series_async(url))
+
+
+def cdp_stats() -> Dict[str, float]:
+    """Browser PID, renders and open pages of the CDP engine."""
+    browser = _BROWSER
+    if browser is None:
+        return {}
+    return {
+        "cdp.renders": browser.render_count,
+        "cdp.active_pages": browser.active_pages,
+        "cdp.rss_mb": round(governor.tree_rss_mb(browser.pid), 1),
+        "cdp.retiring_browsers": len(_RETIRING),
+    }
+
+
+async def _shutdown_async() -> None:
+    global _BROWSER
+    browsers = _RETIRING + ([_BROWSER] if _BROWSER is not None else [])
+    _BROWSER = None
+    _RETIRING.clear()
+    for browser in browsers:
+        await browser.close()
+
+
+def shutdown() -> None:
+    """Close the CDP engine's browsers."""
+    if _LOOP is not None and (_BROWSER is not None or _RETIRING):
+        try:
+            _run(_shutdown_async(), timeout=CHROME_QUIT_TIMEOUT * 2)
+        except Exception:
+            pass
+
+
+metrics.register_collector(cdp_stats)
+atexit.register(shutdown)
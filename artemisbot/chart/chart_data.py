@@ -0,0 +1,146 @@
+"""
+Compact columnar storage for chart series and the CSV/summary formats built from it.
+
+Each series keeps its timestamps and values in two `array('d')` columns instead
+of a list of point dicts, which keeps cached chart data small.
+"""
+
+import io
+import csv
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SeriesData:
+    """A single named series with timestamps (ms since epoch) and values stored as columns."""
+
+    __slots__ = ("name", "timestamps", "values")
+
+    def __init__(self, name: str, timestamps: Iterable[float], values: Iterable[Optional[float]]):
+        self.name = name
+        self.timestamps = array("d", timestamps)
+        # Missing points are stored as NaN so the column stays numeric
+        self.values = array("d", (math.nan if v is None else v for v in values))
+
+    @classmethod
+    def from_columns(cls, name: str, timestamps: array, values: array) -> "SeriesData":
+        """Wrap existing columns without converting them."""
+        series = cls.__new__(cls)
+        series.name = name
+        series.timestamps = timestamps
+        series.values = values
+        return series
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def points(self) -> List[tuple]:
+        """(timestamp, value) pairs, skipping missing values."""
+        return [(t, v) for t, v in zip(self.timestamps, self.values) if not math.isnan(v)]
+
+
+def indexed_series_from_js(raw_series: List[Dict]) -> List[Tuple[int, SeriesData]]:
+    """
+    Convert the series payload returned by the extraction script, keeping chart positions.
+
+    Args:
+        raw_series: List of {"name", "x", "y"} dicts, in chart order
+
+    Returns:
+        (position in raw_series, series) for each non-empty series in columnar form
+    """
+    series = []
+    for index, raw in enumerate(raw_series or []):
+        xs, ys = raw.get("x") or [], raw.get("y") or []
+        if not xs or len(xs) != len(ys):
+            continue
+        series.append((index, SeriesData(raw.get("name") or "Series", xs, ys)))
+    return series
+
+
+def series_from_js(raw_series: List[Dict]) -> List[SeriesData]:
+    """
+    Convert the series payload returned by the extraction script.
+
+    Args:
+        raw_series: List of {"name", "x", "y"} dicts
+
+    Returns:
+        The non-empty series in columnar form
+    """
+    return [series for _, series in indexed_series_from_js(raw_series)]
+
+
+def format_date(timestamp: float) -> str:
+    """Format a millisecond timestamp as an ISO date."""
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def format_number(value: float) -> str:
+    """Format a value compactly, e.g. 1234567 -> 1.23M."""
+    magnitude = abs(value)
+    for threshold, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if magnitude >= threshold:
+            return f"{value / threshold:,.2f}{suffix}"
+    if magnitude >= 1 or magnitude == 0:
+        return f"{value:,.2f}"
+    return f"{value:.4g}"
+
+
+def to_csv(series: List[SeriesData]) -> bytes:
+    """
+    Build a CSV with one row per date and one column per series.
+
+    Args:
+        series: Series to export
+
+    Returns:
+        UTF-8 encoded CSV
+    """
+    columns = [dict(s.points()) for s in series]
+    timestamps = sorted(set().union(*(column.keys() for column in columns))) if columns else []
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["date"] + [s.name for s in series])
+    for timestamp in timestamps:
+        row = [format_date(timestamp)]
+        for column in columns:
+            value = column.get(timestamp)
+            row.append("" if value is None else repr(value))
+        writer.writerow(row)
+    return output.getvalue().encode("utf-8")
+
+
+def summarize(series: List[SeriesData], title: str) -> str:
+    """
+    Summarize each series as latest value, change over the period and min/max.
+
+    Args:
+        series: Series to summarize
+        title: Chart title used as the heading
+
+    Returns:
+        Text suitable for a Telegram message
+    """
+    lines = [f"📊 {title}"]
+    for s in series:
+        points = s.points()
+        if not points:
+            continue
+        first_time, first_value = points[0]
+        last_time, last_value = points[-1]
+        min_time, min_value = min(points, key=lambda p: p[1])
+        max_time, max_value = max(points, key=lambda p: p[1])
+
+        lines.append("")
+        lines.append(f"{s.name}")
+        lines.append(f"• Latest: {format_number(last_value)} ({format_date(last_time)})")
+        if first_value:
+            change = (last_value / first_value - 1) * 100
+            lines.append(f"• Change: {change:+.2f}% since {format_date(first_time)}")
+        lines.append(f"• Min: {format_number(min_value)} ({format_date(min_time)})")
+        lines.append(f"• Max: {format_number(max_value)} ({format_date(max_time)})")
+    return "\n".join(lines)
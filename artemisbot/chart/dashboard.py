@@ -0,0 +1,60 @@
+"""Compose several chart images into a single dashboard grid."""
+
+import io
+import math
+from typing import List, Tuple
+
+from config import DASHBOARD_COLUMNS, DASHBOARD_PANEL_SIZE
+
+LABEL_HEIGHT = 28
+PANEL_MARGIN = 12
+BACKGROUND = (255, 255, 255)
+LABEL_COLOR = (40, 40, 40)
+
+
+def compose_grid(panels: List[Tuple[str, bytes]], columns: int = DASHBOARD_COLUMNS,
+                 panel_size: Tuple[int, int] = DASHBOARD_PANEL_SIZE) -> bytes:
+    """
+    Lay chart images out in a labelled grid.
+
+    Each panel is scaled to fit `panel_size` while keeping its aspect ratio.
+
+    Args:
+        panels: (label, PNG bytes) pairs in display order
+        columns: Number of panels per row
+        panel_size: (width, height) of each grid cell
+
+    Returns:
+        The grid as PNG bytes
+    """
+    from PIL import Image, ImageDraw
+
+    if not panels:
+        raise ValueError("No panels to compose")
+
+    columns = max(1, min(columns, len(panels)))
+    rows = math.ceil(len(panels) / columns)
+    cell_width, cell_height = panel_size
+    slot_width = cell_width + PANEL_MARGIN
+    slot_height = cell_height + LABEL_HEIGHT + PANEL_MARGIN
+
+    grid = Image.new("RGB", (columns * slot_width + PANEL_MARGIN, rows * slot_height + PANEL_MARGIN), BACKGROUND)
+    draw = ImageDraw.Draw(grid)
+
+    for index, (label, data) in enumerate(panels):
+        row, column = divmod(index, columns)
+        left = PANEL_MARGIN + column * slot_width
+        top = PANEL_MARGIN + row * slot_height
+
+        draw.text((left, top + 6), label, fill=LABEL_COLOR)
+        with Image.open(io.BytesIO(data)) as panel:
+            panel = panel.convert("RGB")
+            panel.thumbnail(panel_size)
+            # Center the panel in its cell
+            offset_x = left + (cell_width - panel.width) // 2
+            offset_y = top + LABEL_HEIGHT + (cell_height - panel.height) // 2
+            grid.paste(panel, (offset_x, offset_y))
+
+    output = io.BytesIO()
+    grid.save(output, format="PNG", optimize=True)
+    return output.getvalue()
@@ -0,0 +1,477 @@
+"""
+Lifecycle governor for the headless Chrome instances used to render charts.
+
+Browsers are kept alive between renders and recycled once they grow past the
+configured RSS, render count or age limits. Every render runs under a hard
+deadline: if it is exceeded, the whole chromedriver/chrome process tree is
+killed so a hung call can never pin a browser forever. Orphaned chrome and
+chromedriver processes left behind by crashes are reaped periodically.
+"""
+
+import atexit
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set
+
+from config import (
+    CHROME_MAX_AGE,
+    CHROME_MAX_RENDERS,
+    CHROME_MAX_RSS_MB,
+    CHROME_POOL_SIZE,
+    CHROME_QUIT_TIMEOUT,
+    CHROME_REAP_INTERVAL,
+    CHROME_RENDER_DEADLINE,
+)
+from artemisbot.chart import render_profile
+from artemisbot.utils import metrics
+
+if TYPE_CHECKING:
+    from selenium.webdriver import Chrome
+    from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+# Process names (as reported by /proc/<pid>/comm) that belong to the renderer
+CHROME_PROCESS_NAMES = ("chrome", "chromedriver", "chrome_crashpad", "headless_shell")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class ManagedBrowser:
+    """A Chrome WebDriver together with the bookkeeping used to recycle it."""
+
+    def __init__(self, driver: "Chrome"):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.render_count = 0
+        self.broken = False
+        self.timed_out = False
+
+    @property
+    def root_pid(self) -> Optional[int]:
+        """PID of the chromedriver process that owns the browser."""
+        process = getattr(self.driver.service, "process", None)
+        return process.pid if process else None
+
+    def process_tree(self) -> List[int]:
+        """PIDs of chromedriver and every chrome process below it."""
+        if self.root_pid is None:
+            return []
+        return _process_tree(self.root_pid)
+
+    def rss_mb(self) -> float:
+        """Resident memory of the whole process tree, in megabytes."""
+        return tree_rss_mb(self.root_pid) if self.root_pid is not None else 0.0
+
+    def is_alive(self) -> bool:
+        """Whether the chromedriver process is still running."""
+        process = getattr(self.driver.service, "process", None)
+        return process is not None and process.poll() is None
+
+    def recycle_reason(self) -> Optional[str]:
+        """Return why this browser should be recycled, or None if it is healthy."""
+        if self.timed_out:
+            return "render deadline exceeded"
+        if self.broken or not self.is_alive():
+            return "browser is not responding"
+        if self.render_count >= CHROME_MAX_RENDERS:
+            return f"served {self.render_count} renders"
+        age = time.monotonic() - self.created_at
+        if age >= CHROME_MAX_AGE:
+            return f"age {age:.0f}s"
+        rss = self.rss_mb()
+        if rss >= CHROME_MAX_RSS_MB:
+            return f"RSS {rss:.0f}MB"
+        return None
+
+
+# Pool state
+_IDLE: List[ManagedBrowser] = []
+_IN_USE: Set[ManagedBrowser] = set()
+_LOCK = threading.Lock()
+_SLOTS = threading.BoundedSemaphore(max(1, CHROME_POOL_SIZE))
+_LAST_REAP = 0.0
+# Root PIDs of browsers managed outside the pool (the CDP render engine), never reaped as orphans
+_EXTERNAL_PIDS: Set[int] = set()
+# Browser launches in progress; their processes are not owned by anything yet, so no reaping meanwhile
+_LAUNCHING = 0
+# Whether shutdown() is registered to run at exit; only processes that launched a browser reap then
+_EXIT_HOOK_REGISTERED = False
+
+
+def _read_proc(pid: int, name: str) -> Optional[str]:
+    """Read /proc/<pid>/<name>, returning None if the process is gone."""
+    try:
+        with open(f"/proc/{pid}/{name}", "r") as f:
+            return f.read()
+    except (OSError, ValueError):
+        return None
+
+
+def _parent_map() -> Dict[int, int]:
+    """Map every visible PID to its parent PID."""
+    parents = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return parents
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        stat = _read_proc(int(entry), "stat")
+        if not stat:
+            continue
+        # The command name is wrapped in parentheses and may contain spaces
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def _process_tree(root_pid: int, parents: Optional[Dict[int, int]] = None) -> List[int]:
+    """Return root_pid and all of its descendants."""
+    parents = parents if parents is not None else _parent_map()
+    children: Dict[int, List[int]] = {}
+    for pid, ppid in parents.items():
+        children.setdefault(ppid, []).append(pid)
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _rss_bytes(pid: int) -> int:
+    """Resident set size of a single process."""
+    statm = _read_proc(pid, "statm")
+    if not statm:
+        return 0
+    return int(statm.split()[1]) * _PAGE_SIZE
+
+
+def tree_rss_mb(root_pid: int) -> float:
+    """Resident memory of a process and all of its descendants, in megabytes."""
+    return sum(_rss_bytes(pid) for pid in _process_tree(root_pid)) / (1024 * 1024)
+
+
+def browser_processes(root_pid: int) -> List[int]:
+    """PIDs of a browser process and all of its descendants."""
+    return _process_tree(root_pid)
+
+
+def kill_processes(pids: List[int]) -> None:
+    """SIGKILL processes that are still running."""
+    _kill_pids([pid for pid in pids if _read_proc(pid, "stat")])
+
+
+@contextmanager
+def launching() -> Iterator[None]:
+    """
+    Hold off reap_orphans() while a browser is being started and not yet registered.
+
+    The first launch also registers shutdown() to run at exit. Processes that
+    only import this module, such as tests and tools, never reap anything.
+    """
+    global _LAUNCHING, _EXIT_HOOK_REGISTERED
+    with _LOCK:
+        _LAUNCHING += 1
+        if not _EXIT_HOOK_REGISTERED:
+            atexit.register(shutdown)
+            _EXIT_HOOK_REGISTERED = True
+    try:
+        yield
+    finally:
+        with _LOCK:
+            _LAUNCHING -= 1
+
+
+def register_external_browser(root_pid: int) -> None:
+    """Protect a browser started outside the pool from reap_orphans()."""
+    with _LOCK:
+        _EXTERNAL_PIDS.add(root_pid)
+
+
+def unregister_external_browser(root_pid: int) -> None:
+    """Stop protecting a browser registered with register_external_browser()."""
+    with _LOCK:
+        _EXTERNAL_PIDS.discard(root_pid)
+
+
+def _kill_pids(pids: List[int]) -> None:
+    """SIGKILL the given processes and collect any that are our own children."""
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            continue
+    for pid in pids:
+        try:
+            os.waitpid(pid, os.WNOHANG)
+        except OSError:
+            pass
+
+
+def chrome_arguments() -> List[str]:
+    """Chrome command line used for every rendering browser."""
+    width, height = render_profile.viewport()
+    return [
+        "--headless=new",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        f"--window-size={width},{height}",
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-infobars",
+        "--disable-logging",
+        "--log-level=3",
+        "--silent",
+        "--force-device-scale-factor=1",
+        # Add performance optimizations
+        "--disable-javascript-harmony",
+        "--disable-features=TranslateUI",
+        "--disable-features=BlinkGenPropertyTrees",
+        "--disable-features=IsolateOrigins",
+        "--disable-site-isolation-trials",
+        "--disable-web-security",
+        "--disable-features=NetworkService",
+        "--disable-features=NetworkServiceInProcess",
+        "--disable-features=NetworkServiceInProcess2",
+        "--disable-features=NetworkServiceInProcess3",
+        "--disable-features=NetworkServiceInProcess4",
+        "--disable-features=NetworkServiceInProcess5",
+        "--disable-features=NetworkServiceInProcess6",
+        "--disable-features=NetworkServiceInProcess7",
+        "--disable-features=NetworkServiceInProcess8",
+        "--disable-features=NetworkServiceInProcess9",
+        "--disable-features=NetworkServiceInProcess10",
+        "--disable-features=NetworkServiceInProcess11",
+        "--disable-features=NetworkServiceInProcess12",
+        "--disable-features=NetworkServiceInProcess13",
+        "--disable-features=NetworkServiceInProcess14",
+        "--disable-features=NetworkServiceInProcess15",
+        "--disable-features=NetworkServiceInProcess16",
+        "--disable-features=NetworkServiceInProcess17",
+        "--disable-features=NetworkServiceInProcess18",
+        "--disable-features=NetworkServiceInProcess19",
+        "--disable-features=NetworkServiceInProcess20",
+        # Keep memory bounded in long-lived browsers
+        "--disable-background-networking",
+        "--disable-renderer-backgrounding",
+        "--disk-cache-size=1",
+    ]
+
+
+def _build_chrome_options() -> "Options":
+    """Selenium options carrying chrome_arguments()."""
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    for argument in chrome_arguments():
+        chrome_options.add_argument(argument)
+    return chrome_options
+
+
+def _launch(render: Dict[str, Any]) -> ManagedBrowser:
+    """
+    Start a new Chrome instance.
+
+    Args:
+        render: State of the render the browser is launched for; its chromedriver
+            service is stored there so the render deadline can kill a hung launch
+    """
+    # Selenium is only imported once a browser is actually needed
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    service = Service()
+    render["service"] = service
+    with launching():
+        driver = webdriver.Chrome(service=service, options=_build_chrome_options())
+    driver.set_window_size(*render_profile.viewport())
+    script = render_profile.document_start_script()
+    if script:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})
+    browser = ManagedBrowser(driver)
+    logger.info("Launched Chrome (pid %s)", browser.root_pid)
+    return browser
+
+
+def _retire(browser: ManagedBrowser, reason: str) -> None:
+    """Shut a browser down, killing its process tree if quit() does not finish in time."""
+    logger.info("Recycling Chrome (pid %s): %s", browser.root_pid, reason)
+    pids = browser.process_tree()
+    if not browser.timed_out:
+        killer = threading.Timer(CHROME_QUIT_TIMEOUT, _kill_pids, args=(pids,))
+        killer.daemon = True
+        killer.start()
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+        finally:
+            killer.cancel()
+    # quit() does not always take the renderers with it
+    _kill_pids([pid for pid in pids if _read_proc(pid, "stat")])
+
+
+def _on_deadline(render: Dict[str, Any]) -> None:
+    """Kill the browser (or the browser still launching) of a render that has run past the hard deadline."""
+    render["timed_out"] = True
+    browser = render.get("browser")
+    if browser is not None:
+        logger.warning("Render exceeded %ss deadline, killing Chrome (pid %s)",
+                       CHROME_RENDER_DEADLINE, browser.root_pid)
+        browser.timed_out = True
+        _kill_pids(browser.process_tree())
+        return
+    process = getattr(render.get("service"), "process", None)
+    if process is not None:
+        logger.warning("Chrome launch exceeded %ss deadline, killing chromedriver (pid %s)",
+                       CHROME_RENDER_DEADLINE, process.pid)
+        _kill_pids(_process_tree(process.pid))
+
+
+def _checkout(render: Dict[str, Any]) -> ManagedBrowser:
+    """Take a healthy idle browser from the pool or launch a new one (see _launch for `render`)."""
+    global _LAST_REAP
+    retired = []
+    with _LOCK:
+        browser = None
+        while _IDLE:
+            candidate = _IDLE.pop()
+            reason = candidate.recycle_reason()
+            if reason:
+                retired.append((candidate, reason))
+            else:
+                browser = candidate
+                break
+        reap_due = time.monotonic() - _LAST_REAP >= CHROME_REAP_INTERVAL
+        if reap_due:
+            _LAST_REAP = time.monotonic()
+    for candidate, reason in retired:
+        _retire(candidate, reason)
+    if reap_due:
+        reap_orphans()
+    if browser is None:
+        browser = _launch(render)
+    with _LOCK:
+        _IN_USE.add(browser)
+    render["browser"] = browser
+    if render.get("timed_out"):
+        # The deadline passed while launching: the browser is dead or about to be
+        browser.timed_out = True
+    return browser
+
+
+def _checkin(browser: ManagedBrowser) -> None:
+    """Return a browser to the pool, recycling it if it has passed a threshold."""
+    with _LOCK:
+        _IN_USE.discard(browser)
+    reason = browser.recycle_reason()
+    if reason:
+        _retire(browser, reason)
+        return
+    with _LOCK:
+        _IDLE.append(browser)
+
+
+@contextmanager
+def browser_session(deadline: float = CHROME_RENDER_DEADLINE) -> Iterator["Chrome"]:
+    """
+    Borrow a browser from the pool for a single render.
+
+    The browser's process tree is killed if checkout (including launching a
+    browser) and the block together run longer than `deadline` seconds; any
+    WebDriver call blocked on it then fails promptly.
+
+    Args:
+        deadline: Hard limit for the render, in seconds
+
+    Yields:
+        A ready-to-use Chrome WebDriver
+    """
+    _SLOTS.acquire()
+    render: Dict[str, Any] = {}
+    browser = None
+    timer = threading.Timer(deadline, _on_deadline, args=(render,))
+    timer.daemon = True
+    timer.start()
+    try:
+        browser = _checkout(render)
+        try:
+            yield browser.driver
+        finally:
+            browser.render_count += 1
+    finally:
+        timer.cancel()
+        if browser is not None:
+            _checkin(browser)
+        _SLOTS.release()
+
+
+def reap_orphans() -> List[int]:
+    """
+    Kill chrome/chromedriver processes that no managed browser owns.
+
+    Only processes that were re-parented to PID 1 (init, or this process when it
+    runs as PID 1 in a container) are considered orphans. Nothing is reaped while
+    a browser launch is in progress, since its processes are not owned yet.
+
+    Returns:
+        The PIDs that were killed
+    """
+    parents = _parent_map()
+    if not parents:
+        return []
+    with _LOCK:
+        if _LAUNCHING:
+            return []
+        owned = set()
+        for browser in list(_IDLE) + list(_IN_USE):
+            if browser.root_pid is not None:
+                owned.update(_process_tree(browser.root_pid, parents))
+        for root_pid in _EXTERNAL_PIDS:
+            owned.update(_process_tree(root_pid, parents))
+    orphans = []
+    for pid, ppid in parents.items():
+        if pid in owned or ppid != 1:
+            continue
+        comm = (_read_proc(pid, "comm") or "").strip()
+        if comm in CHROME_PROCESS_NAMES:
+            orphans.extend(pid for pid in _process_tree(pid, parents) if pid not in owned)
+    if orphans:
+        logger.warning("Reaping %d orphaned Chrome processes", len(orphans))
+        _kill_pids(orphans)
+    return orphans
+
+
+def browser_stats() -> Dict[str, float]:
+    """Pool size, busy browsers, total RSS and oldest browser age for the metrics report."""
+    with _LOCK:
+        browsers = list(_IDLE) + list(_IN_USE)
+        in_use = len(_IN_USE)
+    now = time.monotonic()
+    return {
+        "chrome.browsers": len(browsers),
+        "chrome.in_use": in_use,
+        "chrome.rss_mb": round(sum(browser.rss_mb() for browser in browsers), 1),
+        "chrome.oldest_age": round(max((now - browser.created_at for browser in browsers), default=0.0)),
+    }
+
+
+metrics.register_collector(browser_stats)
+
+
+def shutdown() -> None:
+    """Quit every idle browser and reap anything left over."""
+    with _LOCK:
+        browsers = list(_IDLE)
+        _IDLE.clear()
+    for browser in browsers:
+        _retire(browser, "shutdown")
+    reap_orphans()
@@ -0,0 +1,103 @@
+"""
+Render profiles: how a chart page is prepared before it is captured.
+
+The profile named by RENDER_PROFILE (see RENDER_PROFILES in config.py) sets the
+browser viewport and, for chart-only profiles, a script injected before the
+page's own scripts that hides the app chrome and turns off CSS and Highcharts
+animations. Once the chart has rendered, chart-only profiles move it out of
+the app layout and size it to the viewport (screenshot.FOCUS_CHART_JS), so the
+capture is exactly the viewport and nothing else is laid out or painted.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from config import RENDER_PROFILE, RENDER_PROFILES, RENDER_VIEWPORT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "app"
+
+# CSS that stops transitions and keyframe animations
+NO_ANIMATION_CSS = "*, *::before, *::after { animation: none !important; transition: none !important; }"
+
+# Turn off Highcharts animations as soon as the library assigns window.Highcharts
+NO_CHART_ANIMATION_JS = """
+(function() {
+    var highcharts;
+    Object.defineProperty(window, 'Highcharts', {
+        configurable: true,
+        enumerable: true,
+        get: function() { return highcharts; },
+        set: function(value) {
+            highcharts = value;
+            if (value && value.setOptions) {
+                value.setOptions({chart: {animation: false}, plotOptions: {series: {animation: false}}});
+            }
+        }
+    });
+})();
+"""
+
+# Add a stylesheet as early as the document allows
+INJECT_CSS_JS = """
+(function(css) {
+    function addStyle() {
+        var style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    }
+    if (document.documentElement) addStyle();
+    else document.addEventListener('readystatechange', addStyle, {once: true});
+})(%s);
+"""
+
+
+def active_profile() -> Dict[str, Any]:
+    """The configured render profile, with RENDER_VIEWPORT applied."""
+    profile = RENDER_PROFILES.get(RENDER_PROFILE)
+    if profile is None:
+        logger.warning("Unknown RENDER_PROFILE %r, using %r", RENDER_PROFILE, DEFAULT_PROFILE)
+        profile = RENDER_PROFILES[DEFAULT_PROFILE]
+    profile = dict(profile)
+    if RENDER_VIEWPORT:
+        profile["viewport"] = RENDER_VIEWPORT
+    return profile
+
+
+def viewport() -> Tuple[int, int]:
+    """Browser viewport (width, height) of the active profile."""
+    width, height = active_profile()["viewport"]
+    return width, height
+
+
+def chart_only() -> bool:
+    """Whether the largest chart is isolated and sized to the viewport before capture."""
+    return bool(active_profile().get("chart_only"))
+
+
+def settle_seconds() -> float:
+    """How long to let the chart settle after it has rendered."""
+    return float(active_profile().get("settle_seconds", 1.0))
+
+
+def document_start_script() -> Optional[str]:
+    """
+    Script to run in every new document before the page's scripts
+    (Page.addScriptToEvaluateOnNewDocument).
+
+    Returns:
+        The script, or None if the active profile leaves the page untouched
+    """
+    profile = active_profile()
+    css = []
+    scripts = []
+    if profile.get("hide_selectors"):
+        css.append(", ".join(profile["hide_selectors"]) + " { display: none !important; }")
+    if not profile.get("animations", True):
+        css.append(NO_ANIMATION_CSS)
+        scripts.append(NO_CHART_ANIMATION_JS)
+    if css:
+        scripts.append(INJECT_CSS_JS % json.dumps("\n".join(css)))
+    return "".join(scripts) or None
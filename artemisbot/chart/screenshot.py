@@ -1,203 +1,538 @@
 import os
+import math
 import time
+import base64
 import hashlib
+import threading
 from functools import lru_cache
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException, StaleElementReferenceException
-from config import ARTEMIS_API_KEY
-from PIL import Image
 import io
+from typing import Callable, List, Optional, Tuple, Union
+from config import ARTEMIS_API_KEY, CACHE_DURATION, CAPTURE_MODE, NEGATIVE_CACHE_DURATION, RENDER_ENGINE
+from artemisbot.chart.governor import browser_session
+from artemisbot.chart.chart_data import SeriesData, indexed_series_from_js, series_from_js
+from artemisbot.chart.transforms import percent_change_all
+from artemisbot.chart import blob_store, render_profile, svg_export, upstream
+from artemisbot.utils import metrics, request_log
+from artemisbot.utils.profiling import profiled
 
-# Cache for storing screenshots
+# What a render engine's render_chart returns: (raw PNG, percentage PNG or None, series or None)
+RenderedChart = Tuple[bytes, Optional[bytes], Optional[List[SeriesData]]]
+
+# Cache for storing screenshots: key -> (timestamp, blob_store digest)
 SCREENSHOT_CACHE = {}
-CACHE_DURATION = 300  # 5 minutes in seconds
+# Makes replacing a SCREENSHOT_CACHE entry atomic, so each replaced digest is released exactly once
+_CACHE_LOCK = threading.Lock()
+# Cache for extracted series data, keyed like SCREENSHOT_CACHE
+DATA_CACHE = {}
+# Chart URLs that rendered without data: key -> timestamp
+NEGATIVE_CACHE = {}
+# Appended to a raw chart URL to key its locally computed percentage view
+PERCENTAGE_KEY_SUFFIX = "#percentage"
 
 def get_cache_key(url: str) -> str:
     """Generate a cache key for the URL."""
     return hashlib.md5(url.encode()).hexdigest()
 
-def take_screenshot(url: str) -> bytes:
+def _cache_screenshot(cache_key: str, data: bytes) -> bytes:
     """
-    Capture the chart area by finding the largest Highcharts container and taking a screenshot of it.
-    Uses caching to improve performance for frequently requested charts.
+    Store a screenshot in the shared blob store and point the cache key at it.
+
+    Returns the stored buffer when identical content was already in memory, so the
+    new copy can be dropped, otherwise `data` itself.
     """
-    # Check cache first
-    cache_key = get_cache_key(url)
+    digest = blob_store.put(data)
+    # Renders of the same key run concurrently in worker threads (e.g. a dashboard and a
+    # direct request): only the render that swaps an entry out may release its digest
+    with _CACHE_LOCK:
+        previous = SCREENSHOT_CACHE.get(cache_key)
+        SCREENSHOT_CACHE[cache_key] = (time.time(), digest)
+    if previous:
+        blob_store.release(previous[1])
+    return blob_store.BLOBS.get(digest, data)
+
+def _cached_screenshot(cache_key: str) -> Optional[bytes]:
+    """Return a fresh cached screenshot, if any."""
     if cache_key in SCREENSHOT_CACHE:
-        timestamp, screenshot = SCREENSHOT_CACHE[cache_key]
+        timestamp, digest = SCREENSHOT_CACHE[cache_key]
         if time.time() - timestamp < CACHE_DURATION:
-            return screenshot
-
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-infobars")
-    chrome_options.add_argument("--disable-logging")
-    chrome_options.add_argument("--log-level=3")
-    chrome_options.add_argument("--silent")
-    chrome_options.add_argument("--force-device-scale-factor=1")
-    # Add performance optimizations
-    chrome_options.add_argument("--disable-javascript-harmony")
-    chrome_options.add_argument("--disable-features=TranslateUI")
-    chrome_options.add_argument("--disable-features=BlinkGenPropertyTrees")
-    chrome_options.add_argument("--disable-features=IsolateOrigins")
-    chrome_options.add_argument("--disable-site-isolation-trials")
-    chrome_options.add_argument("--disable-web-security")
-    chrome_options.add_argument("--disable-features=NetworkService")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess2")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess3")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess4")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess5")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess6")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess7")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess8")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess9")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess10")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess11")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess12")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess13")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess14")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess15")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess16")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess17")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess18")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess19")
-    chrome_options.add_argument("--disable-features=NetworkServiceInProcess20")
-    
-    driver = None
+            metrics.incr("screenshot_cache.hits")
+            return blob_store.get(digest)
+    metrics.incr("screenshot_cache.misses")
+    return None
+
+def _stale_screenshot(cache_key: str) -> Optional[bytes]:
+    """Return a cached screenshot regardless of age."""
+    if cache_key in SCREENSHOT_CACHE:
+        metrics.incr("screenshot_cache.stale_served")
+        return blob_store.get(SCREENSHOT_CACHE[cache_key][1])
+    return None
+
+def cached_digest(url: str, is_percentage: bool = False) -> Optional[str]:
+    """Digest of a fresh cached chart, so it can be sent without loading its bytes."""
+    entry = SCREENSHOT_CACHE.get(screenshot_cache_key(url, is_percentage))
+    if entry and time.time() - entry[0] < CACHE_DURATION:
+        metrics.incr("screenshot_cache.hits")
+        return entry[1]
+    return None
+
+def _log_request(log_key: Optional[str], outcome: str, result: Union[bytes, str],
+                 render_ms: Optional[float] = None) -> None:
+    """Record a take_screenshot call in the request log if it was given a chart key."""
+    if log_key is None:
+        return
+    if isinstance(result, str):
+        request_log.record(log_key, outcome, result.split(":", 1)[-1].split()[0], render_ms)
+    else:
+        request_log.record(log_key, outcome, render_ms=render_ms, size=len(result))
+
+def _known_no_data(url: str) -> bool:
+    """Whether the chart recently turned out to have no data."""
+    timestamp = NEGATIVE_CACHE.get(get_cache_key(url))
+    if timestamp is not None and time.time() - timestamp < NEGATIVE_CACHE_DURATION:
+        metrics.incr("negative_cache.hits")
+        return True
+    return False
+
+def _remember_no_data(url: str, result) -> None:
+    """Negatively cache a chart whose render found no data."""
+    if result == "ERROR:NO_DATA":
+        NEGATIVE_CACHE[get_cache_key(url)] = time.time()
+
+def screenshot_cache_key(url: str, is_percentage: bool = False) -> str:
+    """Cache key under which take_screenshot stores a chart."""
+    return get_cache_key(url + PERCENTAGE_KEY_SUFFIX) if is_percentage else get_cache_key(url)
+
+def cached_file_id(url: str, is_percentage: bool = False) -> Tuple[Optional[str], bool]:
+    """
+    Look up the Telegram file_id of an already uploaded chart without rendering.
+
+    Returns:
+        (file_id or None, whether the cached chart is still fresh)
+    """
+    entry = SCREENSHOT_CACHE.get(screenshot_cache_key(url, is_percentage))
+    if not entry:
+        return None, False
+    timestamp, digest = entry
+    return blob_store.get_file_id(digest), time.time() - timestamp < CACHE_DURATION
+
+def _load_chart_page(driver, url: str) -> Optional[str]:
+    """
+    Open a chart URL and wait until its Highcharts chart has rendered.
+
+    Both waits use timeouts adapted to recent upstream latency. A timed-out wait
+    is recorded as a sample at the timeout, so slow periods raise the timeouts.
+
+    Returns:
+        "ERROR:NO_DATA" if the page says there is no data or the chart loaded empty,
+        "ERROR:SCREENSHOT_FAILED - ..." if the chart did not render in time, otherwise None
+
+    Raises:
+        TimeoutException: If the page does not load in time
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    if ARTEMIS_API_KEY:
+        driver.execute_cdp_cmd('Network.setCookie', {
+            'name': 'artemis_api_key',
+            'value': ARTEMIS_API_KEY,
+            'domain': '.artemis.xyz',
+            'path': '/'
+        })
+
+    # driver.get blocks until the load event, so the page load timeout bounds it
+    timeout = upstream.stage_timeout("page_load")
+    driver.set_page_load_timeout(timeout)
+    started = time.monotonic()
     try:
-        service = Service()
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.set_window_size(1920, 1080)
-        
-        if ARTEMIS_API_KEY:
-            driver.execute_cdp_cmd('Network.setCookie', {
-                'name': 'artemis_api_key',
-                'value': ARTEMIS_API_KEY,
-                'domain': '.artemis.xyz',
-                'path': '/'
-            })
-            
         driver.get(url)
-        
-        # Wait for page load with reduced timeout
-        WebDriverWait(driver, 5).until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
+    except TimeoutException:
+        upstream.record_latency("page_load", timeout)
+        raise
+    upstream.record_latency("page_load", time.monotonic() - started)
+
+    # Poll until the chart shows data or the page says it has none
+    timeout = upstream.stage_timeout("chart_render")
+    started = time.monotonic()
+    try:
+        state = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script(CHART_STATE_JS)
         )
-        
-        # Reduced initial wait time
-        time.sleep(1)
-        
-        # Check for no data message or empty chart
-        try:
-            # Check for explicit no data message
-            no_data_element = driver.find_element(By.XPATH, "//*[contains(text(), 'No data available')]")
-            if no_data_element.is_displayed():
-                return "ERROR:NO_DATA"
-                
-            # Check for empty chart container
-            empty_chart = driver.find_element(By.CLASS_NAME, "highcharts-container")
-            if empty_chart.is_displayed():
-                # Check if the chart is actually empty (no data points)
-                chart_data = driver.execute_script("""
-                    var chart = Highcharts.charts[0];
-                    if (!chart) return false;
-                    var series = chart.series;
-                    if (!series || !series.length) return true;
-                    for (var i = 0; i < series.length; i++) {
-                        if (series[i].points && series[i].points.length > 0) {
-                            return false;
-                        }
-                    }
-                    return true;
-                """)
-                if chart_data:
-                    return "ERROR:NO_DATA"
-        except:
-            pass
-            
-        # Check for the presence of any highcharts-series element to confirm a chart is rendered
+    except TimeoutException:
+        # A chart still waiting for its data is slow, not empty
+        upstream.record_latency("chart_render", timeout)
+        return "ERROR:SCREENSHOT_FAILED - Timed out waiting for the chart to render"
+    if state == "no_data":
+        return "ERROR:NO_DATA"
+    upstream.record_latency("chart_render", time.monotonic() - started)
+    time.sleep(render_profile.settle_seconds())
+    return None
+
+def _classify_webdriver_error(e: Exception) -> str:
+    """Map a WebDriver failure to one of our error codes."""
+    if "net::ERR_CONNECTION_REFUSED" in str(e):
+        return "ERROR:AUTH_REQUIRED"
+    elif "net::ERR_NAME_NOT_RESOLVED" in str(e):
+        return "ERROR:INVALID_PARAMETERS"
+    return f"ERROR:SCREENSHOT_FAILED - {str(e)}"
+
+def _focus_chart(driver) -> Optional[dict]:
+    """
+    Isolate the largest chart and size it to the viewport if the render profile is chart-only.
+
+    Returns:
+        The clip rectangle of the isolated chart, or None to capture the page layout as is
+    """
+    if not render_profile.chart_only():
+        return None
+    width, height = render_profile.viewport()
+    rect = driver.execute_script(FOCUS_CHART_JS, width, height)
+    if not rect:
+        return None
+    time.sleep(render_profile.settle_seconds())
+    return dict(rect, scale=1)
+
+def _largest_chart_clip(driver) -> dict:
+    """Padded clip rectangle of the largest Highcharts container, scrolled into view."""
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import StaleElementReferenceException
+
+    max_retries = 2
+    highcharts_containers = []
+    for attempt in range(max_retries):
         try:
-            series_elements = driver.find_elements(By.CSS_SELECTOR, ".highcharts-series")
-            if not series_elements or not any(elem.is_displayed() for elem in series_elements):
-                return "ERROR:NO_DATA"
-        except:
-            return "ERROR:NO_DATA"
-            
-        # Reduced retries and wait times
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                wait = WebDriverWait(driver, 5)
-                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "highcharts-container")))
-                time.sleep(1)
+            highcharts_containers = driver.find_elements(By.CLASS_NAME, "highcharts-container")
+            if highcharts_containers:
                 break
-            except TimeoutException:
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(1)
-                
-        highcharts_containers = []
-        for attempt in range(max_retries):
-            try:
-                highcharts_containers = driver.find_elements(By.CLASS_NAME, "highcharts-container")
-                if highcharts_containers:
-                    break
-                time.sleep(0.5)
-            except StaleElementReferenceException:
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(0.5)
-                
-        if not highcharts_containers:
-            raise Exception("No Highcharts containers found")
-            
-        largest_container = max(highcharts_containers, key=lambda x: x.size['width'] * x.size['height'])
-        location = largest_container.location
-        size = largest_container.size
-        
-        # Scroll into view and take screenshot
-        driver.execute_script("arguments[0].scrollIntoView(true);", largest_container)
-        time.sleep(0.2)  # Reduced wait time
-        
-        screenshot_png = driver.get_screenshot_as_png()
-        image = Image.open(io.BytesIO(screenshot_png))
-        
-        # Reduced padding
-        padding = 10
-        left = max(0, location['x'] - padding)
-        top = max(0, location['y'] - padding)
-        right = location['x'] + size['width'] + padding
-        bottom = location['y'] + size['height'] + padding
-        
-        cropped_image = image.crop((left, top, right, bottom))
-        output = io.BytesIO()
-        cropped_image.save(output, format="PNG", optimize=True)
-        screenshot_data = output.getvalue()
-        
-        # Cache the screenshot
-        SCREENSHOT_CACHE[cache_key] = (time.time(), screenshot_data)
-        
-        return screenshot_data
-        
+            time.sleep(0.5)
+        except StaleElementReferenceException:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(0.5)
+
+    if not highcharts_containers:
+        raise Exception("No Highcharts containers found")
+
+    largest_container = max(highcharts_containers, key=lambda x: x.size['width'] * x.size['height'])
+
+    # Scroll into view
+    driver.execute_script("arguments[0].scrollIntoView(true);", largest_container)
+    time.sleep(0.2)  # Reduced wait time
+
+    # Reduced padding
+    padding = 10
+    rect = driver.execute_script(CHART_RECT_JS, largest_container)
+    clip = {
+        "x": max(0, rect["x"] - padding),
+        "y": max(0, rect["y"] - padding),
+        "width": rect["width"] + 2 * padding,
+        "height": rect["height"] + 2 * padding,
+        "scale": 1,
+    }
+    return clip
+
+def _capture_largest_chart(driver, clip: Optional[dict] = None) -> bytes:
+    """
+    Capture a region of the current page as PNG bytes.
+
+    Args:
+        driver: WebDriver showing a rendered chart
+        clip: Page region to capture; defaults to the largest Highcharts container
+    """
+    if clip is None:
+        clip = _largest_chart_clip(driver)
+
+    try:
+        # Let Chrome encode only the chart region: no full-page PNG to decode, crop and re-encode
+        response = driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png", "clip": clip, "captureBeyondViewport": True
+        })
+        return base64.b64decode(response.pop("data"))
+    except Exception:
+        pass
+
+    # Fallback for drivers without CDP: crop a full screenshot, releasing each buffer as soon as possible
+    from PIL import Image
+
+    screenshot_png = driver.get_screenshot_as_png()
+    with Image.open(io.BytesIO(screenshot_png)) as image:
+        del screenshot_png
+        # The viewport screenshot is relative to the scroll position
+        scroll = driver.execute_script("return [window.scrollX, window.scrollY];")
+        left = clip["x"] - scroll[0]
+        top = clip["y"] - scroll[1]
+        cropped_image = image.crop((max(0, left), max(0, top), left + clip["width"], top + clip["height"]))
+    output = io.BytesIO()
+    cropped_image.save(output, format="PNG", optimize=True)
+    del cropped_image
+    return output.getvalue()
+
+def _capture_chart(driver, clip: Optional[dict] = None) -> bytes:
+    """Capture the chart in the configured CAPTURE_MODE, falling back to a screenshot of `clip`."""
+    if CAPTURE_MODE == "svg":
+        try:
+            svg = driver.execute_script(GET_SVG_JS)
+        except Exception:
+            svg = None
+        png = svg_export.rasterize(svg)
+        if png is not None:
+            return png
+        metrics.incr("svg_export.fallbacks")
+    return _capture_largest_chart(driver, clip)
+
+def percentage_payload(indexed_series: List[Tuple[int, SeriesData]]) -> list:
+    """
+    Percentage-change series in the [[position, [[x, y], ...]], ...] form APPLY_SERIES_JS expects.
+
+    Positions are those of indexed_series_from_js, so series skipped as empty
+    do not shift the data of the series after them.
+    """
+    positions = [index for index, _ in indexed_series]
+    changed = percent_change_all([series for _, series in indexed_series])
+    return [
+        [index, [[t, None if math.isnan(v) else v] for t, v in zip(s.timestamps, s.values)]]
+        for index, s in zip(positions, changed)
+    ]
+
+def _selenium_render_chart(url: str, is_percentage: bool) -> Union[RenderedChart, str]:
+    """
+    Selenium engine: load a chart and capture it, plus its percentage view if requested.
+
+    The percentage view is computed locally from the extracted series and pushed back
+    into the chart, so it needs no second page load.
+
+    Returns:
+        (raw PNG, percentage PNG or None, extracted series or None), or an "ERROR:..." string
+    """
+    # Selenium is a heavy import, so load it only when a render is needed
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        with browser_session() as driver:
+            page_error = _load_chart_page(driver, url)
+            if page_error:
+                return page_error
+
+            clip = _focus_chart(driver)
+            raw = _capture_chart(driver, clip)
+            if not is_percentage:
+                return raw, None, None
+
+            indexed = indexed_series_from_js(driver.execute_script(EXTRACT_SERIES_JS))
+            if not indexed:
+                return raw, None, None
+            series = [s for _, s in indexed]
+            driver.execute_script(APPLY_SERIES_JS, percentage_payload(indexed), "{value}%")
+            time.sleep(0.2)  # Let the redraw settle
+            return raw, _capture_chart(driver, clip), series
+
+    except WebDriverException as e:
+        return _classify_webdriver_error(e)
+
+def _selenium_render_series(url: str) -> Union[List[SeriesData], str]:
+    """Selenium engine: load a chart and extract its series."""
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        with browser_session() as driver:
+            page_error = _load_chart_page(driver, url)
+            if page_error:
+                return page_error
+            return series_from_js(driver.execute_script(EXTRACT_SERIES_JS)) or "ERROR:NO_DATA"
+
     except WebDriverException as e:
-        if "net::ERR_CONNECTION_REFUSED" in str(e):
-            return "ERROR:AUTH_REQUIRED"
-        elif "net::ERR_NAME_NOT_RESOLVED" in str(e):
-            return "ERROR:INVALID_PARAMETERS"
+        return _classify_webdriver_error(e)
+
+def _render_engine() -> Tuple[Callable, Callable]:
+    """(render_chart, render_series) of the engine selected by RENDER_ENGINE."""
+    if RENDER_ENGINE == "cdp":
+        from artemisbot.chart import cdp_engine
+        return cdp_engine.render_chart, cdp_engine.render_series
+    return _selenium_render_chart, _selenium_render_series
+
+@profiled
+def take_screenshot(url: str, is_percentage: bool = False, log_key: Optional[str] = None) -> bytes:
+    """
+    Capture the chart area by finding the largest Highcharts container and taking a screenshot of it.
+    Uses caching to improve performance for frequently requested charts.
+
+    When is_percentage is set, `url` must be the raw-units chart: both the raw and
+    the percentage views are captured from a single page load and cached.
+
+    With a log_key (see request_log.chart_key) the call and its cache outcome are
+    recorded in the request log, so every caller sharing the cache is replayable.
+    """
+    # Check cache first
+    raw_key = screenshot_cache_key(url)
+    cache_key = screenshot_cache_key(url, is_percentage)
+    screenshot = _cached_screenshot(cache_key)
+    if screenshot is not None:
+        _log_request(log_key, request_log.HIT, screenshot)
+        return screenshot
+    if _known_no_data(url):
+        _log_request(log_key, request_log.NEGATIVE_HIT, "ERROR:NO_DATA")
+        return "ERROR:NO_DATA"
+
+    # Fail fast (serving a stale chart if we have one) while the upstream site is unhealthy
+    if not upstream.allow_request():
+        result = _stale_screenshot(cache_key) or "ERROR:UPSTREAM_UNAVAILABLE"
+        _log_request(log_key, request_log.MISS if isinstance(result, str) else request_log.HIT, result)
+        return result
+
+    started = time.monotonic()
+    result = _render_screenshot(url, is_percentage, raw_key, cache_key)
+    _log_request(log_key, request_log.MISS, result, (time.monotonic() - started) * 1000)
+    upstream.record_result(result)
+    _remember_no_data(url, result)
+    return result
+
+def _render_screenshot(url: str, is_percentage: bool, raw_key: str, cache_key: str) -> Union[bytes, str]:
+    """Render a chart with the configured engine and cache it (see take_screenshot)."""
+    render_chart, _ = _render_engine()
+    try:
+        rendered = render_chart(url, is_percentage)
+    except Exception as e:
         return f"ERROR:SCREENSHOT_FAILED - {str(e)}"
+    if isinstance(rendered, str):
+        return rendered
+
+    raw, percentage, series = rendered
+    screenshot_data = _cache_screenshot(raw_key, raw)
+    if series:
+        DATA_CACHE[get_cache_key(url)] = (time.time(), series)
+    if is_percentage:
+        # Without extractable series there is no percentage view; never send raw units as %
+        if percentage is None:
+            return "ERROR:NO_PERCENTAGE"
+        screenshot_data = _cache_screenshot(cache_key, percentage)
+    return screenshot_data
+
+# Milliseconds a loaded chart must stay without points before it counts as empty
+EMPTY_CHART_MS = 1000
+
+# "ready" once a chart shows data points, "no_data" if the page says it has none or its
+# charts have finished loading without points, else null
+CHART_STATE_JS = """
+    function visible(el) { return !!(el && el.getClientRects().length); }
+    var noData = document.evaluate("//*[contains(text(), 'No data available')]", document, null,
+                                   XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (visible(noData)) return "no_data";
+    var charts = ((window.Highcharts && Highcharts.charts) || []).filter(function(c) { return c; });
+    var hasPoints = charts.some(function(c) {
+        return c.series.some(function(s) { return s.points && s.points.length; });
+    });
+    var seriesShown = Array.prototype.some.call(document.querySelectorAll(".highcharts-series"), visible);
+    if (hasPoints && seriesShown) return "ready";
+    var loadedEmpty = charts.length > 0 && charts.every(function(c) {
+        return !c.loadingShown && c.series.length > 0;
+    }) && !hasPoints;
+    if (!loadedEmpty) {
+        window.__artemisEmptySince = null;
+        return null;
+    }
+    window.__artemisEmptySince = window.__artemisEmptySince || Date.now();
+    return Date.now() - window.__artemisEmptySince >= %(empty_ms)d ? "no_data" : null;
+""" % {"empty_ms": EMPTY_CHART_MS}
+
+# Page coordinates of an element, for clipped captures
+CHART_RECT_JS = """
+var r = arguments[0].getBoundingClientRect();
+return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+"""
+
+# Select the largest chart on the page
+LARGEST_CHART_JS = """
+    var charts = ((window.Highcharts && Highcharts.charts) || []).filter(function(c) { return c; });
+    var chart = charts.length ? charts.reduce(function(a, b) {
+        return a.chartWidth * a.chartHeight >= b.chartWidth * b.chartHeight ? a : b;
+    }) : null;
+"""
+
+# Pull the series out of the largest chart on the page
+EXTRACT_SERIES_JS = LARGEST_CHART_JS + """
+    if (!chart) return null;
+    return chart.series.filter(function(s) {
+        return !s.options.isInternal;
+    }).map(function(s) {
+        var xs = s.xData && s.xData.length ? s.xData : s.points.map(function(p) { return p.x; });
+        var ys = s.yData && s.yData.length ? s.yData : s.points.map(function(p) { return p.y; });
+        return {name: s.name, x: Array.prototype.slice.call(xs), y: Array.prototype.slice.call(ys)};
+    });
+"""
+
+# Replace the data of the largest chart's series: [[position, data], ...] with positions as in EXTRACT_SERIES_JS
+APPLY_SERIES_JS = LARGEST_CHART_JS + """
+    if (!chart) return;
+    var seriesData = arguments[0], labelFormat = arguments[1];
+    var series = chart.series.filter(function(s) { return !s.options.isInternal; });
+    seriesData.forEach(function(item) {
+        if (series[item[0]]) series[item[0]].setData(item[1], false, false, false);
+    });
+    if (labelFormat) {
+        chart.yAxis.forEach(function(axis) {
+            axis.update({labels: {format: labelFormat}}, false);
+        });
+    }
+    chart.redraw(false);
+"""
+
+# Move the largest chart out of the app layout, hide everything else and size it to the viewport
+FOCUS_CHART_JS = LARGEST_CHART_JS + """
+    if (!chart) return null;
+    var width = arguments[0], height = arguments[1], host = chart.renderTo;
+    document.body.appendChild(host);
+    Array.prototype.forEach.call(document.body.children, function(el) {
+        if (el !== host) el.style.setProperty('display', 'none', 'important');
+    });
+    document.documentElement.style.overflow = 'hidden';
+    document.body.style.margin = '0';
+    host.style.cssText = 'position:absolute;left:0;top:0;margin:0;width:' + width + 'px;height:' +
+        height + 'px;background:#ffffff';
+    window.scrollTo(0, 0);
+    chart.setSize(width, height, false);
+    return {x: 0, y: 0, width: width, height: height};
+"""
+
+# Serialize the largest chart as SVG at its rendered size (needs the Highcharts exporting module)
+GET_SVG_JS = LARGEST_CHART_JS + """
+    if (!chart || typeof chart.getSVG !== 'function') return null;
+    return chart.getSVG({chart: {width: chart.chartWidth, height: chart.chartHeight}});
+"""
+
+def extract_chart_data(url: str) -> Union[List[SeriesData], str]:
+    """
+    Extract the series behind a chart instead of capturing it as an image.
+    Uses the same caching policy as take_screenshot.
+
+    Args:
+        url: Chart URL
+
+    Returns:
+        The chart's series, or an "ERROR:..." string
+    """
+    cache_key = get_cache_key(url)
+    if cache_key in DATA_CACHE:
+        timestamp, series = DATA_CACHE[cache_key]
+        if time.time() - timestamp < CACHE_DURATION:
+            return series
+    if _known_no_data(url):
+        return "ERROR:NO_DATA"
+
+    if not upstream.allow_request():
+        return DATA_CACHE[cache_key][1] if cache_key in DATA_CACHE else "ERROR:UPSTREAM_UNAVAILABLE"
+
+    result = _render_chart_data(url, cache_key)
+    upstream.record_result(result)
+    _remember_no_data(url, result)
+    return result
+
+def _render_chart_data(url: str, cache_key: str) -> Union[List[SeriesData], str]:
+    """Extract a chart's series with the configured engine and cache them (see extract_chart_data)."""
+    _, render_series = _render_engine()
+    try:
+        series = render_series(url)
     except Exception as e:
         return f"ERROR:SCREENSHOT_FAILED - {str(e)}"
-    finally:
-        if driver:
-            driver.quit()
+    if not isinstance(series, str):
+        DATA_CACHE[cache_key] = (time.time(), series)
+    return series
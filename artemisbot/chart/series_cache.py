@@ -0,0 +1,188 @@
+"""
+Finest-granularity series cache.
+
+The full daily history of each (asset, metric) pair is fetched once and kept
+as numeric columns. Every time period/granularity combination is then a local
+window and resample of that series, so `1m 1d`, `3m 1w`, `1y 1m` and `all 1m`
+for the same asset and metric share a single upstream fetch.
+"""
+
+import math
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple, Union
+
+from config import GRANULARITY_MAP, METRIC_AGGREGATION, PERIOD_WINDOW_DAYS, SERIES_CACHE_DURATION
+from artemisbot.chart.chart_data import SeriesData
+from artemisbot.chart.screenshot import extract_chart_data
+from artemisbot.chart.url_builder import build_chart_url
+from artemisbot.utils import availability
+
+DAY_MS = 86_400_000
+
+# Daily series keyed by (artemis_id, metric)
+SERIES_CACHE: Dict[Tuple[str, str], Tuple[float, SeriesData]] = {}
+
+
+def _utc_date(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+
+
+def window_start(time_period: str, now_ms: float) -> float:
+    """
+    First timestamp (ms) included in a time period ending at now_ms.
+
+    Args:
+        time_period: One of the supported time periods ("1w", "mtd", ..., "all")
+        now_ms: End of the window in ms since epoch
+
+    Returns:
+        The window start, or -inf for "all"
+    """
+    today = now_ms - now_ms % DAY_MS
+    if time_period == "all":
+        return -math.inf
+    if time_period == "mtd":
+        date = _utc_date(today)
+        return today - (date.day - 1) * DAY_MS
+    if time_period == "ytd":
+        date = _utc_date(today)
+        return today - (date.timetuple().tm_yday - 1) * DAY_MS
+    if time_period not in PERIOD_WINDOW_DAYS:
+        raise ValueError(f"Invalid time period: {time_period}")
+    return today - PERIOD_WINDOW_DAYS[time_period] * DAY_MS
+
+
+def window(series: SeriesData, time_period: str, now_ms: float) -> SeriesData:
+    """Slice a (sorted) series down to a time period."""
+    start = bisect_left(series.timestamps, window_start(time_period, now_ms))
+    return SeriesData.from_columns(series.name, series.timestamps[start:], series.values[start:])
+
+
+def _week_bucket(timestamp: float) -> float:
+    """Start (Monday 00:00 UTC) of the week containing timestamp."""
+    days = int(timestamp // DAY_MS)
+    # 1970-01-01 was a Thursday, so shift by 3 to align buckets on Mondays
+    return (days - (days + 3) % 7) * DAY_MS
+
+
+def _month_bucket(timestamp: float) -> float:
+    """Start (1st 00:00 UTC) of the month containing timestamp."""
+    date = _utc_date(timestamp)
+    return timestamp - timestamp % DAY_MS - (date.day - 1) * DAY_MS
+
+
+BUCKET_FUNCTIONS: Dict[str, Callable[[float], float]] = {
+    "1w": _week_bucket,
+    "1m": _month_bucket
+}
+
+
+def resample(series: SeriesData, granularity: str, metric: str) -> SeriesData:
+    """
+    Resample a daily series to a coarser granularity.
+
+    Buckets are labelled by their start date; missing (NaN) days are ignored.
+
+    Args:
+        series: Daily series
+        granularity: Target granularity ("1d", "1w" or "1m")
+        metric: Metric name, which decides how values are aggregated
+
+    Returns:
+        The resampled series
+    """
+    if granularity not in GRANULARITY_MAP:
+        raise ValueError(f"Invalid granularity: {granularity}")
+    if granularity == "1d":
+        return series
+
+    bucket_of = BUCKET_FUNCTIONS[granularity]
+    buckets = list(map(bucket_of, series.timestamps))
+    aggregation = METRIC_AGGREGATION.get(metric, "sum")
+
+    timestamps, values = array("d"), array("d")
+    total, count, last = 0.0, 0, math.nan
+    for i, bucket in enumerate(buckets):
+        value = series.values[i]
+        if not math.isnan(value):
+            total += value
+            count += 1
+            last = value
+        if i + 1 == len(buckets) or buckets[i + 1] != bucket:
+            timestamps.append(bucket)
+            if not count:
+                values.append(math.nan)
+            elif aggregation == "last":
+                values.append(last)
+            elif aggregation == "mean":
+                values.append(total / count)
+            else:
+                values.append(total)
+            total, count, last = 0.0, 0, math.nan
+
+    return SeriesData.from_columns(series.name, timestamps, values)
+
+
+def derive_series(daily: SeriesData, metric: str, time_period: str, granularity: str,
+                  now_ms: float = None) -> SeriesData:
+    """
+    Derive any time period/granularity view from a cached daily series.
+
+    Args:
+        daily: Full daily history
+        metric: Metric name
+        time_period: Time period to window to
+        granularity: Granularity to resample to
+        now_ms: End of the window, defaults to the current time
+
+    Returns:
+        The derived series
+    """
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    return resample(window(daily, time_period, now_ms), granularity, metric)
+
+
+def get_daily_series(metric: str, artemis_id: str, asset_type: str) -> Union[SeriesData, str]:
+    """
+    Return the full daily history for an asset and metric, fetching it once if needed.
+
+    Returns:
+        The daily series, or an "ERROR:..." string
+    """
+    key = (artemis_id, metric)
+    if key in SERIES_CACHE:
+        timestamp, daily = SERIES_CACHE[key]
+        if time.time() - timestamp < SERIES_CACHE_DURATION:
+            return daily
+
+    url = build_chart_url(metric, [artemis_id], asset_type, "all", "1d")
+    result = extract_chart_data(url)
+    # The full history is period-independent evidence of availability
+    if result == "ERROR:NO_DATA" or not isinstance(result, str):
+        availability.record(artemis_id, metric, not isinstance(result, str), "all")
+    if isinstance(result, str):
+        return result
+
+    daily = result[0]
+    SERIES_CACHE[key] = (time.time(), daily)
+    return daily
+
+
+def get_series(metric: str, artemis_id: str, asset_type: str,
+               time_period: str, granularity: str) -> Union[List[SeriesData], str]:
+    """
+    Serve a single-asset chart's data from the series cache.
+
+    Returns:
+        A one-element list (matching extract_chart_data), or an "ERROR:..." string
+    """
+    daily = get_daily_series(metric, artemis_id, asset_type)
+    if isinstance(daily, str):
+        return daily
+    series = derive_series(daily, metric, time_period, granularity)
+    if not series.points():
+        return "ERROR:NO_DATA"
+    return [series]
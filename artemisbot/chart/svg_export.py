@@ -0,0 +1,86 @@
+"""
+Out-of-process rasterization of Highcharts SVG exports.
+
+With CAPTURE_MODE=svg the engines pull `chart.getSVG()` from the largest chart
+and hand it to SVG_RASTERIZER (rsvg-convert) instead of screenshotting the page.
+Every function returns None when export or rasterization is not possible, so
+callers can fall back to a screenshot.
+"""
+
+import asyncio
+import logging
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import List, Optional
+
+from config import SVG_RASTERIZE_TIMEOUT, SVG_RASTERIZER, SVG_SCALE
+from artemisbot.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def rasterizer_available() -> bool:
+    """Whether the SVG rasterizer executable is installed."""
+    available = shutil.which(SVG_RASTERIZER) is not None
+    if not available:
+        logger.warning("%s not found; SVG capture falls back to screenshots", SVG_RASTERIZER)
+    return available
+
+
+def _command(scale: float) -> List[str]:
+    return [SVG_RASTERIZER, "--format=png", f"--zoom={scale}", "--background-color=white"]
+
+
+def _result(returncode: int, png: bytes, stderr: bytes) -> Optional[bytes]:
+    if returncode != 0 or not png:
+        logger.warning("SVG rasterization failed: %s", stderr.decode(errors="replace").strip())
+        metrics.incr("svg_export.failures")
+        return None
+    metrics.incr("svg_export.rasterized")
+    return png
+
+
+def rasterize(svg: Optional[str], scale: float = SVG_SCALE) -> Optional[bytes]:
+    """
+    Rasterize an exported chart SVG to PNG in a subprocess.
+
+    Args:
+        svg: SVG markup from getSVG, or None if the chart could not export it
+        scale: Zoom factor applied to the SVG's own size
+
+    Returns:
+        PNG bytes, or None if there was nothing to rasterize or rasterization failed
+    """
+    if not svg or not rasterizer_available():
+        return None
+    try:
+        completed = subprocess.run(_command(scale), input=svg.encode(), capture_output=True,
+                                   timeout=SVG_RASTERIZE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning("SVG rasterization failed: %s", e)
+        metrics.incr("svg_export.failures")
+        return None
+    return _result(completed.returncode, completed.stdout, completed.stderr)
+
+
+async def rasterize_async(svg: Optional[str], scale: float = SVG_SCALE) -> Optional[bytes]:
+    """rasterize() for event-loop callers such as the CDP engine."""
+    if not svg or not rasterizer_available():
+        return None
+    process = None
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *_command(scale), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        png, stderr = await asyncio.wait_for(process.communicate(svg.encode()), SVG_RASTERIZE_TIMEOUT)
+    except (OSError, asyncio.TimeoutError) as e:
+        if process is not None and process.returncode is None:
+            process.kill()
+            # Reap it so the subprocess transport is closed with the loop still running
+            await process.wait()
+        logger.warning("SVG rasterization failed: %s", e)
+        metrics.incr("svg_export.failures")
+        return None
+    return _result(process.returncode, png, stderr)
@@ -0,0 +1,50 @@
+"""
+Local transformations of raw chart series.
+
+Percentage views are derived from the raw values we already hold,
+so a `%` request never needs its own upstream render.
+"""
+
+import math
+from array import array
+from typing import List, Optional
+
+from artemisbot.chart.chart_data import SeriesData
+
+
+def _base_value(series: SeriesData) -> Optional[float]:
+    """First non-missing, non-zero value of a series."""
+    for value in series.values:
+        if not math.isnan(value) and value != 0:
+            return value
+    return None
+
+
+def _rebase(series: SeriesData, scale: float, offset: float) -> SeriesData:
+    """Return value / base * scale + offset for every point, keeping missing points missing."""
+    base = _base_value(series)
+    if base is None:
+        values = array("d", [math.nan]) * len(series)
+    else:
+        factor = scale / base
+        # NaN propagates through the arithmetic, so missing points stay missing
+        values = array("d", [value * factor + offset for value in series.values])
+    return SeriesData.from_columns(series.name, series.timestamps, values)
+
+
+def percent_change(series: SeriesData) -> SeriesData:
+    """
+    Express a series as the percentage change from its first value.
+
+    Args:
+        series: Raw series
+
+    Returns:
+        Series where the first value is 0 and a doubling is 100
+    """
+    return _rebase(series, 100.0, -100.0)
+
+
+def percent_change_all(series: List[SeriesData]) -> List[SeriesData]:
+    """Apply percent_change to every series of a chart."""
+    return [percent_change(s) for s in series]
@@ -0,0 +1,152 @@
+"""
+Health tracking for the upstream chart site (app.artemis.xyz).
+
+Each render stage gets a timeout derived from the latency percentiles we have
+recently observed for it, instead of a fixed value. A circuit breaker watches
+the render error rate: when it spikes the breaker opens and renders fail fast
+(callers serve stale charts where they have them) until a probe succeeds.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+from config import (
+    BREAKER_COOLDOWN,
+    BREAKER_ERROR_RATE,
+    BREAKER_MIN_REQUESTS,
+    BREAKER_WINDOW,
+    STAGE_TIMEOUT_DEFAULT,
+    STAGE_TIMEOUT_FACTOR,
+    STAGE_TIMEOUT_MAX,
+    STAGE_TIMEOUT_MIN,
+    STAGE_TIMEOUT_PERCENTILE,
+)
+from artemisbot.utils import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+BREAKER_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Minimum samples before a stage's timeout adapts
+MIN_LATENCY_SAMPLES = 10
+
+_LATENCIES: Dict[str, Deque[float]] = {}
+_OUTCOMES: Deque[Tuple[float, bool]] = deque()
+_STATE = {"state": CLOSED, "opened_at": 0.0, "probe_in_flight": False}
+_LOCK = threading.Lock()
+
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty collection."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def record_latency(stage: str, seconds: float) -> None:
+    """Record how long a render stage took."""
+    with _LOCK:
+        _LATENCIES.setdefault(stage, deque(maxlen=100)).append(seconds)
+
+
+def stage_timeout(stage: str) -> float:
+    """
+    Timeout for a render stage based on its recent latency.
+
+    Returns STAGE_TIMEOUT_DEFAULT until enough samples exist, then the
+    configured percentile times STAGE_TIMEOUT_FACTOR, clamped to
+    [STAGE_TIMEOUT_MIN, STAGE_TIMEOUT_MAX].
+    """
+    with _LOCK:
+        samples = list(_LATENCIES.get(stage, ()))
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return STAGE_TIMEOUT_DEFAULT
+    timeout = percentile(samples, STAGE_TIMEOUT_PERCENTILE) * STAGE_TIMEOUT_FACTOR
+    return min(STAGE_TIMEOUT_MAX, max(STAGE_TIMEOUT_MIN, timeout))
+
+
+def _error_rate(now: float) -> Tuple[float, int]:
+    """Error rate and request count over the breaker window (caller holds _LOCK)."""
+    while _OUTCOMES and now - _OUTCOMES[0][0] > BREAKER_WINDOW:
+        _OUTCOMES.popleft()
+    total = len(_OUTCOMES)
+    failures = sum(1 for _, ok in _OUTCOMES if not ok)
+    return (failures / total if total else 0.0), total
+
+
+def allow_request() -> bool:
+    """
+    Whether a render may go to the upstream site right now.
+
+    While open, requests are refused until BREAKER_COOLDOWN has passed; then a
+    single probe request is let through (half-open) to test for recovery.
+    """
+    with _LOCK:
+        state = _STATE["state"]
+        if state == CLOSED:
+            return True
+        if state == OPEN and time.time() - _STATE["opened_at"] >= BREAKER_COOLDOWN:
+            _STATE["state"] = HALF_OPEN
+            state = HALF_OPEN
+        if state == HALF_OPEN and not _STATE["probe_in_flight"]:
+            _STATE["probe_in_flight"] = True
+            return True
+    metrics.incr("upstream.rejected")
+    return False
+
+
+def _open(now: float) -> None:
+    _STATE["state"] = OPEN
+    _STATE["opened_at"] = now
+    _STATE["probe_in_flight"] = False
+    metrics.incr("upstream.breaker_opened")
+
+
+def record_outcome(ok: bool) -> None:
+    """Record whether an upstream render succeeded and update the breaker."""
+    now = time.time()
+    with _LOCK:
+        _OUTCOMES.append((now, ok))
+        if _STATE["state"] == HALF_OPEN:
+            if ok:
+                _STATE["state"] = CLOSED
+                _STATE["probe_in_flight"] = False
+                _OUTCOMES.clear()
+            else:
+                _open(now)
+            return
+        error_rate, total = _error_rate(now)
+        if _STATE["state"] == CLOSED and total >= BREAKER_MIN_REQUESTS and error_rate >= BREAKER_ERROR_RATE:
+            _open(now)
+
+
+def record_result(result) -> None:
+    """Record a render result: only SCREENSHOT_FAILED errors count against the upstream site."""
+    failed = isinstance(result, str) and result.startswith("ERROR:SCREENSHOT_FAILED")
+    record_outcome(not failed)
+
+
+def breaker_state() -> str:
+    """Current breaker state: closed, half_open or open."""
+    return _STATE["state"]
+
+
+def upstream_stats() -> Dict[str, float]:
+    """Breaker state, error rate and current stage timeouts for the metrics report."""
+    with _LOCK:
+        error_rate, total = _error_rate(time.time())
+        stages = list(_LATENCIES)
+    stats = {
+        "upstream.breaker_state": BREAKER_STATE_VALUES[_STATE["state"]],
+        "upstream.error_rate": round(error_rate, 3),
+        "upstream.requests_in_window": total,
+    }
+    for stage in stages:
+        stats[f"upstream.timeout.{stage}"] = round(stage_timeout(stage), 2)
+    return stats
+
+
+metrics.register_collector(upstream_stats)
@@ -2,14 +2,17 @@ import json
 import urllib.parse
 from typing import List
 from artemisbot.utils.asset_mappings import get_asset_by_id, get_asset_by_symbol
+from artemisbot.utils.profiling import profiled
+from config import SERIES_COLORS
 
+@profiled
 def build_chart_url(metric: str, tickers: List[str], asset_type: str, time_period: str, granularity: str, is_percentage: bool = False) -> str:
     """
     Build a chart URL for the Artemis Analytics platform.
     
     Args:
         metric: The metric to chart (e.g., 'price', 'volume', 'tvl')
-        tickers: List of asset tickers to include
+        tickers: List of asset tickers to include, one series (in its own color) each
         asset_type: The type of asset (e.g., 'chain', 'application')
         time_period: The time period for the chart (e.g., '1w', '1m', '1y')
         granularity: The granularity of the data (e.g., '1d', '1w', '1m')
@@ -68,12 +71,14 @@ def build_chart_url(metric: str, tickers: List[str], asset_type: str, time_perio
     if not artemis_metric:
         raise ValueError(f"Invalid metric: {metric}")
     
-    # Get asset names for display
+    # Resolve the assets once, for the title and the series
+    asset_infos = []
     asset_names = []
     for ticker in tickers:
         asset_info = get_asset_by_id(ticker) or get_asset_by_symbol(ticker)
         if not asset_info:
             raise ValueError(f"Unknown asset: {ticker}")
+        asset_infos.append(asset_info)
         asset_names.append(asset_info.get("name", ticker.capitalize()))
     
     # Create a readable title
@@ -122,12 +127,8 @@ def build_chart_url(metric: str, tickers: List[str], asset_type: str, time_perio
         "series": []
     }
     
-    # Add assets to series
-    for ticker in tickers:
-        asset_info = get_asset_by_id(ticker) or get_asset_by_symbol(ticker)
-        if not asset_info:
-            raise ValueError(f"Unknown asset: {ticker}")
-            
+    # Add assets to series, each in a distinct color
+    for index, (ticker, asset_info) in enumerate(zip(tickers, asset_infos)):
         # Use the asset type from the asset info if available, otherwise use the provided type
         asset_type_to_use = asset_info.get("type", asset_type).upper()
         
@@ -149,7 +150,7 @@ def build_chart_url(metric: str, tickers: List[str], asset_type: str, time_perio
                 "units": "PERCENTAGE" if is_percentage else "RAW",
                 "visible": True,
                 "showInLegend": True,
-                "color": "#8A88FF",
+                "color": SERIES_COLORS[index % len(SERIES_COLORS)],
                 "yAxis": 0
             }
         }
@@ -0,0 +1,41 @@
+"""
+Message filter built on the compiled command grammar.
+
+It runs inside the dispatcher, so ordinary chatter is rejected with a single
+regex match before any handler is called. The match is handed to the handler as
+context.match, so the grammar runs once per message.
+"""
+
+from typing import Dict, List, Optional
+
+from telegram import Chat, Message
+from telegram.ext import filters
+
+from artemisbot.utils.command_parser import match_command
+
+GROUP_CHATS = (Chat.GROUP, Chat.SUPERGROUP)
+
+
+class ChartCommandFilter(filters.MessageFilter):
+    """
+    Accept text messages that match the chart/dashboard command grammar.
+
+    Commands with the `=art` prefix are only accepted in group chats.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, name: str):
+        super().__init__(name=name, data_filter=True)
+
+    def filter(self, message: Message) -> Optional[Dict[str, List]]:
+        if not message.text:
+            return None
+        match = match_command(message.text)
+        if match is None or (match.group("prefix") and message.chat.type not in GROUP_CHATS):
+            return None
+        return {"matches": [match]}
+
+
+# Plain commands ("price solana 1w 1d") and prefixed group commands ("=art price solana 1w 1d")
+CHART_COMMAND = ChartCommandFilter(name="CHART_COMMAND")
@@ -0,0 +1,197 @@
+"""
+Inline mode: `@artemis_chartbot price sol 1w 1d` from any chat.
+
+Inline answers must be instant, so they are served only from charts whose
+Telegram file_id is already known. With INLINE_CACHE_CHAT_ID set, anything else
+is queued for a background render and upload, and is ready the next time
+someone asks for it. Without it, the answer offers to send the command instead.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import List, Optional
+
+from telegram import (
+    Bot,
+    InlineQueryResultArticle,
+    InlineQueryResultCachedPhoto,
+    InputTextMessageContent,
+    Update,
+)
+from telegram.ext import Application, ContextTypes
+
+from config import INLINE_CACHE_CHAT_ID, INLINE_MAX_RESULTS, INLINE_RENDER_QUEUE_SIZE
+from artemisbot.chart.blob_store import photo_for, remember_file_id
+from artemisbot.chart.screenshot import cached_file_id, take_screenshot
+from artemisbot.chart.url_builder import build_chart_url
+from artemisbot.handlers.message_handlers import build_chart_title
+from artemisbot.utils import metrics, request_log
+from artemisbot.utils.asset_mappings import search_assets
+from artemisbot.utils.command_parser import VALID_GRANULARITIES, VALID_METRICS, VALID_PERIODS, parse_command
+
+logger = logging.getLogger(__name__)
+
+# Charts waiting for a background render: (url, is_percentage, title, request log key)
+_RENDER_QUEUE: Optional[asyncio.Queue] = None
+_QUEUED = set()
+
+
+def _result_id(*parts) -> str:
+    """Stable inline result ID (Telegram allows at most 64 bytes)."""
+    return hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _complete(token: str, options: List[str]) -> List[str]:
+    """Options starting with a partially typed token (all options if it is empty)."""
+    return [option for option in options if option.startswith(token.lower())]
+
+
+def suggest_commands(query: str, limit: int = INLINE_MAX_RESULTS) -> List[str]:
+    """
+    Complete a partial chart command using the metric tables and the asset index.
+
+    Args:
+        query: What the user has typed so far
+        limit: Maximum number of suggestions
+
+    Returns:
+        Complete commands such as "price solana 1m 1d"
+    """
+    parts = query.lower().split()
+    metric_token = parts[0] if parts else ""
+    asset_token = parts[1] if len(parts) > 1 else ""
+    period_token = parts[2] if len(parts) > 2 else ""
+    granularity_token = parts[3] if len(parts) > 3 else ""
+
+    metric_options = _complete(metric_token, VALID_METRICS)
+    assets = search_assets(asset_token, limit) if asset_token else ["bitcoin", "ethereum", "solana"]
+    periods = _complete(period_token, VALID_PERIODS) or ["1m"]
+    granularities = _complete(granularity_token, VALID_GRANULARITIES) or ["1d"]
+
+    suggestions = []
+    for metric in metric_options:
+        for asset in assets:
+            suggestions.append(f"{metric} {asset} {periods[0]} {granularities[0]}")
+            if len(suggestions) >= limit:
+                return suggestions
+    return suggestions
+
+
+def _enqueue_render(url: str, is_percentage: bool, title: str, log_key: str) -> bool:
+    """Queue a chart for background rendering unless it is already queued."""
+    key = (url, is_percentage)
+    if _RENDER_QUEUE is None or key in _QUEUED or _RENDER_QUEUE.full():
+        return False
+    _QUEUED.add(key)
+    _RENDER_QUEUE.put_nowait((url, is_percentage, title, log_key))
+    metrics.incr("inline.renders_queued")
+    return True
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Answer an inline query from the chart cache, queueing uncached charts for rendering.
+
+    Args:
+        update: Telegram update
+        context: CallbackContext
+    """
+    query = update.inline_query.query.strip()
+
+    try:
+        metric, tickers, asset_type, time_period, granularity, is_percentage, _ = parse_command(query)
+    except ValueError:
+        # Not a complete command yet: offer completions that send the command itself
+        results = [
+            InlineQueryResultArticle(
+                id=_result_id("suggest", command),
+                title=command,
+                description="Send this chart request",
+                input_message_content=InputTextMessageContent(command),
+            )
+            for command in suggest_commands(query)
+        ]
+        await update.inline_query.answer(results, cache_time=300)
+        return
+
+    url = build_chart_url(metric, tickers, asset_type, time_period, granularity)
+    title = build_chart_title(metric, tickers, time_period, granularity, is_percentage)
+    log_key = request_log.chart_key(metric, tickers, time_period, granularity, is_percentage)
+    file_id, fresh = cached_file_id(url, is_percentage)
+
+    if file_id:
+        metrics.incr("inline.cache_hits")
+        if fresh:
+            request_log.record(log_key, request_log.HIT)
+        else:
+            # Serve the stale chart now and refresh it for the next query (the render is logged)
+            _enqueue_render(url, is_percentage, title, log_key)
+        result = InlineQueryResultCachedPhoto(
+            id=_result_id(url, is_percentage),
+            photo_file_id=file_id,
+            title=title,
+            caption=title,
+        )
+        await update.inline_query.answer([result], cache_time=60)
+        return
+
+    metrics.incr("inline.cache_misses")
+    if not INLINE_CACHE_CHAT_ID:
+        # Nothing can render it in the background: offer to send the command to the chat instead
+        result = InlineQueryResultArticle(
+            id=_result_id("send", url, is_percentage),
+            title=title,
+            description="Send this chart request",
+            input_message_content=InputTextMessageContent(query),
+        )
+        await update.inline_query.answer([result], cache_time=60)
+        return
+    _enqueue_render(url, is_percentage, title, log_key)
+    result = InlineQueryResultArticle(
+        id=_result_id("pending", url, is_percentage),
+        title=f"⏳ Preparing {title}",
+        description="This chart is being rendered. Try again in a few seconds.",
+        input_message_content=InputTextMessageContent(query),
+    )
+    # Don't let Telegram cache the placeholder, or the chart won't show up when ready
+    await update.inline_query.answer([result], cache_time=0, is_personal=True)
+
+
+async def _render_and_upload(bot: Bot, url: str, is_percentage: bool, title: str, log_key: str) -> None:
+    """Render a chart and upload it to the cache chat to obtain its file_id."""
+    result = await asyncio.to_thread(take_screenshot, url, is_percentage, log_key)
+    if isinstance(result, str) and result.startswith("ERROR:"):
+        logger.info("Background render failed: %s", result)
+        return
+    # Nothing to upload if identical content already has a file_id
+    if not INLINE_CACHE_CHAT_ID or isinstance(photo_for(result), str):
+        return
+    sent = await bot.send_photo(chat_id=INLINE_CACHE_CHAT_ID, photo=result, caption=title,
+                                disable_notification=True)
+    if sent.photo:
+        remember_file_id(result, sent.photo[-1].file_id)
+
+
+async def run_render_worker(bot: Bot) -> None:
+    """Render queued inline charts one at a time."""
+    while True:
+        url, is_percentage, title, log_key = await _RENDER_QUEUE.get()
+        try:
+            await _render_and_upload(bot, url, is_percentage, title, log_key)
+        except Exception:
+            logger.exception("Background render of %s failed", title)
+        finally:
+            _QUEUED.discard((url, is_percentage))
+            _RENDER_QUEUE.task_done()
+
+
+async def start_render_worker(application: Application) -> None:
+    """post_init hook that starts the background render worker for inline queries."""
+    global _RENDER_QUEUE
+    if not INLINE_CACHE_CHAT_ID:
+        # Renders could not be uploaded for a file_id, so no queue and no worker
+        logger.warning("INLINE_CACHE_CHAT_ID is not set; inline queries can only serve charts already sent in chats")
+        return
+    _RENDER_QUEUE = asyncio.Queue(maxsize=INLINE_RENDER_QUEUE_SIZE)
+    application.bot_data["inline_render_worker"] = asyncio.create_task(run_render_worker(application.bot))
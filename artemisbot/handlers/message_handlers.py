@@ -1,16 +1,85 @@
-from typing import List
-from telegram import Update, Message, Bot
+import asyncio
+import logging
+from contextlib import ExitStack
+from typing import List, Optional, Union
+from telegram import Update
 from telegram.ext import ContextTypes
-from artemisbot.utils.command_parser import parse_command
+from artemisbot.utils.command_parser import UnavailableMetricError, parse_command, parse_dashboard_command
 from artemisbot.chart.url_builder import build_chart_url
-from artemisbot.chart.screenshot import take_screenshot
+from artemisbot.chart.screenshot import cached_digest, take_screenshot, extract_chart_data
+from artemisbot.chart.chart_data import to_csv, summarize
+from artemisbot.chart.series_cache import get_series
+from artemisbot.chart.transforms import percent_change_all
+from artemisbot.chart import blob_store
+from artemisbot.chart.dashboard import compose_grid
 from artemisbot.utils.asset_mappings import get_asset_by_id, get_asset_by_symbol
+from artemisbot.utils import availability, startup, metrics, profiling, request_log
+from config import (
+    ADMIN_USER_IDS, CDP_MAX_PAGES, CHROME_POOL_SIZE, DASHBOARD_METRICS, MAX_COMPARE_ASSETS, PROFILE_DEFAULT_REQUESTS,
+    PROFILE_MAX_SECONDS, RENDER_ENGINE,
+)
 
+logger = logging.getLogger(__name__)
 
+# Display names used in chart titles
+METRIC_DISPLAY = {
+    "price": "Price",
+    "volume": "Volume",
+    "tvl": "TVL",
+    "fees": "Fees",
+    "revenue": "Revenue",
+    "mc": "Market Cap",
+    "txns": "Transactions",
+    "daa": "Daily Active Addresses",
+    "dau": "Daily Active Users",
+    "fdmc": "Fully Diluted Market Cap"
+}
+
+TIME_PERIOD_DISPLAY = {
+    "1w": "1 Week",
+    "mtd": "Month to Date",
+    "1m": "1 Month",
+    "3m": "3 Months",
+    "6m": "6 Months",
+    "ytd": "Year to Date",
+    "1y": "1 Year",
+    "all": "All Time"
+}
+
+GRANULARITY_DISPLAY = {
+    "1d": "Daily",
+    "1w": "Weekly",
+    "1m": "Monthly"
+}
+
+
+def format_asset_names(tickers_raw: List[str]) -> str:
+    """Display names of the charted assets, joined with '/'."""
+    asset_names = []
+    for ticker in tickers_raw:
+        asset_info = get_asset_by_id(ticker) or get_asset_by_symbol(ticker)
+        asset_names.append(asset_info["name"] if asset_info and "name" in asset_info else ticker.capitalize())
+    return "/".join(asset_names)
+
+
+def build_chart_title(metric: str, tickers_raw: List[str], time_period: str,
+                      granularity: str, is_percentage: bool) -> str:
+    """Readable chart title used for status messages and captions."""
+    metric_display = METRIC_DISPLAY.get(metric, metric.capitalize())
+    time_period_display = TIME_PERIOD_DISPLAY.get(time_period, time_period)
+    granularity_display = GRANULARITY_DISPLAY.get(granularity, granularity)
+    
+    title = f"{metric_display} - {format_asset_names(tickers_raw)} ({time_period_display}, {granularity_display})"
+    if is_percentage:
+        title += " (%)"
+    return title
+
+
+@profiling.profiled_request
 async def process_chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE, 
                       metric: str, tickers_raw: List[str], asset_type: str, 
                       time_period: str, granularity: str, is_percentage: bool,
-                      is_group: bool = False) -> None:
+                      is_group: bool = False, output_mode: str = "chart") -> None:
     """
     Process a chart command and respond with the appropriate chart.
     
@@ -24,57 +93,51 @@ async def process_chart_command(update: Update, context: ContextTypes.DEFAULT_TY
         granularity: Data granularity
         is_percentage: Whether to display as percentages
         is_group: Whether this is a group chat message
+        output_mode: "chart" for an image, "csv" or "stats" for the underlying data
     """
-    # Get asset names for display
-    asset_names = []
-    for ticker in tickers_raw:
-        asset_info = get_asset_by_id(ticker) or get_asset_by_symbol(ticker)
-        asset_names.append(asset_info["name"] if asset_info and "name" in asset_info else ticker.capitalize())
-    
-    ticker_display = "/".join(asset_names)
-    
-    # Create a readable title
-    metric_display = {
-        "price": "Price",
-        "volume": "Volume",
-        "tvl": "TVL",
-        "fees": "Fees",
-        "revenue": "Revenue",
-        "mc": "Market Cap",
-        "txns": "Transactions",
-        "daa": "Daily Active Addresses",
-        "dau": "Daily Active Users",
-        "fdmc": "Fully Diluted Market Cap"
-    }.get(metric, metric.capitalize())
-    
-    time_period_display = {
-        "1w": "1 Week",
-        "mtd": "Month to Date",
-        "1m": "1 Month",
-        "3m": "3 Months",
-        "6m": "6 Months",
-        "ytd": "Year to Date",
-        "1y": "1 Year",
-        "all": "All Time"
-    }.get(time_period, time_period)
-    
-    granularity_display = {
-        "1d": "Daily",
-        "1w": "Weekly",
-        "1m": "Monthly"
-    }.get(granularity, granularity)
-    
-    title = f"{metric_display} - {ticker_display} ({time_period_display}, {granularity_display})"
-    if is_percentage:
-        title += " (%)"
+    title = build_chart_title(metric, tickers_raw, time_period, granularity, is_percentage)
+    metric_display = METRIC_DISPLAY.get(metric, metric.capitalize())
+    ticker_display = format_asset_names(tickers_raw)
     
     status_message = await update.message.reply_text(f"📊 Generating {title}...")
+    # Closes disk cache files opened for upload
+    uploads = ExitStack()
     
     try:
-        # Build and process chart
-        chart_url = build_chart_url(metric, tickers_raw, asset_type, time_period, granularity, is_percentage)
+        # Build and process chart. Percentages are computed locally from the raw
+        # chart, so raw and % requests share one URL and one render.
+        chart_url = build_chart_url(metric, tickers_raw, asset_type, time_period, granularity)
         
-        screenshot_result = take_screenshot(chart_url)
+        # Fresh cached charts are sent straight from the blob store without a render round-trip
+        digest = cached_digest(chart_url, is_percentage) if output_mode == "chart" else None
+        photo = uploads.enter_context(blob_store.upload_source(digest)) if digest is not None else None
+        if photo is None:
+            # Not cached, or the image was released after the lookup: render it
+            digest = None
+        log_key = request_log.chart_key(metric, tickers_raw, time_period, granularity, is_percentage)
+        if digest is not None:
+            screenshot_result = None
+            request_log.record(log_key, request_log.HIT, size=blob_store.size(digest))
+        elif output_mode == "chart":
+            screenshot_result = await asyncio.to_thread(take_screenshot, chart_url, is_percentage, log_key)
+        else:
+            if len(tickers_raw) == 1:
+                # Single-asset data is derived locally from the cached daily series
+                screenshot_result = await asyncio.to_thread(
+                    get_series, metric, tickers_raw[0], asset_type, time_period, granularity
+                )
+            else:
+                # Data modes skip image capture entirely
+                screenshot_result = await asyncio.to_thread(extract_chart_data, chart_url)
+            if is_percentage and not isinstance(screenshot_result, str):
+                screenshot_result = percent_change_all(screenshot_result)
+        
+        # Learn which metrics single assets have data for (the series cache records its own fetches)
+        if len(tickers_raw) == 1 and output_mode == "chart" and digest is None:
+            if screenshot_result == "ERROR:NO_DATA":
+                availability.record(tickers_raw[0], metric, False, time_period)
+            elif not isinstance(screenshot_result, str):
+                availability.record(tickers_raw[0], metric, True, time_period)
         
         # Handle error responses
         if isinstance(screenshot_result, str) and screenshot_result.startswith("ERROR:"):
@@ -92,11 +155,22 @@ async def process_chart_command(update: Update, context: ContextTypes.DEFAULT_TY
                     f"I couldn't find any {metric_display} data for {ticker_display}.\n\n"
                     f"Try different time periods (1m, 3m, 1y) or metrics (price, tvl, fees)."
                 )
+            elif error_code == "NO_PERCENTAGE":
+                await update.message.reply_text(
+                    f"📈 Percentage View Unavailable\n\n"
+                    f"I couldn't read the {metric_display} data for {ticker_display} to compute percentages.\n\n"
+                    f"Try the same chart without %."
+                )
+            elif error_code == "UPSTREAM_UNAVAILABLE":
+                await update.message.reply_text(
+                    "⏳ Artemis Is Not Responding\n\n"
+                    "Chart rendering is paused while the Artemis site recovers. Please try again in a few minutes."
+                )
             elif error_code == "INVALID_PARAMETERS":
                 prefix = "=art " if is_group else ""
                 await update.message.reply_text(
                     f"⚠️ Invalid Chart Parameters\n\n"
-                    f"Format: {prefix}<metric> <asset> <time_period> <granularity> [%]\n"
+                    f"Format: {prefix}<metric> <asset>[,<asset>...] <time_period> <granularity> [%] [csv|stats]\n"
                     f"Example: {prefix}price solana 1w 1d"
                 )
             else:
@@ -106,12 +180,30 @@ async def process_chart_command(update: Update, context: ContextTypes.DEFAULT_TY
                 )
             return
         
-        # Send successful chart
-        await update.message.reply_photo(
-            photo=screenshot_result,
-            caption=title
-        )
+        # Send the data or the successful chart
+        if output_mode == "csv":
+            filename = f"{metric}_{'_'.join(tickers_raw)}_{time_period}_{granularity}.csv"
+            await update.message.reply_document(
+                document=to_csv(screenshot_result),
+                filename=filename,
+                caption=title
+            )
+        elif output_mode == "stats":
+            await update.message.reply_text(summarize(screenshot_result, title))
+        else:
+            # Identical images share one upload: reuse its file_id when we have one,
+            # otherwise send the stored buffer (or stream it from the disk cache)
+            if photo is None:
+                digest = blob_store.content_digest(screenshot_result)
+                photo = uploads.enter_context(blob_store.upload_source(digest)) or screenshot_result
+            sent = await update.message.reply_photo(photo=photo, caption=title)
+            if sent and sent.photo:
+                blob_store.set_file_id(digest, sent.photo[-1].file_id)
         await status_message.delete()
+
+        first_reply = startup.record_first_reply()
+        if first_reply is not None:
+            logger.info("First chart sent %.1fs after startup", first_reply)
         
     except Exception as e:
         await status_message.delete()
@@ -119,64 +211,139 @@ async def process_chart_command(update: Update, context: ContextTypes.DEFAULT_TY
             f"❌ Error: {str(e)}\n\n"
             f"Please try again later."
         )
+    finally:
+        uploads.close()
 
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+# Dashboard panels rendering at once across all dashboards (created on the bot's event loop)
+_PANEL_RENDERS: Optional[asyncio.Semaphore] = None
+
+
+async def _render_panel(url: str, log_key: str) -> Union[bytes, str]:
     """
-    Process incoming messages and generate charts based on user commands.
+    take_screenshot for a dashboard panel, in a worker thread.
+
+    At most as many panels run at once as the render engine can render (the Selenium pool
+    or the CDP engine's pages), so dashboards don't fill the default executor with threads
+    that only wait for a browser.
     """
-    message_text = update.message.text.strip()
-    parts = message_text.split()
+    global _PANEL_RENDERS
+    if _PANEL_RENDERS is None:
+        _PANEL_RENDERS = asyncio.Semaphore(max(1, CDP_MAX_PAGES if RENDER_ENGINE == "cdp" else CHROME_POOL_SIZE))
+    async with _PANEL_RENDERS:
+        return await asyncio.to_thread(take_screenshot, url, False, log_key)
+
+
+async def process_dashboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                    tickers_raw: List[str], asset_type: str,
+                                    time_period: str, granularity: str) -> None:
+    """
+    Render the dashboard metric set for one asset and reply with a single grid image.
     
-    # Only process messages that start with a valid metric
-    valid_metrics = ["price", "volume", "tvl", "fees", "revenue", "mc", "txns", "daa", "dau", "fdmc"]
+    Each panel goes through take_screenshot, so panels already in the chart cache cost nothing.
+    Renders are bounded by the browser pool (see _render_panel).
     
-    # If message is too short or doesn't start with a valid metric, ignore it completely
-    if len(parts) < 4 or parts[0].lower() not in valid_metrics:
-        return
+    Args:
+        update: Telegram update object
+        context: Telegram context object
+        tickers_raw: List of tickers to chart
+        asset_type: Asset type (CHAIN, APPLICATION, etc.)
+        time_period: Time period for the charts
+        granularity: Data granularity
+    """
+    asset_info = get_asset_by_id(tickers_raw[0]) or get_asset_by_symbol(tickers_raw[0])
+    asset_display = asset_info["name"] if asset_info and "name" in asset_info else tickers_raw[0].capitalize()
+    title = (f"Dashboard - {asset_display} ({TIME_PERIOD_DISPLAY.get(time_period, time_period)}, "
+             f"{GRANULARITY_DISPLAY.get(granularity, granularity)})")
+    
+    status_message = await update.message.reply_text(f"📊 Generating {title}...")
     
     try:
-        metric, tickers_raw, asset_type, time_period, granularity, is_percentage = parse_command(message_text)
+        # Metrics the asset is known to lack are not rendered at all
+        dashboard_metrics = [m for m in DASHBOARD_METRICS if not availability.is_unavailable(tickers_raw[0], m)]
+        results = await asyncio.gather(*(
+            _render_panel(build_chart_url(metric, tickers_raw, asset_type, time_period, granularity),
+                          request_log.chart_key(metric, tickers_raw, time_period, granularity, False))
+            for metric in dashboard_metrics
+        ))
         
-        await process_chart_command(
-            update, context, metric, tickers_raw, asset_type, time_period, granularity, is_percentage
-        )
-    except ValueError:
-        # Silently ignore invalid commands
-        return
-
-
-async def handle_group_message(message: Message, bot: Bot) -> None:
-    """Handle messages in group chats."""
-    # Only process messages that start with '=art'
-    if not message.text or not message.text.startswith('=art'):
-        return
+        for metric, result in zip(dashboard_metrics, results):
+            if result == "ERROR:NO_DATA" or not isinstance(result, str):
+                availability.record(tickers_raw[0], metric, not isinstance(result, str), time_period)
         
-    # Remove the '=art' prefix and process the command
-    command_text = message.text[4:].strip()
-    if not command_text:
-        return
+        # Panels without data are left out of the grid
+        panels = [
+            (METRIC_DISPLAY.get(metric, metric.capitalize()), result)
+            for metric, result in zip(dashboard_metrics, results)
+            if not (isinstance(result, str) and result.startswith("ERROR:"))
+        ]
+        await status_message.delete()
         
-    parts = command_text.split()
-    if len(parts) < 4:
-        return
+        if not panels:
+            await update.message.reply_text(
+                f"📈 No Chart Data Available\n\n"
+                f"I couldn't find any dashboard data for {asset_display}.\n\n"
+                f"Try a different time period (1m, 3m, 1y)."
+            )
+            return
         
-    # Only process messages that start with a valid metric
-    valid_metrics = ["price", "volume", "tvl", "fees", "revenue", "mc", "txns", "daa", "dau", "fdmc"]
-    if parts[0].lower() not in valid_metrics:
-        return
+        grid = await asyncio.to_thread(compose_grid, panels)
+        await update.message.reply_photo(photo=grid, caption=title)
         
+    except Exception as e:
+        await status_message.delete()
+        await update.message.reply_text(
+            f"❌ Error: {str(e)}\n\n"
+            f"Please try again later."
+        )
+
+
+async def reply_unavailable(update: Update, error: UnavailableMetricError) -> None:
+    """Answer a command for a metric the asset is known to have no data for, without rendering."""
+    metric_display = METRIC_DISPLAY.get(error.metric, error.metric.capitalize())
+    asset_display = format_asset_names([error.artemis_id])
+    known = availability.available_metrics(error.artemis_id, list(METRIC_DISPLAY))
+    if known:
+        suggestion = f"Metrics with data for {asset_display}: {', '.join(METRIC_DISPLAY[m] for m in known)}"
+    else:
+        suggestion = "Try a different metric (price, tvl, fees)."
+    await update.message.reply_text(
+        f"📈 No Chart Data Available\n\n"
+        f"Artemis has no {metric_display} data for {asset_display}.\n\n"
+        f"{suggestion}"
+    )
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Process chart and dashboard commands, with or without the `=art` group prefix.
+    
+    Only messages accepted by the CHART_COMMAND filter reach this handler; its
+    grammar match is in context.match.
+    """
+    match = context.match
+    is_group = match.group("prefix") is not None
+    # Parse the command without the '=art' prefix
+    command_text = update.message.text[match.end("prefix"):].strip() if is_group else update.message.text.strip()
+    
+    # Dashboards get their own command
+    if match.group("command").lower() == "dash":
+        try:
+            tickers_raw, asset_type, time_period, granularity = parse_dashboard_command(command_text, is_group=is_group)
+        except ValueError:
+            return
+        await process_dashboard_command(update, context, tickers_raw, asset_type, time_period, granularity)
+        return
+    
     try:
-        metric, tickers_raw, asset_type, time_period, granularity, is_percentage = parse_command(command_text, is_group=True)
-        
-        # Create a fake update object for process_chart_command
-        update = Update(0, message=message)
-        context = ContextTypes.DEFAULT_TYPE()
-        context.bot = bot
+        metric, tickers_raw, asset_type, time_period, granularity, is_percentage, output_mode = parse_command(command_text, is_group=is_group)
         
         await process_chart_command(
-            update, context, metric, tickers_raw, asset_type, time_period, granularity, is_percentage, is_group=True
+            update, context, metric, tickers_raw, asset_type, time_period, granularity, is_percentage, is_group=is_group,
+            output_mode=output_mode
         )
+    except UnavailableMetricError as e:
+        await reply_unavailable(update, e)
     except ValueError:
         # Silently ignore invalid commands
         return
@@ -283,14 +450,80 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     """
     await update.message.reply_text(
         "📊 Artemis Analytics Chart Bot\n\n"
-        "Format: <metric> <asset> <time_period> <granularity> [%]\n\n"
+        "Format: <metric> <asset>[,<asset>...] <time_period> <granularity> [%] [csv|stats]\n\n"
         "Examples:\n"
         "• price solana 1w 1d\n"
         "• fees ethereum 3m 1d\n"
-        "• tvl bitcoin 1y 1w %\n\n"
+        "• tvl bitcoin 1y 1w %\n"
+        "• price ethereum 3m 1d stats\n"
+        f"• price sol,eth,btc 3m 1d % (compare up to {MAX_COMPARE_ASSETS} assets)\n"
+        "• dash solana 3m 1d (dashboard of key metrics)\n\n"
         "Metrics: price, volume, tvl, fees, revenue, mc, tx, fc\n"
         "Time Periods: 1w, mtd, 1m, 3m, 6m, ytd, 1y, all\n"
-        "Granularity: 1d, 1w, 1m\n\n"
+        "Granularity: 1d, 1w, 1m\n"
+        "Options: % (percentage), csv (data file), stats (summary)\n\n"
+        "Daily delivery: /subscribe price ethereum 1m 1d 09:00 (UTC)\n\n"
         "In group chats, start with 'art '",
         parse_mode='Markdown'
-    )
\ No newline at end of file
+    )
+
+
+def is_admin(update: Update) -> bool:
+    """Whether the message was sent by one of the configured admins."""
+    user = update.effective_user
+    return user is not None and user.id in ADMIN_USER_IDS
+
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle the /stats command - show cache and render metrics to admins.
+    
+    Args:
+        update: Telegram update
+        context: CallbackContext
+    """
+    if not is_admin(update):
+        return
+    await update.message.reply_text(f"📈 Bot Metrics\n\n{metrics.format_report()}")
+
+
+async def _profile_and_report(update: Update, max_requests, duration: float) -> None:
+    """Run a profiling session and send its summary to the admin who started it."""
+    result = await profiling.run_session(max_requests, duration)
+    if result is None:
+        await update.message.reply_text("⚠️ A profiling session is already running.")
+        return
+    summary, paths = result
+    report = f"🔬 Profile Finished\n\n{summary}\n\nFiles:\n" + "\n".join(paths)
+    # Telegram messages are limited to 4096 characters
+    await update.message.reply_text(report[:4000])
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle the /profile command - profile the next N chart requests or T seconds (admins only).
+    
+    `/profile` covers the next PROFILE_DEFAULT_REQUESTS requests, `/profile 25` the next 25
+    and `/profile 60s` the next 60 seconds; no session runs longer than PROFILE_MAX_SECONDS.
+    
+    Args:
+        update: Telegram update
+        context: CallbackContext
+    """
+    if not is_admin(update):
+        return
+    
+    arg = context.args[0].lower() if context.args else str(PROFILE_DEFAULT_REQUESTS)
+    try:
+        if arg.endswith("s"):
+            max_requests, duration = None, min(float(arg[:-1]), PROFILE_MAX_SECONDS)
+        else:
+            max_requests, duration = int(arg), PROFILE_MAX_SECONDS
+    except ValueError:
+        await update.message.reply_text("Format: /profile [requests] or /profile <seconds>s")
+        return
+    
+    limit = f"{duration:g} seconds" if max_requests is None else f"the next {max_requests} chart requests"
+    await update.message.reply_text(f"🔬 Profiling {limit}...")
+    # Don't block update processing: the session needs chart requests to come in
+    context.bot_data["profile_session"] = asyncio.create_task(_profile_and_report(update, max_requests, duration))
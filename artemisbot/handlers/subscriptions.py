@@ -0,0 +1,220 @@
+"""
+Scheduled chart subscriptions.
+
+Chats subscribe to a chart at a daily UTC time. The scheduler groups all due
+subscriptions by chart, renders each unique chart once, uploads it to the first
+chat and then fans the resulting file_id out to every other subscriber.
+"""
+
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Union
+
+from telegram import Bot, Update
+from telegram.error import Forbidden, RetryAfter, TelegramError
+from telegram.ext import Application, ContextTypes
+
+from config import MAX_SUBSCRIPTIONS_PER_CHAT, SUBSCRIPTION_CHECK_INTERVAL, SUBSCRIPTION_SEND_INTERVAL
+from artemisbot.chart.blob_store import photo_for, remember_file_id
+from artemisbot.chart.screenshot import take_screenshot
+from artemisbot.chart.url_builder import build_chart_url
+from artemisbot.handlers.message_handlers import build_chart_title
+from artemisbot.utils import request_log
+from artemisbot.utils.command_parser import parse_command
+from artemisbot.utils.subscription_store import (
+    add_subscription,
+    chart_key,
+    due_subscriptions,
+    list_subscriptions,
+    mark_sent,
+    remove_subscriptions,
+)
+
+logger = logging.getLogger(__name__)
+
+TIME_PATTERN = re.compile(r"^([01]?\d|2[0-3]):([0-5]\d)$")
+
+SUBSCRIBE_USAGE = (
+    "Format: /subscribe <metric> <asset> <time_period> <granularity> [%] <HH:MM>\n"
+    "Example: /subscribe price ethereum 1m 1d 09:00\n\n"
+    "Times are in UTC."
+)
+
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle /subscribe - deliver a chart to this chat every day at a given UTC time.
+
+    Args:
+        update: Telegram update
+        context: CallbackContext
+    """
+    args = context.args or []
+    match = TIME_PATTERN.match(args[-1]) if args else None
+    if not match:
+        await update.message.reply_text(f"⚠️ Invalid Subscription\n\n{SUBSCRIBE_USAGE}")
+        return
+    send_time = f"{int(match.group(1)):02d}:{match.group(2)}"
+
+    try:
+        metric, tickers, asset_type, time_period, granularity, is_percentage, output_mode = parse_command(
+            " ".join(args[:-1])
+        )
+    except ValueError as e:
+        reason = str(e).splitlines()[0] if str(e) else "Invalid chart"
+        await update.message.reply_text(f"⚠️ Invalid Subscription\n\n{reason}\n\n{SUBSCRIBE_USAGE}")
+        return
+
+    chat_id = update.effective_chat.id
+    if len(list_subscriptions(chat_id)) >= MAX_SUBSCRIPTIONS_PER_CHAT:
+        await update.message.reply_text(
+            f"⚠️ This chat already has {MAX_SUBSCRIPTIONS_PER_CHAT} subscriptions.\n"
+            f"Remove one with /unsubscribe <id> first."
+        )
+        return
+
+    # If the time has already passed today, the first delivery is tomorrow
+    now = datetime.now(timezone.utc)
+    last_sent = now.strftime("%Y-%m-%d") if send_time <= now.strftime("%H:%M") else None
+    subscription = add_subscription(
+        chat_id, metric, tickers, asset_type, time_period, granularity, is_percentage, send_time, last_sent
+    )
+
+    title = build_chart_title(metric, tickers, time_period, granularity, is_percentage)
+    await update.message.reply_text(
+        f"✅ Subscribed to {title} every day at {send_time} UTC.\n"
+        f"ID: {subscription['id']} (use /unsubscribe {subscription['id']} to stop)"
+    )
+
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle /unsubscribe <id|all> - stop one or all of this chat's subscriptions.
+
+    Args:
+        update: Telegram update
+        context: CallbackContext
+    """
+    args = context.args or []
+    if not args:
+        await update.message.reply_text("Format: /unsubscribe <id> or /unsubscribe all")
+        return
+
+    subscription_id = None if args[0].lower() == "all" else args[0]
+    removed = remove_subscriptions(update.effective_chat.id, subscription_id)
+    if removed:
+        await update.message.reply_text(f"🗑️ Removed {removed} subscription{'s' if removed != 1 else ''}.")
+    else:
+        await update.message.reply_text("No matching subscription found. See /subscriptions.")
+
+
+async def subscriptions_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle /subscriptions - list this chat's subscriptions.
+
+    Args:
+        update: Telegram update
+        context: CallbackContext
+    """
+    subscriptions = list_subscriptions(update.effective_chat.id)
+    if not subscriptions:
+        await update.message.reply_text(f"This chat has no subscriptions.\n\n{SUBSCRIBE_USAGE}")
+        return
+
+    lines = ["📬 Subscriptions\n"]
+    for s in sorted(subscriptions, key=lambda s: s["time"]):
+        title = build_chart_title(s["metric"], s["tickers"], s["time_period"], s["granularity"], s["is_percentage"])
+        lines.append(f"• {s['time']} UTC - {title} (ID: {s['id']})")
+    await update.message.reply_text("\n".join(lines))
+
+
+async def _send_chart(bot: Bot, chat_id: int, photo: Union[str, bytes], caption: str):
+    """
+    Send a chart, waiting out Telegram flood limits.
+
+    Returns:
+        The sent message, or None if delivery failed
+    """
+    for attempt in range(2):
+        try:
+            return await bot.send_photo(chat_id=chat_id, photo=photo, caption=caption)
+        except RetryAfter as e:
+            logger.warning("Rate limited by Telegram, retrying in %ss", e.retry_after)
+            await asyncio.sleep(e.retry_after)
+        except Forbidden:
+            # The bot was blocked or removed from the chat
+            logger.info("Dropping subscriptions of unreachable chat %s", chat_id)
+            remove_subscriptions(chat_id)
+            return None
+        except TelegramError as e:
+            logger.warning("Failed to deliver subscription to %s: %s", chat_id, e)
+            return None
+    return None
+
+
+async def _deliver_chart(bot: Bot, subscriptions: List[Dict]) -> None:
+    """Render one chart and fan it out to every subscription that shares it."""
+    first = subscriptions[0]
+    url = build_chart_url(first["metric"], first["tickers"], first["asset_type"],
+                          first["time_period"], first["granularity"])
+    log_key = request_log.chart_key(first["metric"], first["tickers"], first["time_period"],
+                                    first["granularity"], first["is_percentage"])
+    result = await asyncio.to_thread(take_screenshot, url, first["is_percentage"], log_key)
+    if isinstance(result, str) and result.startswith("ERROR:"):
+        logger.warning("Subscription chart %s failed: %s", chart_key(first), result)
+        return
+
+    title = build_chart_title(first["metric"], first["tickers"], first["time_period"],
+                              first["granularity"], first["is_percentage"])
+    # Upload once, then reuse the file_id for every other chat
+    photo = photo_for(result)
+    for subscription in subscriptions:
+        sent = await _send_chart(bot, subscription["chat_id"], photo, title)
+        if sent and sent.photo and not isinstance(photo, str):
+            photo = sent.photo[-1].file_id
+            remember_file_id(result, photo)
+        await asyncio.sleep(SUBSCRIPTION_SEND_INTERVAL)
+
+
+async def deliver_due_subscriptions(bot: Bot) -> int:
+    """
+    Deliver every subscription that is due, rendering each unique chart once.
+
+    Returns:
+        Number of subscriptions processed
+    """
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    due = due_subscriptions(today, now.strftime("%H:%M"))
+    if not due:
+        return 0
+
+    groups = defaultdict(list)
+    for subscription in due:
+        groups[chart_key(subscription)].append(subscription)
+
+    for subscriptions in groups.values():
+        try:
+            await _deliver_chart(bot, subscriptions)
+        finally:
+            # Failed charts are not retried until tomorrow rather than every check
+            mark_sent([s["id"] for s in subscriptions], today)
+    return len(due)
+
+
+async def run_scheduler(bot: Bot) -> None:
+    """Check for due subscriptions forever."""
+    while True:
+        try:
+            await deliver_due_subscriptions(bot)
+        except Exception:
+            logger.exception("Subscription scheduler run failed")
+        await asyncio.sleep(SUBSCRIPTION_CHECK_INTERVAL)
+
+
+async def start_scheduler(application: Application) -> None:
+    """post_init hook that starts the subscription scheduler on the bot's event loop."""
+    application.bot_data["subscription_scheduler"] = asyncio.create_task(run_scheduler(application.bot))
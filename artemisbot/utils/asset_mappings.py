@@ -1,41 +1,91 @@
 import json
 import os
-from typing import Dict, Optional, List
-from config import ASSET_MAPPINGS_FILE
+import pickle
+from bisect import bisect_left
+from typing import Any, Dict, Optional, List, Tuple
+from config import ASSET_MAPPINGS_FILE, ASSET_MAPPINGS_SNAPSHOT
+
+# Bump when the snapshot layout changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 2
 
 # Global mappings dictionary
 MAPPINGS = {
     "artemis_id_to_symbols": {},
     "symbol_to_artemis_id": {},
     "artemis_id_to_type": {},
-    "symbol_to_type": {}
+    "symbol_to_type": {},
+    "search_index": []
 }
 
-def load_mappings() -> None:
-    """Load asset mappings from cache or API."""
-    try:
-        with open(ASSET_MAPPINGS_FILE, "r") as f:
-            raw_mappings = json.load(f)
-            
+def compile_mappings(raw_mappings: Dict[str, Any]) -> Dict[str, Dict]:
+    """Derive the lookup tables used at runtime from the raw mappings file contents."""
+    mappings = {
         # Copy all mappings directly from the file
-        MAPPINGS["artemis_id_to_symbols"] = raw_mappings.get("artemis_id_to_symbols", {})
-        MAPPINGS["artemis_id_to_type"] = raw_mappings.get("artemis_id_to_type", {})
-        
-        # Build symbol_to_artemis_id and symbol_to_type mappings
-        MAPPINGS["symbol_to_artemis_id"] = {}
-        MAPPINGS["symbol_to_type"] = {}
-        
-        for artemis_id, symbols in MAPPINGS["artemis_id_to_symbols"].items():
-            if isinstance(symbols, list):
-                for symbol in symbols:
-                    MAPPINGS["symbol_to_artemis_id"][symbol.lower()] = artemis_id
-                    MAPPINGS["symbol_to_type"][symbol.lower()] = MAPPINGS["artemis_id_to_type"].get(artemis_id, "unknown")
-            else:
-                MAPPINGS["symbol_to_artemis_id"][symbols.lower()] = artemis_id
-                MAPPINGS["symbol_to_type"][symbols.lower()] = MAPPINGS["artemis_id_to_type"].get(artemis_id, "unknown")
-            
-    except FileNotFoundError:
-        raise Exception(f"Could not find mappings file at {ASSET_MAPPINGS_FILE}")
+        "artemis_id_to_symbols": raw_mappings.get("artemis_id_to_symbols", {}),
+        "artemis_id_to_type": raw_mappings.get("artemis_id_to_type", {}),
+        "symbol_to_artemis_id": {},
+        "symbol_to_type": {}
+    }
+
+    # Build symbol_to_artemis_id and symbol_to_type mappings
+    for artemis_id, symbols in mappings["artemis_id_to_symbols"].items():
+        if not isinstance(symbols, list):
+            symbols = [symbols]
+        for symbol in symbols:
+            mappings["symbol_to_artemis_id"][symbol.lower()] = artemis_id
+            mappings["symbol_to_type"][symbol.lower()] = mappings["artemis_id_to_type"].get(artemis_id, "unknown")
+
+    # Sorted IDs and symbols for prefix search
+    mappings["search_index"] = sorted(set(mappings["artemis_id_to_symbols"]) | set(mappings["symbol_to_artemis_id"]))
+
+    return mappings
+
+def write_mappings_snapshot(mappings: Dict[str, Dict], path: str = ASSET_MAPPINGS_SNAPSHOT) -> None:
+    """
+    Write the precompiled mappings as a binary snapshot that loads much faster than the JSON file.
+
+    Args:
+        mappings: Lookup tables as returned by compile_mappings
+        path: Where to write the snapshot
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": SNAPSHOT_VERSION, "mappings": mappings}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def _load_snapshot() -> Optional[Dict[str, Dict]]:
+    """Load the binary snapshot if it exists and is at least as new as the JSON file."""
+    try:
+        if os.path.getmtime(ASSET_MAPPINGS_SNAPSHOT) < os.path.getmtime(ASSET_MAPPINGS_FILE):
+            return None
+        with open(ASSET_MAPPINGS_SNAPSHOT, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot["mappings"]
+
+def load_mappings() -> None:
+    """Load asset mappings from the precompiled snapshot, falling back to the JSON file."""
+    mappings = _load_snapshot()
+    if mappings is None:
+        try:
+            with open(ASSET_MAPPINGS_FILE, "r") as f:
+                raw_mappings = json.load(f)
+        except FileNotFoundError:
+            raise Exception(f"Could not find mappings file at {ASSET_MAPPINGS_FILE}")
+
+        mappings = compile_mappings(raw_mappings)
+
+        # Regenerate the snapshot so the next start is fast; a read-only config dir is fine
+        try:
+            write_mappings_snapshot(mappings)
+        except OSError:
+            pass
+
+    MAPPINGS.update(mappings)
 
 def get_asset_by_symbol(symbol: str) -> Optional[Dict]:
     """Get asset info by symbol."""
@@ -68,4 +118,43 @@ def get_asset_by_id(artemis_id: str) -> Optional[Dict]:
         "id": artemis_id,
         "symbol": symbol,
         "type": MAPPINGS["artemis_id_to_type"].get(artemis_id, "unknown")
-    }
\ No newline at end of file
+    }
+
+def resolve_assets(names: List[str]) -> Tuple[List[Dict], List[str]]:
+    """
+    Resolve several asset symbols or IDs in one pass, dropping duplicates.
+    
+    Args:
+        names: Symbols or Artemis IDs, in chart order
+        
+    Returns:
+        (asset info for each distinct asset, names that matched nothing)
+    """
+    if not MAPPINGS["symbol_to_artemis_id"] or not MAPPINGS["artemis_id_to_symbols"]:
+        load_mappings()
+    
+    assets = []
+    unknown = []
+    seen = set()
+    for name in names:
+        asset_info = get_asset_by_symbol(name) or get_asset_by_id(name)
+        if not asset_info:
+            unknown.append(name)
+        elif asset_info["id"] not in seen:
+            seen.add(asset_info["id"])
+            assets.append(asset_info)
+    return assets, unknown
+
+def search_assets(prefix: str, limit: int = 10) -> List[str]:
+    """Asset IDs and symbols starting with prefix, in alphabetical order."""
+    if not MAPPINGS["search_index"]:
+        load_mappings()
+        
+    prefix = prefix.lower()
+    index = MAPPINGS["search_index"]
+    matches = []
+    for i in range(bisect_left(index, prefix), len(index)):
+        if not index[i].startswith(prefix) or len(matches) >= limit:
+            break
+        matches.append(index[i])
+    return matches
@@ -0,0 +1,102 @@
+"""
+Learned (asset, metric) availability matrix.
+
+Every chart outcome for a single asset is recorded. Any successful render marks
+the metric as available for that asset, and available entries are never
+downgraded. NO_DATA for a shorter period may only mean the window is empty, so
+a metric is marked unavailable only by NO_DATA for `all` or NO_DATA in
+NO_DATA_MIN_PERIODS distinct periods. parse_command consults the matrix so
+known-empty combinations are answered immediately instead of launching a
+browser. Unavailable entries expire after NO_DATA_RECHECK seconds so assets
+that gain data are picked up again.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import AVAILABILITY_FILE, NO_DATA_MIN_PERIODS, NO_DATA_RECHECK
+
+# artemis_id -> metric -> {"available": bool, "checked": unix time}, or while NO_DATA
+# is still being confirmed {"available": None, "checked": unix time, "no_data_periods": [...]}
+AVAILABILITY: Dict[str, Dict[str, Dict]] = {}
+_LOADED = False
+_LOCK = threading.Lock()
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    try:
+        with open(AVAILABILITY_FILE, "r") as f:
+            AVAILABILITY.update(json.load(f))
+    except (FileNotFoundError, ValueError):
+        pass
+    _LOADED = True
+
+
+def _save() -> None:
+    """Write the matrix atomically so a crash never leaves a truncated file."""
+    os.makedirs(os.path.dirname(AVAILABILITY_FILE) or ".", exist_ok=True)
+    tmp_path = f"{AVAILABILITY_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(AVAILABILITY, f)
+    os.replace(tmp_path, AVAILABILITY_FILE)
+
+
+def record(artemis_id: str, metric: str, available: bool, time_period: str = "all") -> None:
+    """
+    Record whether a chart of a metric for an asset had data.
+
+    Args:
+        artemis_id: Artemis asset ID
+        metric: Metric name as used in commands
+        available: False for a NO_DATA outcome, True for a successful chart
+        time_period: Time period of the chart
+    """
+    now = time.time()
+    with _LOCK:
+        _ensure_loaded()
+        entry = AVAILABILITY.setdefault(artemis_id, {}).get(metric)
+        # Known-available entries never expire or downgrade
+        if entry is not None and entry["available"]:
+            return
+        if available:
+            AVAILABILITY[artemis_id][metric] = {"available": True, "checked": now}
+        else:
+            periods = set()
+            if entry is not None and entry["available"] is None and now - entry["checked"] < NO_DATA_RECHECK:
+                periods.update(entry["no_data_periods"])
+            periods.add(time_period)
+            if time_period == "all" or len(periods) >= NO_DATA_MIN_PERIODS:
+                # Unavailable entries are rewritten to restart their expiry
+                AVAILABILITY[artemis_id][metric] = {"available": False, "checked": now}
+            elif entry is not None and entry["available"] is False and now - entry["checked"] < NO_DATA_RECHECK:
+                return
+            else:
+                AVAILABILITY[artemis_id][metric] = {
+                    "available": None, "checked": now, "no_data_periods": sorted(periods)
+                }
+        _save()
+
+
+def is_unavailable(artemis_id: str, metric: str) -> bool:
+    """Whether the metric is known to have no data for the asset (unknown combinations are available)."""
+    with _LOCK:
+        _ensure_loaded()
+        entry = AVAILABILITY.get(artemis_id, {}).get(metric)
+    return (entry is not None and entry["available"] is False
+            and time.time() - entry["checked"] < NO_DATA_RECHECK)
+
+
+def available_metrics(artemis_id: str, candidates: Optional[List[str]] = None) -> List[str]:
+    """Metrics known to have data for an asset, in the order of `candidates` if given."""
+    with _LOCK:
+        _ensure_loaded()
+        known = [metric for metric, entry in AVAILABILITY.get(artemis_id, {}).items() if entry["available"]]
+    if candidates is None:
+        return sorted(known)
+    return [metric for metric in candidates if metric in known]
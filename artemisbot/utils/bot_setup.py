@@ -1,7 +1,12 @@
 import os
 import sys
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
-from artemisbot.handlers.message_handlers import handle_message, handle_group_message, help_command
+from telegram.ext import Application, CommandHandler, InlineQueryHandler, MessageHandler, filters
+from artemisbot.handlers.message_handlers import handle_message, help_command, stats_command, profile_command
+from artemisbot.handlers.command_filters import CHART_COMMAND
+from artemisbot.handlers.inline import inline_query, start_render_worker
+from artemisbot.handlers.subscriptions import (
+    start_scheduler, subscribe_command, subscriptions_command, unsubscribe_command
+)
 
 def setup_singleton():
     """Ensure only one instance of the bot is running."""
@@ -12,14 +17,25 @@ def setup_singleton():
     with open(lock_file, "w") as f:
         f.write(str(os.getpid()))
 
+async def start_background_tasks(application: Application) -> None:
+    """Start the subscription scheduler and the inline render worker once the bot is initialized."""
+    await start_scheduler(application)
+    await start_render_worker(application)
+
 def setup_bot():
     """Set up the bot with all handlers."""
     # Create the Application
-    application = Application.builder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+    application = Application.builder().token(os.getenv("TELEGRAM_BOT_TOKEN")).post_init(start_background_tasks).build()
     
     # Add handlers
     application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-    application.add_handler(MessageHandler(filters.TEXT & filters.ChatType.GROUPS, handle_group_message))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(CommandHandler("subscribe", subscribe_command))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+    application.add_handler(CommandHandler("subscriptions", subscriptions_command))
+    # The command grammar filter drops ordinary chatter before any handler runs
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND & CHART_COMMAND, handle_message))
+    application.add_handler(InlineQueryHandler(inline_query))
     
     return application
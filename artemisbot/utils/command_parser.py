@@ -1,36 +1,103 @@
-from typing import List, Tuple
-from artemisbot.utils.asset_mappings import get_asset_by_symbol, get_asset_by_id
+import re
+from typing import List, Optional, Tuple
+from artemisbot.utils.asset_mappings import resolve_assets
+from artemisbot.utils.availability import is_unavailable
+from config import MAX_COMPARE_ASSETS
 
-def parse_command(command_text: str, is_group: bool = False) -> Tuple[str, List[str], str, str, str, bool]:
+# Accepted command values
+VALID_METRICS = ["price", "volume", "tvl", "fees", "revenue", "mc", "txns", "daa", "dau", "fdmc"]
+VALID_PERIODS = ["1w", "mtd", "1m", "3m", "6m", "ytd", "1y", "all"]
+VALID_GRANULARITIES = ["1d", "1w", "1m"]
+
+# Separates the assets of a comparison chart: price sol,eth,btc 3m 1d
+ASSET_SEPARATOR = ","
+
+# Output modes selected by a trailing option: the chart image, a CSV file or a text summary
+OUTPUT_MODES = ["chart", "csv", "stats"]
+
+class UnavailableMetricError(ValueError):
+    """A well-formed command for a metric the asset is known to have no data for."""
+    
+    def __init__(self, message: str, metric: str, artemis_id: str):
+        super().__init__(message)
+        self.metric = metric
+        self.artemis_id = artemis_id
+
+# Prefix that addresses the bot in group chats
+GROUP_PREFIX = "=art"
+
+def compile_command_grammar(metrics: List[str], periods: List[str], granularities: List[str]) -> "re.Pattern":
+    """
+    Compile the command tables into a single regular expression.
+    
+    The pattern accepts `[=art] <metric|dash> <asset>[,<asset>...] <time_period> <granularity> [options...]`
+    and only checks the shape of a command; assets and options are validated by parse_command.
+    
+    Args:
+        metrics: Accepted metric names
+        periods: Accepted time periods
+        granularities: Accepted granularities
+        
+    Returns:
+        Compiled pattern with prefix, command, asset, time_period, granularity and options groups
+    """
+    def alternation(words: List[str]) -> str:
+        # Longest first so no alternative shadows a longer one
+        return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+    
+    return re.compile(
+        rf"\s*(?P<prefix>{re.escape(GROUP_PREFIX)}\s+)?"
+        rf"(?i:(?P<command>{alternation(metrics + ['dash'])}))\s+"
+        rf"(?P<asset>[^\s,]+(?:\s*,\s*[^\s,]+)*)\s+"
+        rf"(?i:(?P<time_period>{alternation(periods)}))\s+"
+        rf"(?i:(?P<granularity>{alternation(granularities)}))"
+        rf"(?:\s+(?P<options>.*?))?\s*\Z",
+        re.DOTALL,
+    )
+
+COMMAND_GRAMMAR = compile_command_grammar(VALID_METRICS, VALID_PERIODS, VALID_GRANULARITIES)
+
+def match_command(text: str) -> Optional["re.Match"]:
+    """Match text against the command grammar, returning None for ordinary chatter."""
+    return COMMAND_GRAMMAR.match(text)
+
+def parse_command(command_text: str, is_group: bool = False,
+                  check_availability: bool = True) -> Tuple[str, List[str], str, str, str, bool, str]:
     """
     Parse command text into its components.
     
     Args:
         command_text: The command text to parse
         is_group: Whether this is a group chat command
+        check_availability: Reject metrics the asset is known to have no data for
         
     Returns:
         Tuple containing:
         - metric: The metric to chart
-        - tickers: List of asset tickers
-        - asset_type: The type of asset
+        - tickers: Artemis IDs of the charted assets (several for a comparison)
+        - asset_type: The type of the first asset
         - time_period: The time period for the chart
         - granularity: The granularity of the data
         - is_percentage: Whether to display as percentages
+        - output_mode: "chart", "csv" or "stats"
         
     Raises:
         ValueError: If the command format is invalid
+        UnavailableMetricError: If an asset is known to have no data for the metric
     """
     # Remove any leading =art if present
     if command_text.startswith('=art'):
         command_text = command_text[4:].strip()
+    # Allow spaces around the commas of a comparison ("sol, eth")
+    command_text = re.sub(r"\s*,\s*", ASSET_SEPARATOR, command_text)
     
     parts = command_text.split()
     
     # Helper function to format error messages consistently
     def format_error(message: str) -> str:
         prefix = "=art " if is_group else ""
-        return f"{message}\n\nFormat: {prefix}<metric> <asset> <time_period> <granularity> [%]\nExample: {prefix}price solana 1w 1d"
+        return (f"{message}\n\nFormat: {prefix}<metric> <asset>[,<asset>...] <time_period> <granularity> [%] [csv|stats]\n"
+                f"Example: {prefix}price solana 1w 1d or {prefix}price sol,eth,btc 3m 1d")
     
     if len(parts) < 4:
         raise ValueError(format_error("Command must have at least 4 parts: <metric> <asset> <time_period> <granularity>"))
@@ -39,26 +106,71 @@ def parse_command(command_text: str, is_group: bool = False) -> Tuple[str, List[
     asset = parts[1].lower()
     time_period = parts[2].lower()
     granularity = parts[3].lower()
-    is_percentage = len(parts) > 4 and parts[4] == "%"
+    options = [part.lower() for part in parts[4:]]
+    is_percentage = "%" in options
+    output_mode = next((option for option in options if option in OUTPUT_MODES), "chart")
     
     # Validate metric
-    valid_metrics = ["price", "volume", "tvl", "fees", "revenue", "mc", "txns", "daa", "dau", "fdmc"]
-    if metric not in valid_metrics:
-        raise ValueError(format_error(f"Invalid metric '{metric}'. Must be one of: {', '.join(valid_metrics)}"))
+    if metric not in VALID_METRICS:
+        raise ValueError(format_error(f"Invalid metric '{metric}'. Must be one of: {', '.join(VALID_METRICS)}"))
     
     # Validate time period
-    valid_periods = ["1w", "mtd", "1m", "3m", "6m", "ytd", "1y", "all"]
-    if time_period not in valid_periods:
-        raise ValueError(format_error(f"Invalid time period '{time_period}'. Must be one of: {', '.join(valid_periods)}"))
+    if time_period not in VALID_PERIODS:
+        raise ValueError(format_error(f"Invalid time period '{time_period}'. Must be one of: {', '.join(VALID_PERIODS)}"))
     
     # Validate granularity
-    valid_granularities = ["1d", "1w", "1m"]
-    if granularity not in valid_granularities:
-        raise ValueError(format_error(f"Invalid granularity '{granularity}'. Must be one of: {', '.join(valid_granularities)}"))
+    if granularity not in VALID_GRANULARITIES:
+        raise ValueError(format_error(f"Invalid granularity '{granularity}'. Must be one of: {', '.join(VALID_GRANULARITIES)}"))
+    
+    # Resolve all assets of a comparison in one pass
+    names = [name for name in asset.split(ASSET_SEPARATOR) if name]
+    if len(names) > MAX_COMPARE_ASSETS:
+        raise ValueError(format_error(f"At most {MAX_COMPARE_ASSETS} assets can be compared in one chart"))
+    assets, unknown = resolve_assets(names)
+    if unknown:
+        raise ValueError(format_error(f"Asset{'s' if len(unknown) > 1 else ''} '{', '.join(unknown)}' not found"))
+    
+    if check_availability:
+        for asset_info in assets:
+            if is_unavailable(asset_info["id"], metric):
+                raise UnavailableMetricError(
+                    f"There is no {metric} data for {asset_info['id']}.", metric, asset_info["id"]
+                )
     
-    # Try to resolve asset
-    asset_info = get_asset_by_symbol(asset) or get_asset_by_id(asset)
-    if not asset_info:
-        raise ValueError(format_error(f"Asset '{asset}' not found"))
+    tickers = [asset_info["id"] for asset_info in assets]
+    return metric, tickers, assets[0]["type"], time_period, granularity, is_percentage, output_mode
+
+def parse_dashboard_command(command_text: str, is_group: bool = False) -> Tuple[List[str], str, str, str]:
+    """
+    Parse a dashboard command: dash <asset> <time_period> <granularity>.
+    
+    Args:
+        command_text: The command text to parse
+        is_group: Whether this is a group chat command
+        
+    Returns:
+        Tuple containing:
+        - tickers: List of asset tickers
+        - asset_type: The type of asset
+        - time_period: The time period for the charts
+        - granularity: The granularity of the data
+        
+    Raises:
+        ValueError: If the command format is invalid
+    """
+    if command_text.startswith('=art'):
+        command_text = command_text[4:].strip()
+    
+    parts = command_text.split()
+    if len(parts) < 4 or parts[0].lower() != "dash":
+        prefix = "=art " if is_group else ""
+        raise ValueError(f"Format: {prefix}dash <asset> <time_period> <granularity>\nExample: {prefix}dash solana 3m 1d")
     
-    return metric, [asset_info["id"]], asset_info["type"], time_period, granularity, is_percentage
+    # Reuse the chart grammar with a placeholder metric for validation
+    _, tickers, asset_type, time_period, granularity, _, _ = parse_command(
+        " ".join(["price"] + parts[1:4]), is_group=is_group, check_availability=False
+    )
+    if len(tickers) > 1:
+        raise ValueError("A dashboard shows a single asset. Compare assets with a metric instead, "
+                         "e.g. price sol,eth 3m 1d")
+    return tickers, asset_type, time_period, granularity
@@ -0,0 +1,56 @@
+"""
+In-process metrics: counters, gauges and collectors that are read on demand.
+
+Modules record what they do with incr/set_gauge, or register a collector that
+computes gauges when a snapshot is taken. Admins can view the snapshot with /stats.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+COUNTERS: Dict[str, float] = defaultdict(float)
+GAUGES: Dict[str, float] = {}
+_COLLECTORS: List[Callable[[], Dict[str, float]]] = []
+_LOCK = threading.Lock()
+
+
+def incr(name: str, amount: float = 1) -> None:
+    """Increase a counter."""
+    with _LOCK:
+        COUNTERS[name] += amount
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Set a gauge to its current value."""
+    GAUGES[name] = value
+
+
+def register_collector(collector: Callable[[], Dict[str, float]]) -> None:
+    """Register a function returning gauges that are computed at snapshot time."""
+    _COLLECTORS.append(collector)
+
+
+def snapshot() -> Dict[str, float]:
+    """All counters and gauges, including those produced by collectors."""
+    with _LOCK:
+        values = dict(COUNTERS)
+    values.update(GAUGES)
+    for collector in _COLLECTORS:
+        try:
+            values.update(collector())
+        except Exception:
+            continue
+    return values
+
+
+def format_report() -> str:
+    """Render the current snapshot as sorted `name: value` lines."""
+    values = snapshot()
+    if not values:
+        return "No metrics recorded yet."
+    lines = []
+    for name in sorted(values):
+        value = values[name]
+        lines.append(f"{name}: {value:g}" if isinstance(value, (int, float)) else f"{name}: {value}")
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""
+On-demand profiling of the live bot.
+
+A profiling session is started by an admin (/profile) or by SIGUSR1 and covers
+the next N chart requests or T seconds, whichever comes first. While it runs:
+
+- functions decorated with `profiled`/`profiled_request` are run under cProfile
+  (per call and per thread, since renders happen in worker threads),
+- tracemalloc records allocations,
+- a sampler thread records the stacks of every thread for flamegraphs.
+
+When the session ends the results are written to PROFILE_DIR as a .pstats file
+(load with `python -m pstats` or snakeviz), a .collapsed file (feed to
+flamegraph.pl or speedscope) and a .txt summary.
+"""
+
+import asyncio
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_SIGNAL_SECONDS, PROFILE_TOP_FUNCTIONS
+
+logger = logging.getLogger(__name__)
+
+_SESSION: Optional["ProfileSession"] = None
+_SESSION_LOCK = threading.Lock()
+# Set while a profiled call runs in a thread, so nested profiled calls are folded into it
+_THREAD_STATE = threading.local()
+
+
+class ProfileSession:
+    """State of one profiling session."""
+
+    def __init__(self, max_requests: Optional[int], duration: float):
+        self.max_requests = max_requests
+        self.duration = duration
+        self.requests = 0
+        self.started = time.time()
+        self.profiles: List[cProfile.Profile] = []
+        self.samples: Counter = Counter()
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(10)
+        self._memory_start = tracemalloc.take_snapshot()
+        self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self.profiles.append(profile)
+
+    def request_done(self) -> None:
+        """Count a finished chart request, ending the session at max_requests."""
+        with self._lock:
+            self.requests += 1
+            if self.max_requests and self.requests >= self.max_requests:
+                self.finished.set()
+
+    def _sample(self) -> None:
+        """Record the stack of every other thread until the session ends."""
+        own_id = threading.get_ident()
+        deadline = self.started + self.duration
+        while not self.finished.is_set():
+            if time.time() >= deadline:
+                self.finished.set()
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                    stack.append(f"{module}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+
+    def stop(self) -> Tuple[str, List[str]]:
+        """
+        Stop profiling and write the results.
+
+        Returns:
+            (summary text, paths of the written files)
+        """
+        self.finished.set()
+        self._sampler.join()
+        memory_end = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S", time.gmtime(self.started)))
+        paths = []
+
+        lines = [
+            f"Duration: {time.time() - self.started:.1f}s, chart requests: {self.requests}, "
+            f"profiled calls: {len(self.profiles)}, stack samples: {sum(self.samples.values())}"
+        ]
+
+        if self.profiles:
+            stats = pstats.Stats(self.profiles[0])
+            for profile in self.profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(f"{base}.pstats")
+            paths.append(f"{base}.pstats")
+            lines.append("")
+            lines.append(f"Top {PROFILE_TOP_FUNCTIONS} functions by cumulative time:")
+            lines.extend(_top_functions(stats, PROFILE_TOP_FUNCTIONS))
+
+        with open(f"{base}.collapsed", "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        paths.append(f"{base}.collapsed")
+
+        lines.append("")
+        lines.append("Top allocations since start:")
+        for stat in memory_end.compare_to(self._memory_start, "lineno")[:5]:
+            frame = stat.traceback[0]
+            lines.append(f"  {os.path.basename(frame.filename)}:{frame.lineno} "
+                         f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)")
+
+        summary = "\n".join(lines)
+        with open(f"{base}.txt", "w") as f:
+            f.write(summary + "\n")
+        paths.append(f"{base}.txt")
+        return summary, paths
+
+
+def _top_functions(stats: pstats.Stats, limit: int) -> List[str]:
+    """One line per function: cumulative seconds, total seconds, calls and location."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    lines = []
+    for (filename, lineno, name), (_, calls, total, cumulative, _) in rows:
+        location = f"{os.path.basename(filename)}:{lineno}" if lineno else filename
+        lines.append(f"  {cumulative:7.3f}s cum {total:7.3f}s own {calls:6d}x  {name} ({location})")
+    return lines
+
+
+def start_session(max_requests: Optional[int], duration: float) -> bool:
+    """
+    Start a profiling session.
+
+    Args:
+        max_requests: End after this many chart requests (None for time only)
+        duration: End after this many seconds at the latest
+
+    Returns:
+        False if a session is already running
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            return False
+        _SESSION = ProfileSession(max_requests, duration)
+    logger.info("Profiling started (requests=%s, seconds=%s)", max_requests, duration)
+    return True
+
+
+def stop_session() -> Optional[Tuple[str, List[str]]]:
+    """Stop the running session and write its results; None if no session is running."""
+    global _SESSION
+    with _SESSION_LOCK:
+        session, _SESSION = _SESSION, None
+    if session is None:
+        return None
+    summary, paths = session.stop()
+    logger.info("Profiling finished, wrote %s\n%s", ", ".join(paths), summary)
+    return summary, paths
+
+
+def wait_for_session(timeout: float) -> None:
+    """Block until the running session reaches its request or time limit."""
+    session = _SESSION
+    if session is not None:
+        session.finished.wait(timeout)
+
+
+async def run_session(max_requests: Optional[int], duration: float) -> Optional[Tuple[str, List[str]]]:
+    """Start a session, wait for it to end and return its results (None if one was already running)."""
+    if not start_session(max_requests, duration):
+        return None
+    await asyncio.to_thread(wait_for_session, duration)
+    return stop_session()
+
+
+def handle_profile_signal(signum, frame) -> None:
+    """SIGUSR1 handler: profile for PROFILE_SIGNAL_SECONDS and write the results to PROFILE_DIR."""
+    def run():
+        if start_session(None, PROFILE_SIGNAL_SECONDS):
+            wait_for_session(PROFILE_SIGNAL_SECONDS)
+            stop_session()
+
+    threading.Thread(target=run, name="profile-signal", daemon=True).start()
+
+
+def _call_profiled(session: ProfileSession, func, args, kwargs):
+    profile = cProfile.Profile()
+    _THREAD_STATE.active = True
+    profile.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profile.disable()
+        _THREAD_STATE.active = False
+        session.add_profile(profile)
+
+
+def profiled(func):
+    """Run a function under cProfile while a session is active (nested calls fold into the outer one)."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _SESSION
+        if session is None or getattr(_THREAD_STATE, "active", False):
+            return func(*args, **kwargs)
+        return _call_profiled(session, func, args, kwargs)
+    return wrapper
+
+
+def profiled_request(func):
+    """
+    Like `profiled` for the coroutine handling a chart request, which also counts towards the session limit.
+
+    The profiler stays enabled across awaits, so other coroutines running on the event loop
+    meanwhile are attributed to this request as well.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        session = _SESSION
+        if session is None:
+            return await func(*args, **kwargs)
+        if getattr(_THREAD_STATE, "active", False):
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                session.request_done()
+
+        profile = cProfile.Profile()
+        _THREAD_STATE.active = True
+        profile.enable()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            profile.disable()
+            _THREAD_STATE.active = False
+            session.add_profile(profile)
+            session.request_done()
+    return wrapper
@@ -0,0 +1,88 @@
+"""
+Compact log of chart requests for offline cache tuning.
+
+Every chart image request appends one JSON line to REQUEST_LOG_FILE (rotated
+at REQUEST_LOG_MAX_BYTES, REQUEST_LOG_BACKUPS files kept). Chat commands,
+dashboard panels, subscriptions and inline queries are all logged, since they
+share one cache:
+
+    {"ts": 1718000000.0, "key": "price:solana,ethereum:3m:1d:%", "outcome": "miss",
+     "status": "ok", "render_ms": 8123, "bytes": 84211}
+
+Only the canonical chart key is recorded, never users, chats or message text.
+simulate_cache.py replays these files against candidate cache policies.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+
+from config import REQUEST_LOG_BACKUPS, REQUEST_LOG_FILE, REQUEST_LOG_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Cache outcomes
+HIT = "hit"
+MISS = "miss"
+NEGATIVE_HIT = "negative_hit"
+
+_WRITER: Optional[logging.Logger] = None
+_LOCK = threading.Lock()
+
+
+def chart_key(metric: str, tickers: List[str], time_period: str, granularity: str, is_percentage: bool) -> str:
+    """Canonical key of a chart: metric:asset[,asset...]:time_period:granularity[:%]."""
+    key = f"{metric}:{','.join(tickers)}:{time_period}:{granularity}"
+    return key + ":%" if is_percentage else key
+
+
+def _writer() -> Optional[logging.Logger]:
+    """The logger writing the request log, created on first use (None when disabled or unwritable)."""
+    global _WRITER
+    if _WRITER is not None or not REQUEST_LOG_FILE:
+        return _WRITER
+    with _LOCK:
+        if _WRITER is None:
+            try:
+                directory = os.path.dirname(REQUEST_LOG_FILE)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(REQUEST_LOG_FILE, maxBytes=REQUEST_LOG_MAX_BYTES,
+                                              backupCount=REQUEST_LOG_BACKUPS)
+            except OSError as e:
+                logger.warning("Request log disabled: %s", e)
+                return None
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            writer = logging.getLogger("artemisbot.request_log.records")
+            writer.setLevel(logging.INFO)
+            writer.propagate = False
+            writer.addHandler(handler)
+            _WRITER = writer
+    return _WRITER
+
+
+def record(key: str, outcome: str, status: str = "ok", render_ms: Optional[float] = None,
+           size: Optional[int] = None) -> None:
+    """
+    Append one chart request to the request log.
+
+    Args:
+        key: Canonical chart key (see chart_key)
+        outcome: Cache outcome: hit, miss or negative_hit
+        status: "ok" or the error code of a failed request
+        render_ms: Time spent producing the chart on a miss
+        size: Size of the chart image in bytes
+    """
+    writer = _writer()
+    if writer is None:
+        return
+    entry = {"ts": round(time.time(), 3), "key": key, "outcome": outcome, "status": status}
+    if render_ms is not None:
+        entry["render_ms"] = round(render_ms)
+    if size is not None:
+        entry["bytes"] = size
+    writer.info(json.dumps(entry, separators=(",", ":")))
@@ -0,0 +1,38 @@
+"""Startup timing: how long each boot phase takes and how long until the first reply."""
+
+import time
+from typing import List, Optional, Tuple
+
+_START = time.perf_counter()
+_LAST_MARK = _START
+_PHASES: List[Tuple[str, float]] = []
+_FIRST_REPLY: Optional[float] = None
+
+
+def mark(phase: str) -> None:
+    """Record that a boot phase has just finished."""
+    global _LAST_MARK
+    now = time.perf_counter()
+    _PHASES.append((phase, now - _LAST_MARK))
+    _LAST_MARK = now
+
+
+def report() -> str:
+    """Format the boot phases recorded so far as a one-line report."""
+    total = (_LAST_MARK - _START) * 1000
+    phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in _PHASES)
+    return f"Startup took {total:.0f}ms ({phases})"
+
+
+def record_first_reply() -> Optional[float]:
+    """
+    Record the first reply sent by this process.
+
+    Returns:
+        Seconds from process start to the first reply, only on the first call
+    """
+    global _FIRST_REPLY
+    if _FIRST_REPLY is not None:
+        return None
+    _FIRST_REPLY = time.perf_counter() - _START
+    return _FIRST_REPLY
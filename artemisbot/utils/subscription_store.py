@@ -0,0 +1,131 @@
+"""Persistent store for scheduled chart subscriptions."""
+
+import json
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+from config import SUBSCRIPTIONS_FILE
+
+# Loaded lazily from SUBSCRIPTIONS_FILE
+SUBSCRIPTIONS: List[Dict] = []
+_LOADED = False
+_LOCK = threading.Lock()
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    try:
+        with open(SUBSCRIPTIONS_FILE, "r") as f:
+            SUBSCRIPTIONS[:] = json.load(f)
+    except FileNotFoundError:
+        SUBSCRIPTIONS[:] = []
+    _LOADED = True
+
+
+def _save() -> None:
+    """Write the store atomically so a crash never leaves a truncated file."""
+    os.makedirs(os.path.dirname(SUBSCRIPTIONS_FILE) or ".", exist_ok=True)
+    tmp_path = f"{SUBSCRIPTIONS_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(SUBSCRIPTIONS, f, indent=2)
+    os.replace(tmp_path, SUBSCRIPTIONS_FILE)
+
+
+def chart_key(subscription: Dict) -> tuple:
+    """Key identifying the chart a subscription receives; equal keys share one render."""
+    return (
+        subscription["metric"],
+        tuple(subscription["tickers"]),
+        subscription["time_period"],
+        subscription["granularity"],
+        subscription["is_percentage"],
+    )
+
+
+def add_subscription(chat_id: int, metric: str, tickers: List[str], asset_type: str,
+                     time_period: str, granularity: str, is_percentage: bool, send_time: str,
+                     last_sent: Optional[str] = None) -> Dict:
+    """
+    Create a subscription delivering a chart to a chat every day.
+
+    Args:
+        chat_id: Telegram chat to deliver to
+        metric, tickers, asset_type, time_period, granularity, is_percentage: The chart
+        send_time: Daily delivery time as HH:MM (UTC)
+        last_sent: Date (YYYY-MM-DD) to treat as already delivered, e.g. today if send_time has passed
+
+    Returns:
+        The stored subscription
+    """
+    subscription = {
+        "id": uuid.uuid4().hex[:8],
+        "chat_id": chat_id,
+        "metric": metric,
+        "tickers": list(tickers),
+        "asset_type": asset_type,
+        "time_period": time_period,
+        "granularity": granularity,
+        "is_percentage": is_percentage,
+        "time": send_time,
+        "last_sent": last_sent,
+    }
+    with _LOCK:
+        _ensure_loaded()
+        SUBSCRIPTIONS.append(subscription)
+        _save()
+    return subscription
+
+
+def list_subscriptions(chat_id: Optional[int] = None) -> List[Dict]:
+    """All subscriptions, or only those of one chat."""
+    with _LOCK:
+        _ensure_loaded()
+        return [dict(s) for s in SUBSCRIPTIONS if chat_id is None or s["chat_id"] == chat_id]
+
+
+def remove_subscriptions(chat_id: int, subscription_id: Optional[str] = None) -> int:
+    """
+    Remove one subscription of a chat, or all of them when no ID is given.
+
+    Returns:
+        Number of subscriptions removed
+    """
+    with _LOCK:
+        _ensure_loaded()
+        keep = [
+            s for s in SUBSCRIPTIONS
+            if s["chat_id"] != chat_id or (subscription_id is not None and s["id"] != subscription_id)
+        ]
+        removed = len(SUBSCRIPTIONS) - len(keep)
+        if removed:
+            SUBSCRIPTIONS[:] = keep
+            _save()
+        return removed
+
+
+def due_subscriptions(today: str, now_time: str) -> List[Dict]:
+    """
+    Subscriptions whose delivery time has passed today and that were not sent yet.
+
+    Args:
+        today: Current date as YYYY-MM-DD
+        now_time: Current time as HH:MM
+    """
+    with _LOCK:
+        _ensure_loaded()
+        return [dict(s) for s in SUBSCRIPTIONS if s["time"] <= now_time and s.get("last_sent") != today]
+
+
+def mark_sent(subscription_ids: List[str], today: str) -> None:
+    """Record that subscriptions were delivered today."""
+    ids = set(subscription_ids)
+    with _LOCK:
+        _ensure_loaded()
+        for subscription in SUBSCRIPTIONS:
+            if subscription["id"] in ids:
+                subscription["last_sent"] = today
+        _save()
@@ -0,0 +1,98 @@
+"""
+Benchmark: latency and output size of the two capture modes.
+
+Chrome is replaced by synthetic inputs of the same chart so the numbers only
+reflect the capture step:
+
+- screenshot: full-viewport PNG -> PIL decode -> crop -> re-encode (the fallback path)
+- clipped: Chrome encodes the chart region itself (decoding the CDP payload only)
+- svg@<scale>: a Highcharts-like SVG export rasterized by SVG_RASTERIZER in a subprocess
+
+The svg rows are skipped when SVG_RASTERIZER (rsvg-convert) is not installed.
+Pass a chart URL to also time real take_screenshot() calls in both modes (requires Chrome).
+
+Usage:
+    python benchmarks/bench_capture_modes.py [chart_url]
+"""
+
+import base64
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_render_memory import CHART_BOX, VIEWPORT, legacy_pipeline, synthetic_png  # noqa: E402
+
+from artemisbot.chart import screenshot, svg_export  # noqa: E402
+
+ROUNDS = 10
+SCALES = (1.0, 1.5, 2.0)
+
+
+def synthetic_svg(width: int, height: int, points: int = 500) -> str:
+    """An SVG shaped like a getSVG export: axes, grid lines, labels and one long series path."""
+    grid = "".join(
+        f'<path d="M 60 {y} L {width - 20} {y}" stroke="#e6e6e6" stroke-width="1"/>'
+        f'<text x="50" y="{y + 4}" text-anchor="end" font-size="11" fill="#666">{y}</text>'
+        for y in range(40, height - 40, 50)
+    )
+    step = (width - 80) / points
+    path = " ".join(
+        f"{'M' if i == 0 else 'L'} {60 + i * step:.1f} {height / 2 + 0.4 * height * (((i * 7919) % 97 - 48) / 96):.1f}"
+        for i in range(points)
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}"><rect width="{width}" height="{height}" fill="#ffffff"/>'
+        f'{grid}<path d="{path}" fill="none" stroke="#286edc" stroke-width="2"/>'
+        f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="16">Price</text></svg>'
+    )
+
+
+def run(label, func, *args):
+    timings = []
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    if not isinstance(result, bytes):
+        print(f"{label:<22} failed: {result!r}")
+        return
+    print(f"{label:<22} median {statistics.median(timings) * 1000:7.1f} ms   "
+          f"max {max(timings) * 1000:7.1f} ms   output {len(result) / 1024:7.1f} KiB")
+
+
+def main():
+    width, height = CHART_BOX[2] - CHART_BOX[0], CHART_BOX[3] - CHART_BOX[1]
+    full_png = synthetic_png(VIEWPORT, CHART_BOX)
+    chart_png = synthetic_png((width, height))
+    payload = base64.b64encode(chart_png).decode()
+
+    run("screenshot (crop)", legacy_pipeline, full_png, {})
+    run("clipped (CDP)", base64.b64decode, payload)
+
+    svg = synthetic_svg(width, height)
+    print(f"{'svg export':<22} {len(svg) / 1024:7.1f} KiB of markup")
+    if svg_export.rasterizer_available():
+        for scale in SCALES:
+            run(f"svg@{scale}", svg_export.rasterize, svg, scale)
+    else:
+        print(f"{'svg':<22} skipped: {svg_export.SVG_RASTERIZER} is not installed")
+
+    if len(sys.argv) > 1:
+        screenshot._render_engine()  # import the configured engine so its mode can be switched too
+        url = sys.argv[1]
+        engine = sys.modules.get("artemisbot.chart.cdp_engine")
+        for mode in ("screenshot", "svg"):
+            screenshot.CAPTURE_MODE = mode
+            if engine is not None:
+                engine.CAPTURE_MODE = mode
+            # Bypass the screenshot cache so every round renders
+            run(f"live ({mode})", lambda: screenshot._render_screenshot(url, False, "bench", "bench"))
+
+
+if __name__ == "__main__":
+    main()
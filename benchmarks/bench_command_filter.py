@@ -0,0 +1,106 @@
+"""
+Benchmark: rejecting group chatter before handler dispatch.
+
+Replays a synthetic group stream (mostly ordinary chatter, a few commands)
+through Application.process_update with two handler setups: the old TEXT-only
+filter, whose callback runs the per-message pre-check, and the compiled command
+grammar filter, whose callback only runs for commands. Parsing and rendering are excluded from both.
+
+Usage:
+    python benchmarks/bench_command_filter.py [messages] [command_ratio]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Chat, Message, Update  # noqa: E402
+from telegram.ext import Application, MessageHandler, filters  # noqa: E402
+
+from artemisbot.handlers.command_filters import CHART_COMMAND  # noqa: E402
+
+CHATTER = [
+    "gm", "wen moon", "price is pumping hard today", "anyone looking at sol fees this week?",
+    "lol", "that tvl chart from yesterday was wild", "I think 1w is too short, use 1m",
+    "fees on eth are down again", "https://app.artemis.xyz/project/solana", "ngmi",
+    "volume looks thin on the weekend", "did someone try the dash command?",
+]
+COMMANDS = [
+    "=art price solana 1w 1d", "=art fees ethereum 3m 1w %", "=art dash sol 1m 1d",
+    "price bitcoin ytd 1d", "tvl aave 6m 1w csv",
+]
+
+
+def legacy_precheck(text: str) -> bool:
+    """The handlers' old pre-check: split and rebuild the metric list per message."""
+    if text.startswith("=art"):
+        text = text[4:].strip()
+    parts = text.split()
+    valid_metrics = ["price", "volume", "tvl", "fees", "revenue", "mc", "txns", "daa", "dau", "fdmc"]
+    if len(parts) >= 4 and parts[0].lower() == "dash":
+        return True
+    return len(parts) >= 4 and parts[0].lower() in valid_metrics
+
+
+async def legacy_callback(update, context):
+    legacy_precheck(update.message.text.strip())
+
+
+async def grammar_callback(update, context):
+    pass
+
+
+async def dispatch(handlers, updates) -> float:
+    """Feed every update through Application.process_update, as polling does."""
+    application = Application.builder().token("123456:benchmark").build()
+    for handler in handlers:
+        application.add_handler(handler)
+    # initialize() calls getMe over the network; nothing else it sets up is needed here
+    application._initialized = True
+    start = timeit.default_timer()
+    for update in updates:
+        await application.process_update(update)
+    return timeit.default_timer() - start
+
+
+def time_dispatch(handlers, updates) -> float:
+    return min(asyncio.run(dispatch(handlers, updates)) for _ in range(5))
+
+
+def build_stream(count: int, command_ratio: float):
+    rng = random.Random(42)
+    chat = Chat(id=-100, type=Chat.SUPERGROUP)
+    now = datetime.now(timezone.utc)
+    updates = []
+    for i in range(count):
+        text = rng.choice(COMMANDS) if rng.random() < command_ratio else rng.choice(CHATTER)
+        updates.append(Update(i, message=Message(i, now, chat, text=text)))
+    return updates
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    command_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    updates = build_stream(count, command_ratio)
+    legacy_handlers = [
+        MessageHandler(filters.TEXT & ~filters.COMMAND, legacy_callback),
+    ]
+    grammar_handlers = [
+        MessageHandler(filters.TEXT & ~filters.COMMAND & CHART_COMMAND, grammar_callback),
+    ]
+    legacy = time_dispatch(legacy_handlers, updates)
+    grammar = time_dispatch(grammar_handlers, updates)
+    callbacks = sum(bool(CHART_COMMAND.check_update(u)) for u in updates)
+
+    print(f"messages: {count}, command ratio: {command_ratio:.1%}")
+    print(f"TEXT filter + pre-check: {legacy / count * 1e6:6.2f} us/message, {count} callbacks")
+    print(f"command grammar filter:  {grammar / count * 1e6:6.2f} us/message, {callbacks} callbacks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: peak Python memory per render on the capture-to-upload path.
+
+Chrome is replaced by a synthetic 1920x1080 chart screenshot so the numbers
+only reflect what the bot does with the image:
+
+- legacy: full-viewport PNG -> PIL decode -> crop -> BytesIO re-encode -> cache copy
+- clipped: Chrome returns only the chart region (base64 over CDP) -> decoded
+  once -> stored in the blob store and sent from that same buffer
+
+Pass a chart URL to also measure a real take_screenshot() call (requires Chrome).
+
+Usage:
+    python benchmarks/bench_render_memory.py [chart_url]
+"""
+
+import base64
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from artemisbot.chart import blob_store  # noqa: E402
+
+VIEWPORT = (1920, 1080)
+CHART_BOX = (160, 200, 1760, 900)
+
+
+def synthetic_png(size, box=None) -> bytes:
+    """A noisy line chart, so PNG compression behaves like a real render."""
+    # Faint noise stands in for anti-aliased text and gradients
+    noise = Image.effect_noise(size, 6).convert("RGB")
+    image = Image.blend(Image.new("RGB", size, "white"), noise, 0.05)
+    draw = ImageDraw.Draw(image)
+    left, top, right, bottom = box or (0, 0) + size
+    points = [(x, top + (bottom - top) * (0.5 + 0.4 * ((x * 7919) % 97 - 48) / 48))
+              for x in range(left, right, 3)]
+    draw.line(points, fill=(40, 110, 220), width=2)
+    for y in range(top, bottom, 50):
+        draw.line([(left, y), (right, y)], fill=(230, 230, 230))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def legacy_pipeline(screenshot_png: bytes, cache: dict) -> bytes:
+    image = Image.open(io.BytesIO(screenshot_png))
+    cropped_image = image.crop(CHART_BOX)
+    output = io.BytesIO()
+    cropped_image.save(output, format="PNG", optimize=True)
+    cache["chart"] = (time.time(), output.getvalue())
+    return cache["chart"][1]
+
+
+def clipped_pipeline(cdp_response: dict) -> bytes:
+    data = base64.b64decode(cdp_response.pop("data"))
+    digest = blob_store.put(data)
+    return blob_store.BLOBS.get(digest, data)
+
+
+def measure(label, func, *args):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    size = len(result) if isinstance(result, bytes) else 0
+    print(f"{label:<28} peak {peak / 1024:9.1f} KiB   {elapsed * 1000:7.1f} ms   output {size / 1024:7.1f} KiB")
+
+
+def main():
+    full_png = synthetic_png(VIEWPORT)
+    chart_png = synthetic_png((CHART_BOX[2] - CHART_BOX[0], CHART_BOX[3] - CHART_BOX[1]))
+
+    measure("legacy (crop + re-encode)", legacy_pipeline, full_png, {})
+    crop_pixels = (CHART_BOX[2] - CHART_BOX[0]) * (CHART_BOX[3] - CHART_BOX[1])
+    decoded = (VIEWPORT[0] * VIEWPORT[1] + crop_pixels) * 4
+    print(f"{'':<28} + {decoded / 1024:7.1f} KiB of decoded pixels allocated by Pillow (not seen by tracemalloc)")
+    measure("clipped (CDP + blob store)", clipped_pipeline, {"data": base64.b64encode(chart_png).decode()})
+
+    if len(sys.argv) > 1:
+        from artemisbot.chart.screenshot import take_screenshot
+        measure("take_screenshot (live)", take_screenshot, sys.argv[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 """Configuration settings and constants for the Artemis Telegram Bot."""
 
+import logging
 import os
-from typing import Dict, Any, Final
+from typing import Dict, Any, Final, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,12 +22,117 @@ CHART_TIMEOUT = 10  # seconds
 CHART_WINDOW_SIZE = (1920, 1080)
 CHART_RENDER_DELAY = 2  # seconds
 
+# Render profiles: how a chart page is prepared before capture, selected per deployment with RENDER_PROFILE.
+# "app" renders the whole chart builder at CHART_WINDOW_SIZE and crops the chart out of it.
+# "chart" hides the app chrome, turns animations off and stretches the largest chart over a viewport
+# of the output size, so every capture is exactly `viewport` pixels.
+RENDER_PROFILES: Dict[str, Dict[str, Any]] = {
+    "app": {
+        "viewport": CHART_WINDOW_SIZE,
+        "chart_only": False,
+        "animations": True,
+        "hide_selectors": [],
+        "settle_seconds": 1.0,  # wait after the chart appears, for animations to finish
+    },
+    "chart": {
+        "viewport": (1200, 675),
+        "chart_only": True,
+        "animations": False,
+        "hide_selectors": ["nav", "header", "footer", "aside", "[role='navigation']", "[role='banner']",
+                           "[role='complementary']", "[role='dialog']"],
+        "settle_seconds": 0.2,
+    },
+}
+RENDER_PROFILE = os.getenv("RENDER_PROFILE", "app").lower()
+
+
+def parse_viewport(value: str) -> Optional[Tuple[int, int]]:
+    """Parse a "WIDTHxHEIGHT" viewport, or return None (with a warning if it is malformed)."""
+    if not value:
+        return None
+    width, separator, height = value.lower().partition("x")
+    try:
+        size = (int(width), int(height))
+    except ValueError:
+        size = None
+    if not separator or size is None or min(size) <= 0:
+        logging.getLogger(__name__).warning("Ignoring malformed RENDER_VIEWPORT %r (expected WIDTHxHEIGHT)", value)
+        return None
+    return size
+
+
+# (width, height) overriding the profile's viewport, from RENDER_VIEWPORT="WIDTHxHEIGHT"
+RENDER_VIEWPORT = parse_viewport(os.getenv("RENDER_VIEWPORT", ""))
+
+# Seconds rendered charts and extracted chart data are served from cache
+CACHE_DURATION = 300
+
+# Image dedup configuration: also share blobs between visually identical images
+PERCEPTUAL_DEDUP = os.getenv("PERCEPTUAL_DEDUP", "false").lower() in ("1", "true", "yes")
+PERCEPTUAL_HASH_SIZE = 16  # difference hash is PERCEPTUAL_HASH_SIZE**2 bits
+# Keep rendered charts on disk instead of in memory and stream uploads from there (empty to disable)
+BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", "")
+
+# Comparison charts: `price sol,eth,btc 3m 1d` charts several assets in one render
+MAX_COMPARE_ASSETS = 5
+SERIES_COLORS = ["#8A88FF", "#FF9F43", "#2ECC71", "#FF6B81", "#48DBFB", "#F368E0", "#FECA57", "#A5B1C2"]
+
+# Dashboard configuration: metrics rendered by `dash <asset> <time_period> <granularity>`
+DASHBOARD_METRICS = ["price", "mc", "volume", "fees", "revenue", "tvl"]
+DASHBOARD_COLUMNS = 2
+DASHBOARD_PANEL_SIZE = (960, 540)  # width, height of each grid cell
+
+# Subscription configuration
+SUBSCRIPTIONS_FILE = os.getenv("SUBSCRIPTIONS_FILE", "data/subscriptions.json")
+SUBSCRIPTION_CHECK_INTERVAL = 30  # seconds between scheduler runs
+SUBSCRIPTION_SEND_INTERVAL = 0.05  # seconds between sends, keeps us under Telegram's ~30 msg/s limit
+MAX_SUBSCRIPTIONS_PER_CHAT = 20
+
+# Charts without data: learned (asset, metric) availability and a negative result cache
+AVAILABILITY_FILE = os.getenv("AVAILABILITY_FILE", "data/availability.json")
+NO_DATA_RECHECK = 24 * 3600  # seconds before a known-empty (asset, metric) is tried again
+NO_DATA_MIN_PERIODS = 3  # distinct time periods with NO_DATA before a metric is known-empty (an `all` NO_DATA suffices)
+NEGATIVE_CACHE_DURATION = 3600  # seconds a NO_DATA chart URL is answered without rendering
+
+# Request log: one JSON line per chart request (no user or chat data), replayed by simulate_cache.py
+REQUEST_LOG_FILE = os.getenv("REQUEST_LOG_FILE", "logs/chart_requests.jsonl")  # empty to disable
+REQUEST_LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate after this size
+REQUEST_LOG_BACKUPS = 5  # rotated files kept
+
+# Inline mode configuration
+# Private chat/channel the bot uploads background renders to, to obtain file_ids for inline answers
+INLINE_CACHE_CHAT_ID = os.getenv("INLINE_CACHE_CHAT_ID")
+INLINE_MAX_RESULTS = 10
+INLINE_RENDER_QUEUE_SIZE = 50
+
+# Upstream health: adaptive per-stage timeouts and circuit breaker
+STAGE_TIMEOUT_DEFAULT = 5  # seconds, used until enough latency samples exist
+STAGE_TIMEOUT_MIN = 3  # seconds
+STAGE_TIMEOUT_MAX = 20  # seconds
+STAGE_TIMEOUT_PERCENTILE = 0.95
+STAGE_TIMEOUT_FACTOR = 2.0  # timeout = percentile latency * factor
+BREAKER_WINDOW = 120  # seconds of render outcomes considered
+BREAKER_MIN_REQUESTS = 5  # renders in the window before the breaker may open
+BREAKER_ERROR_RATE = 0.5  # open when at least this fraction of renders fail
+BREAKER_COOLDOWN = 60  # seconds before probing the upstream site again
+
 # Asset configuration
 ASSET_MAPPINGS_FILE = "config/artemis_mappings.json"
+ASSET_MAPPINGS_SNAPSHOT = "config/artemis_mappings.pickle"  # precompiled by update_mappings.py
 
 # Bot configuration
 TOKEN: Final = os.getenv("TELEGRAM_TOKEN")
 BOT_USERNAME: Final = "@artemis_chartbot"
+# Telegram user IDs allowed to use admin commands (comma separated)
+ADMIN_USER_IDS = {int(uid) for uid in os.getenv("ADMIN_USER_IDS", "").split(",") if uid.strip()}
+
+# On-demand profiling (/profile and SIGUSR1)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # where .pstats/.collapsed/.txt results are written
+PROFILE_DEFAULT_REQUESTS = 10  # chart requests covered by a plain /profile
+PROFILE_MAX_SECONDS = 300  # upper bound on any session
+PROFILE_SIGNAL_SECONDS = 30  # session length when triggered by SIGUSR1
+PROFILE_SAMPLE_INTERVAL = 0.01  # seconds between stack samples
+PROFILE_TOP_FUNCTIONS = 15  # functions listed in the summary
 
 # Artemis URL constants
 BASE_URL = "https://app.artemis.xyz/chart-builder/"
@@ -62,6 +168,29 @@ GRANULARITY_MAP: Dict[str, str] = {
     "1m": "MONTHLY"
 }
 
+# Lookback window in days for each time period (mtd, ytd and all are calendar based)
+PERIOD_WINDOW_DAYS: Dict[str, int] = {
+    "1w": 7,
+    "1m": 30,
+    "3m": 90,
+    "6m": 180,
+    "1y": 365
+}
+
+# How daily values are combined when resampling to a coarser granularity
+# ("last" for levels, "mean" for daily averages, anything else is summed)
+METRIC_AGGREGATION: Dict[str, str] = {
+    "price": "last",
+    "mc": "last",
+    "fdmc": "last",
+    "tvl": "last",
+    "dau": "mean",
+    "daa": "mean"
+}
+
+# How long a daily series stays in the series cache
+SERIES_CACHE_DURATION = 900  # seconds
+
 # Asset type mapping
 ASSET_TYPE_MAP: Dict[str, str] = {
     "CHAIN": "CHAIN",
@@ -89,3 +218,25 @@ METRIC_MAP: Dict[str, str] = {
 
 # Selenium configuration
 SELENIUM_TIMEOUT = 30  # seconds
+
+# Render engine: "selenium" (WebDriver via chromedriver) or "cdp" (async DevTools protocol)
+RENDER_ENGINE = os.getenv("RENDER_ENGINE", "selenium").lower()
+CHROME_BINARY = os.getenv("CHROME_BINARY", "")  # CDP engine; found on PATH when empty
+CDP_MAX_PAGES = int(os.getenv("CDP_MAX_PAGES", "4"))  # pages rendered concurrently by the CDP engine
+CDP_LAUNCH_TIMEOUT = 20  # seconds to wait for Chrome's DevTools endpoint
+
+# Capture mode: "screenshot" (clipped page capture) or "svg" (Highcharts getSVG rasterized out of process,
+# falling back to a screenshot when export is unavailable)
+CAPTURE_MODE = os.getenv("CAPTURE_MODE", "screenshot").lower()
+SVG_SCALE = float(os.getenv("SVG_SCALE", "1.0"))  # rasterization zoom of the exported SVG
+SVG_RASTERIZER = os.getenv("SVG_RASTERIZER", "rsvg-convert")
+SVG_RASTERIZE_TIMEOUT = 15  # seconds
+
+# Chrome lifecycle configuration
+CHROME_POOL_SIZE = int(os.getenv("CHROME_POOL_SIZE", "1"))  # browsers kept alive
+CHROME_MAX_RSS_MB = int(os.getenv("CHROME_MAX_RSS_MB", "700"))  # recycle above this tree RSS
+CHROME_MAX_RENDERS = int(os.getenv("CHROME_MAX_RENDERS", "50"))  # recycle after this many renders
+CHROME_MAX_AGE = int(os.getenv("CHROME_MAX_AGE", "1800"))  # seconds
+CHROME_RENDER_DEADLINE = int(os.getenv("CHROME_RENDER_DEADLINE", "45"))  # seconds, hard kill
+CHROME_QUIT_TIMEOUT = 10  # seconds to wait for driver.quit() before killing
+CHROME_REAP_INTERVAL = 60  # seconds between orphan process sweeps
@@ -10,6 +10,7 @@ Example: fees ethereum eth chain 1w 1d
 
 import os
 import sys
+from artemisbot.utils import startup
 from dotenv import load_dotenv
 
 # Load environment variables first
@@ -29,16 +30,38 @@ if missing_vars:
     sys.exit(1)
 
 print("Environment variables loaded successfully")
+startup.mark("environment")
+
+import logging
+from config import LOG_FORMAT, LOG_LEVEL
+
+logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+# The HTTP client logs every getUpdates poll at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 import signal
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
-from artemisbot.handlers.message_handlers import handle_message, handle_group_message, help_command
+from telegram.ext import Application, CommandHandler, InlineQueryHandler, MessageHandler, filters
+from artemisbot.handlers.message_handlers import handle_message, help_command, stats_command, profile_command
+from artemisbot.handlers.command_filters import CHART_COMMAND
+from artemisbot.handlers.inline import inline_query, start_render_worker
+from artemisbot.handlers.subscriptions import (
+    start_scheduler, subscribe_command, subscriptions_command, unsubscribe_command
+)
+from artemisbot.chart import blob_store
+from artemisbot.utils.asset_mappings import load_mappings
+from artemisbot.utils.profiling import handle_profile_signal
+startup.mark("imports")
 
 def signal_handler(signum, frame):
     """Handle shutdown signals."""
     print("Received shutdown signal")
     sys.exit(0)
 
+async def start_background_tasks(application: Application) -> None:
+    """Start the subscription scheduler and the inline render worker once the bot is initialized."""
+    await start_scheduler(application)
+    await start_render_worker(application)
+
 def main():
     """Start the bot."""
     print("Initializing bot...")
@@ -46,6 +69,8 @@ def main():
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    # kill -USR1 <pid> profiles the running bot for PROFILE_SIGNAL_SECONDS
+    signal.signal(signal.SIGUSR1, handle_profile_signal)
     
     # Create lock file
     lock_file = "/tmp/artemis_telegram_bot.lock"
@@ -57,15 +82,33 @@ def main():
         f.write(str(os.getpid()))
     
     try:
+        # Load the asset index now so the first chart request doesn't pay for it
+        print("Loading asset mappings...")
+        load_mappings()
+        startup.mark("mappings")
+
+        # Cached chart files from an earlier run are unreachable after a restart
+        removed = blob_store.clear_disk_cache()
+        if removed:
+            print(f"Removed {removed} stale cached chart files")
+
         print("Creating Telegram application...")
         # Create the Application
-        application = Application.builder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+        application = Application.builder().token(os.getenv("TELEGRAM_BOT_TOKEN")).post_init(start_background_tasks).build()
         
         print("Adding handlers...")
         # Add handlers
         application.add_handler(CommandHandler("help", help_command))
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-        application.add_handler(MessageHandler(filters.TEXT & filters.ChatType.GROUPS, handle_group_message))
+        application.add_handler(CommandHandler("stats", stats_command))
+        application.add_handler(CommandHandler("profile", profile_command))
+        application.add_handler(CommandHandler("subscribe", subscribe_command))
+        application.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+        application.add_handler(CommandHandler("subscriptions", subscriptions_command))
+        # The command grammar filter drops ordinary chatter before any handler runs
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND & CHART_COMMAND, handle_message))
+        application.add_handler(InlineQueryHandler(inline_query))
+        startup.mark("application")
+        print(startup.report())
         
         # Start the bot
         print("Starting bot...")
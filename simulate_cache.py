@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Replay the chart request log against candidate cache policies.
+
+Reads the request log the bot writes (REQUEST_LOG_FILE and its rotated files,
+see artemisbot/utils/request_log.py) and simulates every combination of the
+given policy options:
+
+- a default TTL, optionally overridden per granularity (1d=3600,1w=21600),
+- LRU or LFU eviction under a memory budget (0 for unbounded),
+- prewarming the N most requested charts of the log, refreshed as they expire.
+
+For each combination it reports the hit rate, renders saved compared to no
+cache, render time saved and the memory held by the cache.
+
+Usage:
+    python simulate_cache.py [log files...] [--ttl 300 900] [--granularity-ttl 1d=3600,1w=21600]
+                             [--eviction lru lfu] [--budget 0 20MB] [--prewarm 0 10]
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import math
+import os
+import statistics
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+# Only config: importing the bot's runtime modules would start its side effects here
+from config import CACHE_DURATION, REQUEST_LOG_BACKUPS, REQUEST_LOG_FILE
+
+# Image size assumed for charts the log has no size for
+DEFAULT_CHART_BYTES = 100 * 1024
+SIZE_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def default_log_files() -> List[str]:
+    """REQUEST_LOG_FILE and its rotated files, oldest first."""
+    candidates = [f"{REQUEST_LOG_FILE}.{i}" for i in range(REQUEST_LOG_BACKUPS, 0, -1)] + [REQUEST_LOG_FILE]
+    return [path for path in candidates if os.path.exists(path)]
+
+
+def load_requests(paths: List[str]) -> List[Dict]:
+    """Successful chart requests from the given log files, in time order."""
+    requests = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("status") == "ok" and "key" in entry and "ts" in entry:
+                    requests.append(entry)
+    requests.sort(key=lambda entry: entry["ts"])
+    return requests
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count such as 0, 500KB or 20MB."""
+    text = text.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def parse_granularity_ttls(text: str) -> Dict[str, int]:
+    """Parse per-granularity TTLs such as 1d=3600,1w=21600 (empty for none)."""
+    ttls = {}
+    for part in filter(None, text.split(",")):
+        granularity, _, seconds = part.partition("=")
+        ttls[granularity.strip()] = int(seconds)
+    return ttls
+
+
+def granularity_of(key: str) -> str:
+    """Granularity field of a canonical chart key (metric:assets:time_period:granularity[:%])."""
+    parts = key.split(":")
+    return parts[3] if len(parts) > 3 else ""
+
+
+def chart_costs(requests: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """Image size and render time of each chart, from the log (medians where a chart has none)."""
+    sizes = defaultdict(list)
+    render_times = defaultdict(list)
+    for entry in requests:
+        if entry.get("bytes"):
+            sizes[entry["key"]].append(entry["bytes"])
+        if entry.get("outcome") == "miss" and entry.get("render_ms") is not None:
+            render_times[entry["key"]].append(entry["render_ms"])
+
+    all_sizes = [size for values in sizes.values() for size in values]
+    all_times = [ms for values in render_times.values() for ms in values]
+    default_size = statistics.median(all_sizes) if all_sizes else DEFAULT_CHART_BYTES
+    default_time = statistics.median(all_times) if all_times else 0.0
+    return {
+        key: {
+            "bytes": sizes[key][-1] if sizes[key] else default_size,
+            "render_ms": statistics.mean(render_times[key]) if render_times[key] else default_time,
+        }
+        for key in {entry["key"] for entry in requests}
+    }
+
+
+def simulate(requests: List[Dict], costs: Dict[str, Dict[str, float]], policy: Dict) -> Dict[str, float]:
+    """
+    Replay requests against one cache policy.
+
+    Args:
+        requests: Successful requests in time order
+        costs: Per-chart size and render time (see chart_costs)
+        policy: ttl, granularity_ttls, eviction ("lru" or "lfu"), budget (bytes, 0 for
+            unbounded) and prewarm (number of most requested charts kept warm)
+
+    Returns:
+        hits, renders, renders_saved, render_seconds_saved, peak_bytes and mean_bytes
+    """
+    def ttl_of(key: str) -> int:
+        return policy["granularity_ttls"].get(granularity_of(key), policy["ttl"])
+
+    # Prewarmed charts are pinned and refreshed in the background every TTL over the whole log
+    counts = Counter(entry["key"] for entry in requests)
+    prewarmed = {key for key, _ in counts.most_common(policy["prewarm"])}
+    duration = requests[-1]["ts"] - requests[0]["ts"] if requests else 0
+    renders = sum(max(1, math.ceil(duration / ttl_of(key))) for key in prewarmed)
+    render_ms = sum(max(1, math.ceil(duration / ttl_of(key))) * costs[key]["render_ms"] for key in prewarmed)
+    pinned_bytes = sum(costs[key]["bytes"] for key in prewarmed)
+
+    entries: "OrderedDict[str, Dict]" = OrderedDict()  # key -> expires, bytes, uses (LRU order)
+    expiries: List = []  # (expires, key) heap for dropping expired entries
+    lfu_heap: List = []  # (uses, last_used, key) with stale items skipped on pop
+    cached_bytes = 0
+    peak_bytes = memory_total = 0
+    hits = 0
+    tick = itertools.count()
+
+    def drop(key: str) -> None:
+        nonlocal cached_bytes
+        cached_bytes -= entries.pop(key)["bytes"]
+
+    for entry in requests:
+        now, key = entry["ts"], entry["key"]
+        while expiries and expiries[0][0] <= now:
+            expires, expired_key = heapq.heappop(expiries)
+            if expired_key in entries and entries[expired_key]["expires"] == expires:
+                drop(expired_key)
+
+        if key in prewarmed:
+            hits += 1
+        elif key in entries:
+            hits += 1
+            cached = entries[key]
+            cached["uses"] += 1
+            entries.move_to_end(key)
+            if policy["eviction"] == "lfu":
+                heapq.heappush(lfu_heap, (cached["uses"], next(tick), key))
+        else:
+            renders += 1
+            render_ms += costs[key]["render_ms"]
+            size = costs[key]["bytes"]
+            budget = policy["budget"]
+            if not budget or pinned_bytes + size <= budget:
+                # Evict until the new chart fits the budget
+                while budget and entries and pinned_bytes + cached_bytes + size > budget:
+                    if policy["eviction"] == "lfu":
+                        uses, _, victim = heapq.heappop(lfu_heap)
+                        if victim not in entries or entries[victim]["uses"] != uses:
+                            continue
+                    else:
+                        victim = next(iter(entries))
+                    drop(victim)
+                expires = now + ttl_of(key)
+                entries[key] = {"expires": expires, "bytes": size, "uses": 1}
+                cached_bytes += size
+                heapq.heappush(expiries, (expires, key))
+                if policy["eviction"] == "lfu":
+                    heapq.heappush(lfu_heap, (1, next(tick), key))
+
+        memory = pinned_bytes + cached_bytes
+        peak_bytes = max(peak_bytes, memory)
+        memory_total += memory
+
+    baseline_ms = sum(costs[entry["key"]]["render_ms"] for entry in requests)
+    return {
+        "hits": hits,
+        "renders": renders,
+        "renders_saved": len(requests) - renders,
+        "render_seconds_saved": (baseline_ms - render_ms) / 1000,
+        "peak_bytes": peak_bytes,
+        "mean_bytes": memory_total / len(requests) if requests else 0,
+    }
+
+
+def format_bytes(value: float) -> str:
+    """Human readable byte count."""
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}GB"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay the chart request log against cache policies.")
+    parser.add_argument("logs", nargs="*", help="request log files (default: REQUEST_LOG_FILE and rotations)")
+    parser.add_argument("--ttl", nargs="+", type=int, default=[CACHE_DURATION], help="default TTLs in seconds")
+    parser.add_argument("--granularity-ttl", nargs="+", default=[""],
+                        help="per-granularity TTL overrides, e.g. 1d=3600,1w=21600")
+    parser.add_argument("--eviction", nargs="+", choices=["lru", "lfu"], default=["lru"])
+    parser.add_argument("--budget", nargs="+", default=["0"], help="cache memory budgets, e.g. 0 (unbounded) 20MB")
+    parser.add_argument("--prewarm", nargs="+", type=int, default=[0], help="most requested charts kept warm")
+    args = parser.parse_args(argv)
+
+    paths = args.logs or default_log_files()
+    requests = load_requests(paths)
+    if not requests:
+        parser.exit(1, f"No successful chart requests found in {', '.join(paths) or REQUEST_LOG_FILE}\n")
+
+    costs = chart_costs(requests)
+    observed_hits = sum(1 for entry in requests if entry.get("outcome") == "hit")
+    days = (requests[-1]["ts"] - requests[0]["ts"]) / 86400
+    print(f"Replayed {len(requests)} requests for {len(costs)} charts over {days:.1f} days "
+          f"from {len(paths)} file(s); observed hit rate {observed_hits / len(requests):.1%}")
+    print()
+
+    header = (f"{'ttl':>6} {'per granularity':<18} {'evict':<5} {'budget':>8} {'prewarm':>7} "
+              f"{'hit rate':>8} {'renders':>8} {'saved':>8} {'time saved':>11} {'peak mem':>9} {'mean mem':>9}")
+    print(header)
+    print("-" * len(header))
+    for ttl, granularity_ttl, eviction, budget, prewarm in itertools.product(
+        args.ttl, args.granularity_ttl, args.eviction, args.budget, args.prewarm
+    ):
+        policy = {
+            "ttl": ttl,
+            "granularity_ttls": parse_granularity_ttls(granularity_ttl),
+            "eviction": eviction,
+            "budget": parse_size(budget),
+            "prewarm": prewarm,
+        }
+        result = simulate(requests, costs, policy)
+        print(f"{ttl:>6} {granularity_ttl or '-':<18} {eviction:<5} {budget:>8} {prewarm:>7} "
+              f"{result['hits'] / len(requests):>8.1%} {result['renders']:>8} {result['renders_saved']:>8} "
+              f"{result['render_seconds_saved']:>10.0f}s {format_bytes(result['peak_bytes']):>9} "
+              f"{format_bytes(result['mean_bytes']):>9}")
+
+
+if __name__ == "__main__":
+    main()
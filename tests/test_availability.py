@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from artemisbot.utils import availability
+
+
+@pytest.fixture(autouse=True)
+def matrix(tmp_path, monkeypatch):
+    monkeypatch.setattr(availability, "AVAILABILITY_FILE", str(tmp_path / "availability.json"))
+    monkeypatch.setattr(availability, "AVAILABILITY", {})
+    monkeypatch.setattr(availability, "_LOADED", True)
+
+
+def test_unknown_combinations_are_available():
+    assert not availability.is_unavailable("bitcoin", "tvl")
+
+
+def test_no_data_marks_metric_unavailable_until_success():
+    availability.record("bitcoin", "tvl", False)
+    assert availability.is_unavailable("bitcoin", "tvl")
+    availability.record("bitcoin", "tvl", True)
+    assert not availability.is_unavailable("bitcoin", "tvl")
+
+
+def test_unavailable_entries_expire(monkeypatch):
+    availability.record("bitcoin", "tvl", False)
+    later = time.time() + availability.NO_DATA_RECHECK + 1
+    monkeypatch.setattr(availability.time, "time", lambda: later)
+    assert not availability.is_unavailable("bitcoin", "tvl")
+
+
+def test_available_metrics_follow_candidate_order():
+    availability.record("solana", "tvl", True)
+    availability.record("solana", "price", True)
+    availability.record("solana", "fees", False)
+    assert availability.available_metrics("solana", ["price", "fees", "tvl"]) == ["price", "tvl"]
+
+
+def test_available_then_one_no_data_stays_available():
+    availability.record("bitcoin", "tvl", True)
+    availability.record("bitcoin", "tvl", False, "all")
+    assert not availability.is_unavailable("bitcoin", "tvl")
+    assert availability.available_metrics("bitcoin") == ["tvl"]
+
+
+def test_short_period_no_data_needs_several_periods():
+    periods = ["1w", "mtd", "1m", "3m", "6m", "ytd", "1y"][:availability.NO_DATA_MIN_PERIODS]
+    for period in periods[:-1] + periods[:1]:
+        availability.record("solana", "tvl", False, period)
+    assert not availability.is_unavailable("solana", "tvl")
+    availability.record("solana", "tvl", False, periods[-1])
+    assert availability.is_unavailable("solana", "tvl")
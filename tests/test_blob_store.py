@@ -0,0 +1,34 @@
+import pytest
+
+from artemisbot.chart import blob_store
+
+
+@pytest.fixture
+def disk_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(blob_store, "BLOB_CACHE_DIR", str(tmp_path))
+    for name in ("BLOBS", "FILE_IDS", "_SIZES", "_REFS", "_PERCEPTUAL_INDEX"):
+        monkeypatch.setattr(blob_store, name, {})
+    return tmp_path
+
+
+def test_streamed_upload_is_closed_after_sending(disk_cache):
+    digest = blob_store.put(b"chart")
+    with blob_store.upload_source(digest) as photo:
+        handle = photo.input_file_content
+        assert handle.read() == b"chart"
+    assert handle.closed
+
+
+def test_released_blob_has_no_upload_source(disk_cache):
+    digest = blob_store.put(b"chart")
+    blob_store.release(digest)
+    with blob_store.upload_source(digest) as photo:
+        assert photo is None
+
+
+def test_files_from_an_earlier_process_are_removed(disk_cache):
+    kept = blob_store.put(b"chart")
+    (disk_cache / "0123abcd.png").write_bytes(b"old")
+    (disk_cache / "4567ef.png.tmp").write_bytes(b"partial")
+    assert blob_store.clear_disk_cache() == 2
+    assert [p.name for p in disk_cache.iterdir()] == [f"{kept}.png"]
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from artemisbot.chart import cdp_engine
+
+
+class FakeBrowser:
+    def __init__(self, name):
+        self.name = name
+        self.pid = 0
+        self.active_pages = 0
+        self.render_count = 0
+        self.timed_out = False
+        self.closed = False
+
+    def is_alive(self):
+        return not self.closed
+
+    def recycle_reason(self):
+        return "render deadline exceeded" if self.timed_out else None
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    launched = []
+
+    async def launch():
+        launched.append(FakeBrowser(f"browser{len(launched)}"))
+        return launched[-1]
+
+    monkeypatch.setattr(cdp_engine, "_launch", launch)
+    monkeypatch.setattr(cdp_engine, "_BROWSER", None)
+    monkeypatch.setattr(cdp_engine, "_BROWSER_LOCK", None)
+    monkeypatch.setattr(cdp_engine, "_PAGES", None)
+    monkeypatch.setattr(cdp_engine, "_RETIRING", [])
+    return launched
+
+
+def test_flagged_browser_is_replaced_while_its_pages_finish(engine, monkeypatch):
+    release = None
+
+    async def render_page(browser, url, work):
+        await release.wait()
+        return browser.name
+
+    monkeypatch.setattr(cdp_engine, "_render_page", render_page)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(cdp_engine._with_page("url", None))
+        await asyncio.sleep(0)
+        old = cdp_engine._BROWSER
+        old.timed_out = True
+
+        replacement = await cdp_engine._get_browser()
+        assert replacement is not old
+        assert not old.closed
+
+        release.set()
+        assert await first == old.name
+        assert old.closed
+        assert not replacement.closed
+        assert cdp_engine._RETIRING == []
+
+    asyncio.run(scenario())
+    assert len(engine) == 2
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+import pytest
+from telegram import Chat, Message, Update
+
+from artemisbot.handlers.command_filters import CHART_COMMAND
+from artemisbot.utils.command_parser import MAX_COMPARE_ASSETS, compile_command_grammar, match_command, parse_command
+
+
+def test_accepts_chart_and_dashboard_commands():
+    assert match_command("price solana 1w 1d")
+    assert match_command("TVL aave 3m 1w % csv")
+    assert match_command("dash eth ytd 1d")
+
+
+def test_rejects_chatter_and_incomplete_commands():
+    assert match_command("gm everyone, price is up today") is None
+    assert match_command("price solana 1w") is None
+    assert match_command("price solana 2w 1d") is None
+    assert match_command("mcap solana 1w 1d") is None
+
+
+def test_group_prefix_is_captured():
+    assert match_command("=art price sol 1m 1d").group("prefix")
+    assert match_command("price sol 1m 1d").group("prefix") is None
+
+
+def test_grammar_is_generated_from_tables():
+    grammar = compile_command_grammar(["foo"], ["1w"], ["1d"])
+    assert grammar.match("foo btc 1w 1d")
+    assert grammar.match("price btc 1w 1d") is None
+
+
+def test_comparison_assets_are_matched_and_resolved_in_order():
+    assert match_command("price sol, eth,btc 3m 1d %").group("asset") == "sol, eth,btc"
+    metric, tickers, *_ = parse_command("price sol, eth,btc 3m 1d", check_availability=False)
+    assert tickers == ["solana", "ethereum", "bitcoin"]
+
+
+def test_comparison_rejects_unknown_and_too_many_assets():
+    with pytest.raises(ValueError, match="not found"):
+        parse_command("price sol,notacoin 3m 1d", check_availability=False)
+    too_many = ",".join(["sol"] * (MAX_COMPARE_ASSETS + 1))
+    with pytest.raises(ValueError, match="At most"):
+        parse_command(f"price {too_many} 3m 1d", check_availability=False)
+
+
+def make_update(text, chat_type):
+    return Update(1, message=Message(1, datetime.now(timezone.utc), Chat(id=-100, type=chat_type), text=text))
+
+
+def test_filter_hands_one_match_to_the_handler():
+    result = CHART_COMMAND.check_update(make_update("=art dash eth ytd 1d", Chat.SUPERGROUP))
+    assert result["matches"][0].group("command") == "dash"
+    assert CHART_COMMAND.check_update(make_update("price sol 1m 1d", Chat.PRIVATE))
+    assert not CHART_COMMAND.check_update(make_update("=art price sol 1m 1d", Chat.PRIVATE))
+    assert not CHART_COMMAND.check_update(make_update("gm", Chat.SUPERGROUP))
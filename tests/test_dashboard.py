@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import time
+
+from artemisbot.handlers import message_handlers
+
+
+def test_panel_renders_are_bounded_by_the_pool(monkeypatch):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def take_screenshot(url, is_percentage, log_key):
+        with lock:
+            running.append(url)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(url)
+        return url.encode()
+
+    monkeypatch.setattr(message_handlers, "take_screenshot", take_screenshot)
+    monkeypatch.setattr(message_handlers, "RENDER_ENGINE", "selenium")
+    monkeypatch.setattr(message_handlers, "CHROME_POOL_SIZE", 2)
+    monkeypatch.setattr(message_handlers, "_PANEL_RENDERS", None)
+
+    async def dashboards():
+        urls = [f"chart-{i}" for i in range(6)]
+        return await asyncio.gather(*(message_handlers._render_panel(url, url) for url in urls * 2))
+
+    results = asyncio.run(dashboards())
+    assert len(results) == 12
+    assert max(peak) == 2
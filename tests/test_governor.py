@@ -0,0 +1,41 @@
+from artemisbot.chart import governor
+
+
+def fake_processes(monkeypatch, parents, names):
+    killed = []
+    # launching() would otherwise register a real reap at pytest's exit
+    monkeypatch.setattr(governor, "_EXIT_HOOK_REGISTERED", True)
+    monkeypatch.setattr(governor, "_parent_map", lambda: dict(parents))
+    monkeypatch.setattr(governor, "_read_proc", lambda pid, name: names.get(pid, "bash") + "\n")
+    monkeypatch.setattr(governor, "_kill_pids", killed.extend)
+    return killed
+
+
+def test_only_chrome_adopted_by_init_is_reaped(monkeypatch):
+    own = 500
+    monkeypatch.setattr(governor.os, "getpid", lambda: own)
+    parents = {own: 1, 10: own, 11: 10, 20: 1, 21: 20, 30: 1}
+    names = {10: "chromedriver", 11: "chrome", 20: "chrome", 21: "chrome", 30: "bash"}
+    killed = fake_processes(monkeypatch, parents, names)
+    assert sorted(governor.reap_orphans()) == [20, 21]
+    assert sorted(killed) == [20, 21]
+
+
+def test_nothing_is_reaped_while_a_browser_launches(monkeypatch):
+    killed = fake_processes(monkeypatch, {20: 1}, {20: "chrome"})
+    with governor.launching():
+        assert governor.reap_orphans() == []
+    assert killed == []
+    assert governor.reap_orphans() == [20]
+
+
+def test_exit_reap_is_registered_only_by_a_launch(monkeypatch):
+    hooks = []
+    monkeypatch.setattr(governor, "_EXIT_HOOK_REGISTERED", False)
+    monkeypatch.setattr(governor.atexit, "register", hooks.append)
+    assert hooks == []
+    with governor.launching():
+        pass
+    with governor.launching():
+        pass
+    assert hooks == [governor.shutdown]
@@ -0,0 +1,33 @@
+import asyncio
+
+from artemisbot.handlers import inline
+
+
+class FakeInlineQuery:
+    def __init__(self, query):
+        self.query = query
+        self.answers = []
+
+    async def answer(self, results, **kwargs):
+        self.answers.append(results)
+
+
+class FakeUpdate:
+    def __init__(self, query):
+        self.inline_query = FakeInlineQuery(query)
+
+
+def test_uncached_chart_without_cache_chat_is_not_queued(monkeypatch):
+    monkeypatch.setattr(inline, "INLINE_CACHE_CHAT_ID", None)
+    monkeypatch.setattr(inline, "_RENDER_QUEUE", asyncio.Queue())
+    monkeypatch.setattr(inline, "parse_command",
+                        lambda query: ("price", ["solana"], "CHAIN", "1m", "1d", False, "chart"))
+    monkeypatch.setattr(inline, "cached_file_id", lambda url, is_percentage: (None, False))
+    update = FakeUpdate("price solana 1m 1d")
+
+    asyncio.run(inline.inline_query(update, None))
+
+    assert inline._RENDER_QUEUE.empty()
+    [result] = update.inline_query.answers[0]
+    assert result.description == "Send this chart request"
+    assert result.input_message_content.message_text == "price solana 1m 1d"
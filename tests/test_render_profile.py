@@ -0,0 +1,30 @@
+from artemisbot.chart import render_profile
+from config import parse_viewport
+
+
+def test_app_profile_leaves_the_page_untouched(monkeypatch):
+    monkeypatch.setattr(render_profile, "RENDER_PROFILE", "app")
+    assert not render_profile.chart_only()
+    assert render_profile.document_start_script() is None
+
+
+def test_chart_profile_hides_chrome_and_disables_animations(monkeypatch):
+    monkeypatch.setattr(render_profile, "RENDER_PROFILE", "chart")
+    script = render_profile.document_start_script()
+    assert render_profile.chart_only()
+    assert "display: none !important" in script
+    assert "animation: false" in script
+
+
+def test_viewport_override_and_unknown_profile(monkeypatch):
+    monkeypatch.setattr(render_profile, "RENDER_PROFILE", "missing")
+    monkeypatch.setattr(render_profile, "RENDER_VIEWPORT", (800, 450))
+    assert render_profile.viewport() == (800, 450)
+    assert not render_profile.chart_only()
+
+
+def test_viewport_setting_is_validated_once():
+    assert parse_viewport("1280X720") == (1280, 720)
+    assert parse_viewport("") is None
+    for malformed in ["1200", "wide x tall", "0x600", "800x"]:
+        assert parse_viewport(malformed) is None
@@ -0,0 +1,102 @@
+import sys
+import threading
+
+import pytest
+
+from artemisbot.chart import blob_store, screenshot
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(screenshot, "SCREENSHOT_CACHE", {})
+    for name in ("BLOBS", "FILE_IDS", "_SIZES", "_REFS", "_PERCEPTUAL_INDEX"):
+        monkeypatch.setattr(blob_store, name, {})
+
+
+def test_concurrent_replacements_release_each_digest_once():
+    shared = b"shared chart"
+    screenshot._cache_screenshot("other", shared)
+    start = threading.Barrier(8)
+
+    def render(worker):
+        start.wait()
+        for i in range(200):
+            screenshot._cache_screenshot("key", shared if i % 2 else f"{worker}-{i}".encode())
+
+    threads = [threading.Thread(target=render, args=(worker,)) for worker in range(8)]
+    # Switch threads as often as possible to expose races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # Only the two live cache entries hold references
+    assert sum(blob_store._REFS.values()) == 2
+    assert blob_store.get(screenshot.SCREENSHOT_CACHE["other"][1]) == shared
+
+
+class FakeDriver:
+    def __init__(self, state):
+        self.state = state
+
+    def execute_cdp_cmd(self, *args):
+        pass
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        return self.state
+
+
+@pytest.fixture
+def short_stages(monkeypatch):
+    samples = []
+    monkeypatch.setattr(screenshot.upstream, "stage_timeout", lambda stage: 0.3)
+    monkeypatch.setattr(screenshot.upstream, "record_latency", lambda stage, seconds: samples.append((stage, seconds)))
+    monkeypatch.setattr(screenshot.render_profile, "settle_seconds", lambda: 0)
+    return samples
+
+
+def test_slow_chart_is_a_failure_not_no_data(short_stages):
+    result = screenshot._load_chart_page(FakeDriver(None), "https://app.artemis.xyz/chart")
+    assert result.startswith("ERROR:SCREENSHOT_FAILED")
+    assert short_stages[-1] == ("chart_render", 0.3)
+
+
+def test_chart_loaded_empty_is_no_data(short_stages):
+    assert screenshot._load_chart_page(FakeDriver("no_data"), "https://app.artemis.xyz/chart") == "ERROR:NO_DATA"
+    assert screenshot._load_chart_page(FakeDriver("ready"), "https://app.artemis.xyz/chart") is None
+
+
+def test_percentage_without_series_is_not_cached_as_raw(monkeypatch):
+    engine = (lambda url, is_percentage: (b"raw chart", None, None), None)
+    monkeypatch.setattr(screenshot, "_render_engine", lambda: engine)
+    result = screenshot._render_screenshot("url", True, "raw-key", "pct-key")
+    assert result == "ERROR:NO_PERCENTAGE"
+    assert "pct-key" not in screenshot.SCREENSHOT_CACHE
+    assert "raw-key" in screenshot.SCREENSHOT_CACHE
+
+
+def test_take_screenshot_logs_misses_and_hits(monkeypatch):
+    logged = []
+    monkeypatch.setattr(screenshot.request_log, "record",
+                        lambda key, outcome, status="ok", render_ms=None, size=None: logged.append((key, outcome, status)))
+    monkeypatch.setattr(screenshot, "NEGATIVE_CACHE", {})
+    monkeypatch.setattr(screenshot.upstream, "allow_request", lambda: True)
+    monkeypatch.setattr(screenshot.upstream, "record_result", lambda result: None)
+    engine = (lambda url, is_percentage: (b"raw chart", None, None), None)
+    monkeypatch.setattr(screenshot, "_render_engine", lambda: engine)
+
+    screenshot.take_screenshot("url", log_key="price:solana:1m:1d")
+    screenshot.take_screenshot("url", log_key="price:solana:1m:1d")
+    screenshot.take_screenshot("url")
+    assert logged == [("price:solana:1m:1d", "miss", "ok"), ("price:solana:1m:1d", "hit", "ok")]
@@ -0,0 +1,55 @@
+import math
+from datetime import datetime, timezone
+
+from artemisbot.chart.chart_data import SeriesData
+from artemisbot.chart.series_cache import DAY_MS, _month_bucket, _week_bucket, resample, window_start
+
+
+def ms(year, month, day, hour=0):
+    return datetime(year, month, day, hour, tzinfo=timezone.utc).timestamp() * 1000
+
+
+def daily(start, values):
+    return SeriesData("Series", [start + i * DAY_MS for i in range(len(values))], values)
+
+
+def test_weeks_start_on_monday():
+    assert _week_bucket(ms(2024, 1, 1)) == ms(2024, 1, 1)  # a Monday
+    assert _week_bucket(ms(2024, 3, 10, 23)) == ms(2024, 3, 4)  # Sunday belongs to the week before
+    assert _week_bucket(ms(2024, 3, 11)) == ms(2024, 3, 11)
+    assert _week_bucket(ms(1970, 1, 1)) == ms(1969, 12, 29)
+
+
+def test_month_buckets_follow_calendar_boundaries():
+    assert _month_bucket(ms(2024, 2, 29, 18)) == ms(2024, 2, 1)
+    assert _month_bucket(ms(2024, 3, 1)) == ms(2024, 3, 1)
+    assert _month_bucket(ms(2023, 12, 31, 23)) == ms(2023, 12, 1)
+
+
+def test_window_starts():
+    now = ms(2024, 3, 15, 12)
+    assert window_start("mtd", now) == ms(2024, 3, 1)
+    assert window_start("ytd", now) == ms(2024, 1, 1)
+    assert window_start("1w", now) == ms(2024, 3, 8)
+    assert window_start("all", now) == -math.inf
+    assert window_start("mtd", ms(2024, 3, 1, 6)) == ms(2024, 3, 1)
+
+
+def test_resample_aggregates_per_metric_and_skips_gaps():
+    nan = math.nan
+    # Two weeks from Monday 2024-01-01; the second week has gaps, including its last day
+    series = daily(ms(2024, 1, 1), [1, 2, 3, 4, 5, 6, 7, nan, 2, nan, 4, nan, nan, nan])
+
+    fees = resample(series, "1w", "fees")
+    assert list(fees.timestamps) == [ms(2024, 1, 1), ms(2024, 1, 8)]
+    assert list(fees.values) == [28, 6]
+    assert list(resample(series, "1w", "price").values) == [7, 4]
+    assert list(resample(series, "1w", "dau").values) == [4, 3]
+
+
+def test_resample_keeps_empty_buckets_as_nan():
+    series = daily(ms(2024, 1, 30), [1, 1, math.nan, math.nan])
+    monthly = resample(series, "1m", "fees")
+    assert list(monthly.timestamps) == [ms(2024, 1, 1), ms(2024, 2, 1)]
+    assert monthly.values[0] == 2
+    assert math.isnan(monthly.values[1])
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+from simulate_cache import chart_costs, simulate
+
+
+def requests_for(*keys_and_times):
+    return [{"ts": ts, "key": key, "outcome": "miss", "status": "ok", "render_ms": 1000, "bytes": 100}
+            for key, ts in keys_and_times]
+
+
+def policy(**overrides):
+    values = {"ttl": 300, "granularity_ttls": {}, "eviction": "lru", "budget": 0, "prewarm": 0}
+    values.update(overrides)
+    return values
+
+
+def test_ttl_per_granularity_decides_hits():
+    requests = requests_for(("price:solana:1m:1d", 0), ("price:solana:1m:1d", 600),
+                            ("price:solana:1m:1w", 0), ("price:solana:1m:1w", 600))
+    costs = chart_costs(requests)
+    assert simulate(requests, costs, policy())["hits"] == 0
+    result = simulate(requests, costs, policy(granularity_ttls={"1w": 3600}))
+    assert result["hits"] == 1
+    assert result["renders_saved"] == 1
+    assert result["render_seconds_saved"] == 1
+
+
+def test_budget_evicts_least_recently_or_frequently_used():
+    requests = requests_for(("a:x:1m:1d", 0), ("a:x:1m:1d", 1), ("b:x:1m:1d", 2), ("c:x:1m:1d", 3),
+                            ("a:x:1m:1d", 4))
+    costs = chart_costs(requests)
+    lru = simulate(requests, costs, policy(budget=200))
+    lfu = simulate(requests, costs, policy(budget=200, eviction="lfu"))
+    assert lru["peak_bytes"] == 200
+    assert lru["hits"] == 1
+    assert lfu["hits"] == 2
+
+
+def test_simulator_does_not_import_the_bot_runtime():
+    check = "import sys, simulate_cache; print(sorted(m for m in sys.modules if m.startswith('artemisbot')))"
+    output = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
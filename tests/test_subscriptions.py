@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from artemisbot.handlers import subscriptions
+from artemisbot.utils import subscription_store
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(subscription_store, "SUBSCRIPTIONS_FILE", str(tmp_path / "subscriptions.json"))
+    monkeypatch.setattr(subscription_store, "SUBSCRIPTIONS", [])
+    monkeypatch.setattr(subscription_store, "_LOADED", True)
+
+
+def subscribe(chat_id, metric="price", send_time="09:00", last_sent=None):
+    return subscription_store.add_subscription(chat_id, metric, ["solana"], "CHAIN", "1m", "1d", False,
+                                               send_time, last_sent)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_photo(self, chat_id, photo, caption):
+        self.sent.append((chat_id, photo))
+        return FakeMessage(f"file-{len(self.sent)}")
+
+
+class FakeMessage:
+    def __init__(self, file_id):
+        self.photo = [FakeFile(file_id)]
+
+
+class FakeFile:
+    def __init__(self, file_id):
+        self.file_id = file_id
+
+
+@pytest.fixture
+def deliver(monkeypatch):
+    renders = []
+
+    def take_screenshot(url, is_percentage, log_key):
+        renders.append(log_key)
+        return "ERROR:NO_DATA" if log_key.startswith("fees") else b"chart"
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 10, 19, 9, 30, tzinfo=timezone.utc)
+
+    monkeypatch.setattr(subscriptions, "take_screenshot", take_screenshot)
+    monkeypatch.setattr(subscriptions, "datetime", Clock)
+    monkeypatch.setattr(subscriptions, "SUBSCRIPTION_SEND_INTERVAL", 0)
+    monkeypatch.setattr(subscriptions, "photo_for", lambda data: data)
+    monkeypatch.setattr(subscriptions, "remember_file_id", lambda data, file_id: None)
+    bot = FakeBot()
+    return lambda: asyncio.run(subscriptions.deliver_due_subscriptions(bot)), bot, renders
+
+
+def test_due_subscriptions_respect_time_and_last_sent():
+    subscribe(1, send_time="09:00")
+    subscribe(2, send_time="10:00")
+    subscribe(3, send_time="08:00", last_sent="2026-10-19")
+    subscribe(4, send_time="08:00", last_sent="2026-10-18")
+    due = subscription_store.due_subscriptions("2026-10-19", "09:00")
+    assert sorted(s["chat_id"] for s in due) == [1, 4]
+
+
+def test_shared_chart_renders_once_and_reuses_the_file_id(deliver):
+    run, bot, renders = deliver
+    subscribe(1)
+    subscribe(2)
+    subscribe(3, metric="tvl")
+    assert run() == 3
+    assert sorted(renders) == ["price:solana:1m:1d", "tvl:solana:1m:1d"]
+    price_sends = [photo for chat_id, photo in bot.sent if chat_id in (1, 2)]
+    assert price_sends == [b"chart", "file-1"]
+
+
+def test_failed_chart_is_marked_sent_and_not_retried_today(deliver):
+    run, bot, renders = deliver
+    subscribe(1, metric="fees")
+    assert run() == 1
+    assert bot.sent == []
+    assert subscription_store.list_subscriptions(1)[0]["last_sent"] == "2026-10-19"
+    assert run() == 0
+    assert renders == ["fees:solana:1m:1d"]
@@ -0,0 +1,48 @@
+import asyncio
+import stat
+import sys
+
+import pytest
+
+from artemisbot.chart import svg_export
+
+# Stub rasterizer: echoes stdin as the "PNG", fails on <fail/> and hangs on <hang/>
+STUB = f"""#!{sys.executable}
+import sys, time
+svg = sys.stdin.read()
+if "<fail/>" in svg:
+    sys.stderr.write("bad svg")
+    sys.exit(1)
+if "<hang/>" in svg:
+    time.sleep(30)
+sys.stdout.write("PNG:" + svg)
+"""
+
+
+@pytest.fixture(autouse=True)
+def stub_rasterizer(tmp_path, monkeypatch):
+    script = tmp_path / "rsvg-convert"
+    script.write_text(STUB)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(svg_export, "SVG_RASTERIZER", str(script))
+    monkeypatch.setattr(svg_export, "SVG_RASTERIZE_TIMEOUT", 1)
+    svg_export.rasterizer_available.cache_clear()
+    yield
+    svg_export.rasterizer_available.cache_clear()
+
+
+@pytest.mark.parametrize("rasterize", [
+    svg_export.rasterize,
+    lambda svg: asyncio.run(svg_export.rasterize_async(svg)),
+], ids=["sync", "async"])
+def test_rasterize_success_failure_and_timeout(rasterize):
+    assert rasterize("<svg/>") == b"PNG:<svg/>"
+    assert rasterize("<svg><fail/></svg>") is None
+    assert rasterize("<svg><hang/></svg>") is None
+    assert rasterize(None) is None
+
+
+def test_missing_rasterizer_is_reported_unavailable(monkeypatch, tmp_path):
+    monkeypatch.setattr(svg_export, "SVG_RASTERIZER", str(tmp_path / "missing"))
+    svg_export.rasterizer_available.cache_clear()
+    assert svg_export.rasterize("<svg/>") is None
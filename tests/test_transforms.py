@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from artemisbot.chart.chart_data import SeriesData
+from artemisbot.chart.transforms import percent_change, percent_change_all
+
+DAY_MS = 86_400_000
+
+
+def make_series(values, name="Test"):
+    return SeriesData(name, [i * DAY_MS for i in range(len(values))], values)
+
+
+def test_percent_change_of_known_series():
+    result = percent_change(make_series([50.0, 75.0, 100.0, 25.0]))
+    assert list(result.values) == pytest.approx([0.0, 50.0, 100.0, -50.0])
+
+
+def test_leading_missing_and_zero_values_are_skipped_for_base():
+    result = percent_change(make_series([None, 0.0, 10.0, 15.0]))
+    assert math.isnan(result.values[0])
+    assert result.values[1] == pytest.approx(-100.0)
+    assert list(result.values[2:]) == pytest.approx([0.0, 50.0])
+
+
+def test_missing_points_stay_missing():
+    result = percent_change(make_series([10.0, None, 12.0]))
+    assert math.isnan(result.values[1])
+    assert result.values[2] == pytest.approx(20.0)
+
+
+def test_series_without_base_is_all_missing():
+    result = percent_change(make_series([None, 0.0]))
+    assert len(result) == 2
+    assert all(math.isnan(v) for v in result.values)
+
+
+def test_timestamps_and_name_are_preserved():
+    series = make_series([1.0, 2.0], name="Solana")
+    result = percent_change(series)
+    assert result.name == "Solana"
+    assert list(result.timestamps) == list(series.timestamps)
+
+
+def test_percent_change_all_transforms_every_series():
+    results = percent_change_all([make_series([1.0, 2.0]), make_series([4.0, 3.0])])
+    assert [list(r.values) for r in results] == [pytest.approx([0.0, 100.0]), pytest.approx([0.0, -25.0])]
+
+
+def test_percentage_payload_keeps_chart_positions_around_empty_series():
+    from artemisbot.chart.chart_data import indexed_series_from_js
+    from artemisbot.chart.screenshot import percentage_payload
+
+    raw = [
+        {"name": "Solana", "x": [0, DAY_MS], "y": [10.0, 20.0]},
+        {"name": "Ethereum", "x": [], "y": []},
+        {"name": "Bitcoin", "x": [0, DAY_MS], "y": [100.0, 50.0]},
+    ]
+    payload = percentage_payload(indexed_series_from_js(raw))
+    assert [position for position, _ in payload] == [0, 2]
+    assert payload[1][1] == [[0, pytest.approx(0.0)], [DAY_MS, pytest.approx(-50.0)]]
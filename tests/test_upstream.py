@@ -0,0 +1,52 @@
+from collections import deque
+
+import pytest
+
+from artemisbot.chart import upstream
+from config import BREAKER_COOLDOWN, BREAKER_MIN_REQUESTS, STAGE_TIMEOUT_DEFAULT, STAGE_TIMEOUT_MAX, STAGE_TIMEOUT_MIN
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(upstream, "_LATENCIES", {})
+    monkeypatch.setattr(upstream, "_OUTCOMES", deque())
+    monkeypatch.setattr(upstream, "_STATE", {"state": upstream.CLOSED, "opened_at": 0.0, "probe_in_flight": False})
+    monkeypatch.setattr(upstream.time, "time", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_then_recovers_through_a_probe(clock):
+    for _ in range(BREAKER_MIN_REQUESTS):
+        assert upstream.allow_request()
+        upstream.record_outcome(False)
+    assert upstream.breaker_state() == upstream.OPEN
+    assert not upstream.allow_request()
+
+    clock[0] += BREAKER_COOLDOWN
+    assert upstream.allow_request()
+    assert upstream.breaker_state() == upstream.HALF_OPEN
+    upstream.record_outcome(True)
+    assert upstream.breaker_state() == upstream.CLOSED
+    assert upstream.allow_request()
+
+
+def test_half_open_lets_one_probe_through_and_reopens_on_failure(clock):
+    for _ in range(BREAKER_MIN_REQUESTS):
+        upstream.record_outcome(False)
+    clock[0] += BREAKER_COOLDOWN
+    assert upstream.allow_request()
+    assert not upstream.allow_request()
+
+    upstream.record_outcome(False)
+    assert upstream.breaker_state() == upstream.OPEN
+    assert not upstream.allow_request()
+
+
+def test_stage_timeout_defaults_then_clamps(clock):
+    assert upstream.stage_timeout("page_load") == STAGE_TIMEOUT_DEFAULT
+    for _ in range(upstream.MIN_LATENCY_SAMPLES):
+        upstream.record_latency("page_load", 0.01)
+        upstream.record_latency("chart_render", 1000.0)
+    assert upstream.stage_timeout("page_load") == STAGE_TIMEOUT_MIN
+    assert upstream.stage_timeout("chart_render") == STAGE_TIMEOUT_MAX
@@ -8,6 +8,8 @@ import json
 from typing import Dict, List
 from dotenv import load_dotenv
 from artemis import Artemis
+from config import ASSET_MAPPINGS_SNAPSHOT
+from artemisbot.utils.asset_mappings import compile_mappings, write_mappings_snapshot
 
 # Load environment variables
 load_dotenv()
@@ -88,6 +90,9 @@ def main():
         
         print("Updating mappings file...")
         update_mappings_file(mappings)
+
+        print("Writing precompiled mappings snapshot...")
+        write_mappings_snapshot(compile_mappings(mappings), ASSET_MAPPINGS_SNAPSHOT)
         
         print("Done! Mappings have been updated.")
         